@@ -2,18 +2,64 @@
 NexCast Backend API
 FastAPI server with WebSocket for live commentary
 """
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from .routes.ws_stream import router as ws_router
+from .services import metrics
+from .services.media import get_media_archive
+from .services.persistence import get_commentary_writer
+from .services.sessions import get_session_store
+from .services.warmup import get_warmup
+from .services.workers import shutdown_pools
 
 # Load environment variables
 env_path = Path(__file__).parent / "config" / ".env"
 load_dotenv(env_path)
 
-app = FastAPI(title="NexCast API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Evict idle sessions even when nobody connects
+    sweeper = asyncio.create_task(get_session_store().sweep_forever())
+    # Write spoken commentary to the database in the background (COMMENTARY_DB_URL)
+    writer = get_commentary_writer()
+    flusher = asyncio.create_task(writer.run()) if writer is not None else None
+    # ...and its audio and keyframes to the object store (MEDIA_STORE_URL), keys written with the rows
+    media = get_media_archive()
+    uploader = asyncio.create_task(media.run()) if media is not None else None
+    # Build provider clients and open their connections now, so the first frame isn't the one paying for it
+    warmup = get_warmup()
+    warming = None
+    if os.getenv("WARMUP", "1") == "1":
+        budget_ms = int(os.getenv("WARMUP_BUDGET_MS", "10000"))
+        warming = asyncio.create_task(warmup.run(budget=budget_ms / 1000 if budget_ms > 0 else None))
+    else:
+        warmup.skip()
+    yield
+    sweeper.cancel()
+    if warming is not None:
+        warming.cancel()
+    # Uploads first: the rows they finish still go out with the writer. Each background task
+    # is awaited after cancelling, so a write still running in its thread settles before close() takes over
+    if uploader is not None:
+        uploader.cancel()
+        await asyncio.gather(uploader, return_exceptions=True)
+        await media.close()
+    if flusher is not None:
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+        await writer.close()
+    # Stop the CPU worker pool with the server
+    shutdown_pools()
+    metrics.shutdown()
+
+
+app = FastAPI(title="NexCast API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration for frontend
 app.add_middleware(
@@ -29,6 +75,17 @@ app.include_router(ws_router)
 
 
 @app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "nexcast-api"}
+async def health_check(response: Response):
+    """Health check endpoint: 503 until startup warmup is done, with each component's startup time"""
+    warmup = get_warmup()
+    if not warmup.ready:
+        response.status_code = 503
+        return {"status": "warming", "service": "nexcast-api", "startup": warmup.components}
+    return {"status": "healthy", "service": "nexcast-api", "startup": warmup.components}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: stage latency histograms, frame/error counters, session gauges"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
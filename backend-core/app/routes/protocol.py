@@ -0,0 +1,57 @@
+"""
+Binary WebSocket protocol: typed header + raw payload
+Negotiated in the init message, JSON/base64 stays as the fallback
+
+Header (big-endian, 10 bytes):
+    version  uint8   PROTOCOL_VERSION
+    kind     uint8   KIND_FRAME (client -> server) / KIND_AUDIO* (server -> client)
+    seq      uint32  frame sequence number (audio echoes the frame it answers)
+    value    uint32  kind-specific:
+                       KIND_FRAME        0
+                       KIND_AUDIO        frames dropped so far
+                       KIND_AUDIO_CHUNK  chunk index within the clip
+
+Control messages (ready, skipped, audio_end) are always JSON text frames.
+"""
+import struct
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+
+PROTOCOL_VERSION = 1
+KIND_FRAME = 1
+KIND_AUDIO = 2
+KIND_AUDIO_CHUNK = 3
+
+HEADER = struct.Struct("!BBII")
+
+
+class ProtocolError(ValueError):
+    """Raised when a binary message has a bad header"""
+
+
+def negotiate(requested: str | None) -> str:
+    """Pick the protocol for a session from what the client asked for"""
+    return PROTOCOL_BINARY if requested == PROTOCOL_BINARY else PROTOCOL_JSON
+
+
+def pack(kind: int, payload: bytes, seq: int = 0, value: int = 0) -> bytes:
+    """Build one binary message (header + payload)"""
+    return b"".join((HEADER.pack(PROTOCOL_VERSION, kind, seq, value), payload))
+
+
+def unpack(message: bytes) -> tuple[int, int, int, memoryview]:
+    """
+    Split a binary message into header fields and payload
+
+    Returns:
+        (kind, seq, value, payload) - payload is a memoryview, no copy is made
+    """
+    if len(message) < HEADER.size:
+        raise ProtocolError(f"Message too short: {len(message)} bytes")
+
+    version, kind, seq, value = HEADER.unpack_from(message)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version: {version}")
+
+    return kind, seq, value, memoryview(message)[HEADER.size:]
@@ -2,14 +2,143 @@
 WebSocket endpoint for real-time frame processing
 Receives frames, sends back audio commentary
 """
+import asyncio
+import base64
+import binascii
+import json
+import os
+import time
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from ..services.pipeline import process_frame
+from ..services import metrics
+from ..services.frames import FrameNormalizer
+from ..services.ingest import FrameQueue
+from ..services.media import get_media_archive
+from ..services.metrics import SessionTrace
+from ..services.pacing import CapturePacer
+from ..services.persistence import get_commentary_writer
+from ..services.pipeline import SessionPipeline
+from ..services.scene_gate import SceneGate
+from ..services.sessions import SessionState, get_session_store
+from . import protocol
 
 router = APIRouter()
 
-# In-memory session storage: {session_id: {"preferences": {...}}}
-sessions = {}
+
+def _decode_json_frame(text: str) -> bytes | None:
+    """Parse a JSON message and base64-decode its frame"""
+    data = json.loads(text)
+    if data.get("type") == "frame":
+        return binascii.a2b_base64(data["frame"])
+    return None
+
+
+async def _receive_frames(websocket: WebSocket, state: SessionState, queue: FrameQueue):
+    """Keep reading the socket so frames never back up behind the pipeline"""
+    session_id = state.session_id
+    sessions = get_session_store()
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        sessions.touch(state)
+
+        # Binary: header + raw JPEG, payload stays a memoryview over the received buffer
+        if message.get("bytes") is not None:
+            try:
+                with metrics.timed("decode"):
+                    kind, seq, _, payload = protocol.unpack(message["bytes"])
+            except protocol.ProtocolError as e:
+                print(f"[{session_id}] Bad binary message: {e}")
+                metrics.ERRORS.labels("decode").inc()
+                continue
+            if kind == protocol.KIND_FRAME:
+                _enqueue(state, queue, seq, payload)
+            continue
+
+        # JSON fallback: base64 JPEG, decoded once here so later stages only see bytes. Decoding is a
+        # single C pass, cheaper than pickling the text to a pool worker and the bytes back
+        with metrics.timed("decode"):
+            frame = _decode_json_frame(message["text"])
+        if frame is not None:
+            _enqueue(state, queue, queue.received, frame)
+
+
+def _enqueue(state: SessionState, queue: FrameQueue, seq: int, frame: bytes | memoryview):
+    state.frames += 1
+    dropped = queue.dropped
+    # Stamped on arrival, the frame's deadline (FRAME_DEADLINE_MS) counts from here
+    queue.put((seq, frame, time.perf_counter()))
+    metrics.FRAMES.labels("received").inc()
+    if queue.dropped > dropped:
+        metrics.FRAMES.labels("dropped").inc()
+
+
+class SocketSink:
+    """Encodes pipeline output for one socket in the session's negotiated protocol"""
+
+    def __init__(self, websocket: WebSocket, binary: bool, frames: FrameQueue, state: SessionState):
+        self._websocket = websocket
+        self._binary = binary
+        self._frames = frames
+        self._state = state
+        self._lock = asyncio.Lock()     # Stages send from different tasks, keep messages whole
+
+    async def _send_json(self, message: dict):
+        with metrics.timed("encode"):
+            text = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        async with self._lock:
+            with metrics.timed("send"):
+                await self._websocket.send_text(text)
+
+    async def _send_bytes(self, message: bytes):
+        async with self._lock:
+            with metrics.timed("send"):
+                await self._websocket.send_bytes(message)
+
+    async def skipped(self, seq: int, distance: int, frames_skipped: int):
+        await self._send_json({
+            "type": "skipped",
+            "seq": seq,
+            "reason": "no_scene_change",
+            "distance": distance,
+            "frames_skipped": frames_skipped
+        })
+
+    async def throttle(self, seq: int, reason: str, retry_after_ms: int):
+        await self._send_json({"type": "throttle", "seq": seq, "reason": reason, "retry_after_ms": retry_after_ms})
+
+    async def audio(self, seq: int, audio: bytes):
+        self._state.clips += 1
+        if self._binary:
+            with metrics.timed("encode"):
+                message = protocol.pack(protocol.KIND_AUDIO, audio, seq=seq, value=self._frames.dropped)
+            await self._send_bytes(message)
+        else:
+            with metrics.timed("encode"):
+                encoded = base64.b64encode(audio).decode("utf-8")
+            await self._send_json({"type": "audio", "audio": encoded, "frames_dropped": self._frames.dropped})
+
+    async def audio_chunk(self, seq: int, index: int, chunk: bytes):
+        if self._binary:
+            with metrics.timed("encode"):
+                message = protocol.pack(protocol.KIND_AUDIO_CHUNK, chunk, seq=seq, value=index)
+            await self._send_bytes(message)
+        else:
+            with metrics.timed("encode"):
+                encoded = base64.b64encode(chunk).decode("utf-8")
+            await self._send_json({"type": "audio_chunk", "seq": seq, "index": index, "audio": encoded})
+
+    async def audio_end(self, seq: int, stats: dict):
+        self._state.clips += 1
+        await self._send_json({"type": "audio_end", "seq": seq, **stats, "frames_dropped": self._frames.dropped})
+
+    async def abandoned(self, seq: int, reason: str, saved_ms: int):
+        await self._send_json({"type": "abandoned", "seq": seq, "reason": reason, "provider_ms_saved": saved_ms})
+
+    async def rate_hint(self, interval_ms: int, reason: str):
+        await self._send_json({"type": "rate_hint", "interval_ms": interval_ms, "reason": reason})
 
 
 @router.websocket("/ws/{session_id}")
@@ -19,43 +148,136 @@ async def websocket_stream(websocket: WebSocket, session_id: int):
 
     Protocol:
         1. Client connects
-        2. Client sends initial preferences: {"type": "init", "preferences": {...}}
-        3. Client sends frames: {"type": "frame", "frame": "base64..."}
-        4. Server responds with: {"type": "audio", "audio": "base64..."}
+        2. Client sends initial preferences (trace_id is optional):
+             {"type": "init", "preferences": {...}, "protocol": "binary", "stream_audio": true, "trace_id": "..."}
+        3. Server confirms: {"type": "ready", "protocol": "binary" | "json", "stream_audio": bool, "trace_id": "..."}
+        4. Client sends frames:
+             json:   {"type": "frame", "frame": "base64..."}
+             binary: header(KIND_FRAME) + raw JPEG bytes (see protocol.py)
+        5. Server responds with:
+             json:   {"type": "audio", "audio": "base64...", "frames_dropped": n}
+             binary: header(KIND_AUDIO, value=frames dropped) + raw MP3 bytes
+           or, with "stream_audio": true in init, one message per TTS chunk:
+             json:   {"type": "audio_chunk", "seq": n, "index": i, "audio": "base64..."}
+             binary: header(KIND_AUDIO_CHUNK, value=chunk index) + raw MP3 bytes
+           followed by {"type": "audio_end", "seq": n, "chunks": k, "time_to_first_audio_ms": t, ...}
+           or, when the scene hasn't changed (both protocols):
+             {"type": "skipped", "seq": n, "reason": "no_scene_change", "distance": d, "frames_skipped": n}
+           or, when the server or a provider is at capacity (both protocols):
+             {"type": "throttle", "seq": n, "reason": "server_busy" | "provider_rate_limit", "retry_after_ms": t}
+           or, when a frame went stale before its commentary started or a provider missed its deadline (both protocols):
+             {"type": "abandoned", "seq": n, "reason": "superseded" | "expired" | "deadline", "provider_ms_saved": t}
+        6. Server adjusts the client's capture rate whenever the pipeline speeds up or falls behind:
+             {"type": "rate_hint", "interval_ms": t, "reason": "pipeline_latency" | "frames_dropped"}
+
+    Frames that arrive while the pipeline is busy go into a small ring
+    (FRAME_QUEUE_SIZE, default 1), so stale frames are dropped instead of queueing.
+    With VISION_BATCH_FRAMES > 1 (default 1) the ring holds at least that many and
+    vision takes up to that many pending frames per request (waiting up to
+    VISION_BATCH_WAIT_MS, default 0, for more); all but the newest are motion
+    context and get no message of their own.
+    Frames within SCENE_CHANGE_THRESHOLD bits (dHash, default 5, 0 = off) of the
+    last processed frame are skipped. Frames that go through are downscaled to
+    FRAME_MAX_DIMENSION (default 1280, 0 = off) and re-encoded at FRAME_JPEG_QUALITY
+    before vision. Vision/LLM/TTS run as overlapping stages joined by queues of
+    PIPELINE_STAGE_DEPTH (default 1). A scene change of at least
+    INTERJECTION_DISTANCE bits (default 16, 0 = off) on an idle session gets a
+    pre-rendered interjection first (a separate "audio" clip, or chunk 0 of the
+    frame's stream with "interjection": true in its audio_end). A frame's LLM/TTS
+    work is cancelled, until its audio starts, once it is FRAME_DEADLINE_MS old
+    (default 8000, 0 = off) or a newer frame has been described; after
+    SUPERSEDE_LIMIT frames superseded in a row (default 2, 0 = never supersede)
+    the next one is allowed to finish. Rate hints follow the session's time to
+    first audio and slowest stage (plus a backoff while frames are dropped),
+    within RATE_HINT_MIN_MS..RATE_HINT_MAX_MS (default 1000..30000, RATE_HINTS=0 = off).
+
+    Session state (preferences, vision history, counters) lives in the shared
+    SessionStore and is dropped when the socket closes. Stage timings and
+    counters are on /metrics; with TRACE_LOGS=1 each stage of each frame is
+    also logged as a JSON line carrying the session's trace_id.
     """
     await websocket.accept()
     print(f"[{session_id}] WebSocket connected")
+    sessions = get_session_store()
+    metrics.ACTIVE_SESSIONS.inc()
+    trace = SessionTrace(session_id)
+    state = None
 
     try:
         # Wait for initial handshake with preferences
         init_data = await websocket.receive_json()
         if init_data.get("type") == "init":
-            sessions[session_id] = {"preferences": init_data.get("preferences", {})}
-            print(f"[{session_id}] Session initialized with preferences")
-            await websocket.send_json({"type": "ready"})
-
-        # Main frame processing loop
-        while True:
-            data = await websocket.receive_json()
-
-            if data.get("type") == "frame":
-                frame_base64 = data["frame"]
-                preferences = sessions[session_id]["preferences"]
-
-                # Process through pipeline
-                print(f"[{session_id}] Processing frame...")
-                audio_base64 = await process_frame(session_id, frame_base64, preferences)
+            wire_protocol = protocol.negotiate(init_data.get("protocol"))
+            stream_audio = bool(init_data.get("stream_audio", False))
+            state = await sessions.open(session_id, init_data.get("preferences", {}), wire_protocol, stream_audio)
+            trace = SessionTrace(session_id, trace_id=init_data.get("trace_id"))
+            print(f"[{session_id}] Session initialized with preferences "
+                  f"({wire_protocol} protocol, {'streaming' if stream_audio else 'buffered'} audio, trace {trace.trace_id})")
+            trace.event("session_open", protocol=wire_protocol, stream_audio=stream_audio)
+            await websocket.send_json({
+                "type": "ready",
+                "protocol": wire_protocol,
+                "stream_audio": stream_audio,
+                "trace_id": trace.trace_id
+            })
 
-                # Send audio back
-                await websocket.send_json({"type": "audio", "audio": audio_base64})
+        # Reader and pipeline run side by side; whichever stops first ends the session
+        if state is None:
+            raise ValueError("expected an init message first")
+        vision_batch = int(os.getenv("VISION_BATCH_FRAMES", "1"))
+        # A batch is taken from the ring, so it has to hold one
+        queue = FrameQueue(maxlen=max(int(os.getenv("FRAME_QUEUE_SIZE", "1")), vision_batch))
+        pipeline = SessionPipeline(
+            session_id,
+            state.preferences,
+            SocketSink(websocket, state.protocol == protocol.PROTOCOL_BINARY, queue, state),
+            gate=SceneGate(threshold=int(os.getenv("SCENE_CHANGE_THRESHOLD", "5"))),
+            normalizer=FrameNormalizer(
+                max_dimension=int(os.getenv("FRAME_MAX_DIMENSION", "1280")),
+                quality=int(os.getenv("FRAME_JPEG_QUALITY", "75"))
+            ),
+            stream_audio=state.stream_audio,
+            depth=int(os.getenv("PIPELINE_STAGE_DEPTH", "1")),
+            interjection_distance=int(os.getenv("INTERJECTION_DISTANCE", "16")),
+            trace=trace,
+            frame_deadline=int(os.getenv("FRAME_DEADLINE_MS", "8000")) / 1000,
+            supersede_limit=int(os.getenv("SUPERSEDE_LIMIT", "2")),
+            pacer=CapturePacer(
+                min_interval=int(os.getenv("RATE_HINT_MIN_MS", "1000")) / 1000,
+                max_interval=int(os.getenv("RATE_HINT_MAX_MS", "30000")) / 1000
+            ) if os.getenv("RATE_HINTS", "1") == "1" else None,
+            vision_batch=vision_batch,
+            vision_batch_wait=int(os.getenv("VISION_BATCH_WAIT_MS", "0")) / 1000,
+            archive=get_commentary_writer(),
+            media=get_media_archive()
+        )
+        reader = asyncio.create_task(_receive_frames(websocket, state, queue))
+        worker = asyncio.create_task(pipeline.run(queue))
+        try:
+            done, _ = await asyncio.wait({reader, worker}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            reader.cancel()
+            worker.cancel()
+            await asyncio.gather(reader, worker, return_exceptions=True)
 
     except WebSocketDisconnect:
-        # Cleanup session
-        if session_id in sessions:
-            del sessions[session_id]
+        # Cleanup session (kept while a reconnect still uses it)
+        if state is not None:
+            sessions.close(state)
         print(f"[{session_id}] WebSocket disconnected")
+        trace.event("session_close")
     except Exception as e:
         print(f"[{session_id}] Error: {e}")
-        if session_id in sessions:
-            del sessions[session_id]
+        trace.event("session_error", error=repr(e))
+        if state is not None:
+            sessions.close(state)
+        # Don't leave the client talking to a socket with no pipeline behind it
+        try:
+            await websocket.close(code=1011)
+        except RuntimeError:
+            pass    # Already closed
         raise
+    finally:
+        metrics.ACTIVE_SESSIONS.dec()
@@ -0,0 +1,154 @@
+"""
+Audio Cache: rendered TTS clips keyed by (text, voice_id, model_id, output_format)
+In-memory LRU bounded by total bytes, with an optional on-disk tier that survives restarts
+"""
+import asyncio
+import contextlib
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+
+def _disk_name(key: tuple) -> str:
+    return hashlib.sha256("\x1f".join(key).encode("utf-8")).hexdigest() + ".mp3"
+
+
+class AudioCache:
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_dir: str | None = None, disk_max_bytes: int = 256 * 1024 * 1024):
+        """
+        Byte-budgeted clip cache shared by every session on this process
+
+        Args:
+            max_bytes: Memory budget, least recently used clips are evicted past it (0 disables memory caching)
+            disk_dir: Directory for the on-disk tier (None = memory only)
+            disk_max_bytes: Disk budget, oldest files are deleted past it
+        """
+        self._max_bytes = max(0, max_bytes)
+        self._clips = OrderedDict()     # {key: bytes}, least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_max_bytes = max(0, disk_max_bytes)
+        self._disk_files = OrderedDict()    # {file name: size}, oldest first
+        self._disk_bytes = 0
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            files = [(path.stat(), path.name) for path in self._disk_dir.glob("*.mp3")]
+            for stat, name in sorted(files, key=lambda item: item[0].st_mtime):
+                self._disk_files[name] = stat.st_size
+                self._disk_bytes += stat.st_size
+
+    def __len__(self) -> int:
+        return len(self._clips)
+
+    async def get(self, key: tuple) -> bytes | None:
+        """Look up a clip in memory, then on disk (disk hits are promoted to memory)"""
+        audio = self._clips.get(key)
+        if audio is not None:
+            self._clips.move_to_end(key)
+            self.hits += 1
+            return audio
+
+        name = _disk_name(key)
+        if self._disk_dir is not None:
+            # Not only indexed files: other worker processes share the directory and write to it too
+            try:
+                audio = await asyncio.to_thread((self._disk_dir / name).read_bytes)
+            except OSError:
+                self._forget_file(name)
+            else:
+                if name not in self._disk_files:
+                    self._disk_files[name] = len(audio)
+                    self._disk_bytes += len(audio)
+                self._remember(key, audio)
+                self.hits += 1
+                return audio
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: tuple, audio: bytes) -> None:
+        """Store a clip in memory and, if configured, on disk"""
+        if not audio:
+            return
+        self._remember(key, audio)
+
+        name = _disk_name(key)
+        if self._disk_dir is None or name in self._disk_files or len(audio) > self._disk_max_bytes:
+            return
+        try:
+            await asyncio.to_thread(self._write_file, name, audio)
+        except OSError as e:
+            print(f"[AudioCache] Disk write failed: {e}")
+            return
+        self._disk_files[name] = len(audio)
+        self._disk_bytes += len(audio)
+        while self._disk_bytes > self._disk_max_bytes:
+            oldest, _ = next(iter(self._disk_files.items()))
+            self._forget_file(oldest)
+            (self._disk_dir / oldest).unlink(missing_ok=True)
+
+    @contextlib.asynccontextmanager
+    async def exclusive(self, name: str):
+        """
+        Hold a lock file in the disk tier, so of the processes sharing it only one renders a set of clips
+        and the others wait, then read them from disk (no lock without a disk tier)
+
+        Args:
+            name: Lock name, one file per name
+        """
+        if self._disk_dir is None:
+            yield
+            return
+        try:
+            import fcntl
+        except ImportError:     # Windows: single-worker dev setups, nothing to share
+            yield
+            return
+        with open(self._disk_dir / f".{name}.lock", "a") as lock_file:
+            # Polled rather than blocking in a thread, so a cancelled waiter never takes the lock late
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(0.05)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _remember(self, key: tuple, audio: bytes):
+        if len(audio) > self._max_bytes:
+            return
+        previous = self._clips.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous)
+        self._clips[key] = audio
+        self.bytes += len(audio)
+        while self.bytes > self._max_bytes:
+            _, evicted = self._clips.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def _write_file(self, name: str, audio: bytes):
+        # Write then rename, so a crash never leaves a truncated clip behind
+        tmp = self._disk_dir / f".{name}.{os.getpid()}.tmp"
+        tmp.write_bytes(audio)
+        os.replace(tmp, self._disk_dir / name)
+
+    def _forget_file(self, name: str):
+        size = self._disk_files.pop(name, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+
+def cache_from_env() -> AudioCache:
+    """Build the TTS cache from AUDIO_CACHE_MAX_BYTES / AUDIO_CACHE_DIR / AUDIO_CACHE_DISK_MAX_BYTES"""
+    return AudioCache(
+        max_bytes=int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        disk_dir=os.getenv("AUDIO_CACHE_DIR") or None,
+        disk_max_bytes=int(os.getenv("AUDIO_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+    )
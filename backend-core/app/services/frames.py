@@ -0,0 +1,75 @@
+"""
+Frame Normalization: downscale and re-encode frames before they reach vision
+Bounds Gemini request size no matter what resolution the client captures at
+"""
+from io import BytesIO
+
+from PIL import Image, UnidentifiedImageError
+
+from .workers import run_cpu
+
+
+def normalize_jpeg(image_bytes: bytes | memoryview, max_dimension: int = 1280, quality: int = 75) -> bytes:
+    """
+    Shrink a frame to fit max_dimension and re-encode it as a baseline JPEG
+
+    Metadata (EXIF, ICC, comments) is not carried over.
+
+    Args:
+        image_bytes: Encoded image
+        max_dimension: Longest side in pixels after resizing (never upscales)
+        quality: JPEG quality 1-95
+
+    Returns:
+        bytes: Re-encoded JPEG
+    """
+    with Image.open(BytesIO(image_bytes)) as image:
+        # Let the JPEG decoder downscale via DCT first, then finish with a proper filter
+        image.draft("RGB", (max_dimension, max_dimension))
+        frame = image.convert("RGB")
+    frame.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    buffer = BytesIO()
+    frame.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+class FrameNormalizer:
+    def __init__(self, max_dimension: int = 1280, quality: int = 75):
+        """
+        Per-session preprocessing in front of the vision stage
+
+        Args:
+            max_dimension: Longest side in pixels, 0 disables normalization
+            quality: JPEG quality for the re-encoded frame
+        """
+        self._max_dimension = max_dimension
+        self._quality = quality
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def normalize(self, image_bytes: bytes | memoryview) -> bytes | memoryview:
+        """
+        Downscale and re-encode one frame on the shared worker pool
+
+        Returns:
+            The normalized JPEG, or the original frame if disabled or it can't be decoded
+        """
+        if self._max_dimension <= 0:
+            return image_bytes
+
+        try:
+            normalized = await run_cpu(normalize_jpeg, image_bytes, self._max_dimension, self._quality)
+        except (UnidentifiedImageError, OSError):
+            # Can't decode it, let vision decide what it is
+            return image_bytes
+
+        self.frames += 1
+        self.bytes_in += len(image_bytes)
+        self.bytes_out += len(normalized)
+        return normalized
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
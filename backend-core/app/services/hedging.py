@@ -0,0 +1,207 @@
+"""
+Hedged Provider Calls: deadlines, a hedge at the learned tail latency, fallback on failure
+The first attempt that answers wins, the others are cancelled
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+
+from . import metrics
+
+_trackers = {}      # {provider: LatencyTracker}
+_END = object()     # First item of a stream that produced nothing
+
+
+class DeadlineExceeded(TimeoutError):
+    """A provider call gave no answer within its deadline (<PROVIDER>_DEADLINE_MS)"""
+
+
+class LatencyTracker:
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.1,
+        min_samples: int = 20,
+        deadline: float | None = None,
+        window: int = 200
+    ):
+        """
+        Recent latencies of one provider, and when a hedge is worth its cost
+
+        Args:
+            percentile: Hedge once an attempt runs longer than this percentile of recent calls
+            budget: Extra attempts allowed per call on average (0.1 = at most ~10% more calls)
+            min_samples: Calls to observe before hedging at all
+            deadline: Seconds before a call gives up (None = no deadline)
+            window: Recent calls the percentile is computed over
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.deadline = deadline
+        self._samples = deque(maxlen=window)
+        self._tokens = 1.0      # Hedges earned: each call adds `budget`, each hedge spends 1
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait on an attempt before hedging it, None until enough calls were seen"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def start_call(self) -> None:
+        self._tokens = min(10.0, self._tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one hedge from the budget, False if it's used up"""
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+def latency_tracker(provider: str) -> LatencyTracker:
+    """
+    Shared tracker for a provider
+
+    Configured by HEDGE_PERCENTILE, HEDGE_BUDGET, HEDGE_MIN_SAMPLES and <PROVIDER>_DEADLINE_MS (0 = none).
+    """
+    tracker = _trackers.get(provider)
+    if tracker is None:
+        deadline_ms = float(os.getenv(f"{provider.upper()}_DEADLINE_MS", "15000"))
+        tracker = LatencyTracker(
+            percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+            budget=float(os.getenv("HEDGE_BUDGET", "0.1")),
+            min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+            deadline=deadline_ms / 1000 if deadline_ms > 0 else None
+        )
+        _trackers[provider] = tracker
+    return tracker
+
+
+async def hedged_call(
+    provider: str,
+    attempts: Sequence[Callable[[], Awaitable]],
+    discard: Callable[[object], Awaitable] | None = None
+):
+    """
+    Run attempts[0], starting the next attempt when the current one fails (fallback)
+    or is still running at the provider's learned tail latency (hedge, within budget)
+
+    Args:
+        provider: Provider name for latency tracking, budget and deadline
+        attempts: Zero-argument coroutine factories, primary first (e.g. primary then fallback model)
+        discard: Cleanup for results of attempts that finished but lost the race
+
+    Returns:
+        The result of the first attempt to succeed
+
+    Raises:
+        DeadlineExceeded: Nothing succeeded before the provider's deadline
+        The last attempt's exception if every attempt failed
+    """
+    tracker = latency_tracker(provider)
+    tracker.start_call()
+    started = time.perf_counter()
+    tasks = {}      # {task: launch time}
+    error = None
+    winner = None
+    may_hedge = True
+
+    def launch(reason: str | None = None):
+        index = len(tasks)
+        tasks[asyncio.create_task(attempts[index]())] = time.perf_counter()
+        if reason is not None:
+            metrics.HEDGED_CALLS.labels(provider, reason).inc()
+
+    launch()
+    try:
+        while True:
+            running = [task for task in tasks if not task.done()]
+            now = time.perf_counter()
+            wake = []
+            if tracker.deadline is not None:
+                wake.append(started + tracker.deadline - now)
+            delay = tracker.hedge_delay()
+            if may_hedge and delay is not None and len(tasks) < len(attempts) and running:
+                wake.append(tasks[running[-1]] + delay - now)
+
+            if running:
+                done, _ = await asyncio.wait(
+                    running, timeout=max(0.0, min(wake)) if wake else None, return_when=asyncio.FIRST_COMPLETED
+                )
+            else:
+                done = set()
+
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    tracker.record(time.perf_counter() - tasks[task])
+                    if task is not next(iter(tasks)):
+                        metrics.HEDGE_WINS.labels(provider).inc()
+                    return task.result()
+                error = task.exception()
+
+            now = time.perf_counter()
+            if tracker.deadline is not None and now - started >= tracker.deadline:
+                metrics.PROVIDER_DEADLINES.labels(provider).inc()
+                raise DeadlineExceeded(f"{provider} gave no answer within {tracker.deadline:.1f}s")
+            if len(tasks) < len(attempts):
+                if not any(not task.done() for task in tasks):
+                    launch("fallback")      # Everything so far failed
+                elif may_hedge and not done and delay is not None:
+                    # Still running past the tail latency
+                    if tracker.try_hedge():
+                        launch("hedge")
+                    else:
+                        may_hedge = False   # Over budget, let this call run to its deadline
+            elif not any(not task.done() for task in tasks):
+                raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if discard is not None:
+            for task in tasks:
+                if task is not winner and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+
+
+async def hedged_stream(provider: str, attempts: Sequence[Callable[[], AsyncIterator]]) -> AsyncIterator:
+    """
+    hedged_call() for streams: attempts race to their first item, then the winner is streamed
+    (the deadline and learned latency cover the first item only)
+
+    Args:
+        provider: Provider name for latency tracking, budget and deadline
+        attempts: Zero-argument async iterator factories, primary first
+
+    Yields:
+        Items of the winning attempt
+    """
+    async def first_item(attempt):
+        iterator = attempt()
+        try:
+            return iterator, await anext(iterator, _END)
+        except BaseException:
+            await iterator.aclose()
+            raise
+
+    iterator, first = await hedged_call(
+        provider,
+        [lambda attempt=attempt: first_item(attempt) for attempt in attempts],
+        discard=lambda result: result[0].aclose()
+    )
+    if first is _END:
+        return
+    try:
+        yield first
+        async for item in iterator:
+            yield item
+    finally:
+        await iterator.aclose()
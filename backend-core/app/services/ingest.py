@@ -0,0 +1,63 @@
+"""
+Frame Ingest: latest-frame-wins buffer between the socket and the pipeline
+The socket reader keeps pushing, the pipeline pulls when it's free
+"""
+import asyncio
+from collections import deque
+
+
+class FrameQueue:
+    def __init__(self, maxlen: int = 1):
+        """
+        Small ring of pending frames for one session
+
+        Args:
+            maxlen: Pending frames to keep (1 = only the newest frame survives)
+        """
+        self._frames = deque(maxlen=max(1, maxlen))
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put(self, frame) -> None:
+        """Add a frame, evicting the oldest pending one if the ring is full"""
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+        self._frames.append(frame)
+        self.received += 1
+        self._ready.set()
+
+    async def get(self):
+        """Wait for the next pending frame (oldest surviving frame first)"""
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+    async def get_batch(self, limit: int, wait: float = 0.0) -> list:
+        """
+        Wait for the next pending frame, then take up to `limit` frames in all (oldest first)
+
+        Args:
+            limit: Most frames to return
+            wait: Seconds to wait for more frames once the first is in hand (0 = only what's already pending)
+        """
+        batch = [await self.get()]
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + wait
+        while len(batch) < limit:
+            if self._frames:
+                batch.append(self._frames.popleft())
+                continue
+            remaining = give_up - loop.time()
+            if remaining <= 0:
+                break
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=remaining)
+            except TimeoutError:
+                break
+        return batch
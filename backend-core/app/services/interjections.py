@@ -0,0 +1,66 @@
+"""
+Interjection Library: short pre-rendered reactions per voice
+Sent the moment a big scene change starts a pipeline pass, while the real commentary renders
+"""
+import asyncio
+import random
+
+from .tts import TTSService
+
+INTERJECTIONS = (
+    "[gasps] Oh!",
+    "[laughs]",
+    "[excited] Whoa!",
+    "[intense] Here we go!",
+    "[excited] Look at this!",
+)
+
+
+class InterjectionLibrary:
+    def __init__(self, tts: TTSService, phrases: tuple[str, ...] = INTERJECTIONS):
+        """
+        Rendered clips are kept here and in the TTS cache, so a disk cache tier makes them survive restarts
+
+        Args:
+            tts: Service used to render (and cache) the clips
+            phrases: Interjection texts with audio tags
+        """
+        self._tts = tts
+        self._phrases = phrases
+        self._clips = {}        # {voice_id: [mp3 bytes, ...]}
+        self._warming = {}      # {voice_id: asyncio.Task}
+
+    def clip(self, voice_id: str) -> bytes | None:
+        """
+        Pick a random ready clip for a voice
+
+        Returns:
+            bytes: MP3 clip, or None if this voice hasn't been rendered yet (rendering starts in the background)
+        """
+        clips = self._clips.get(voice_id)
+        if clips:
+            return random.choice(clips)
+        self.prefetch(voice_id)
+        return None
+
+    def prefetch(self, voice_id: str) -> None:
+        """Start rendering a voice's clips in the background, if not already done or in progress"""
+        if voice_id in self._clips or voice_id in self._warming:
+            return
+        self._warming[voice_id] = asyncio.create_task(self.warm(voice_id))
+
+    async def warm(self, voice_id: str) -> None:
+        """Render every phrase for a voice (cache hits are free)"""
+        try:
+            results = await asyncio.gather(
+                *(self._tts.synthesize(text=phrase, voice_id=voice_id, voice_id_2=None) for phrase in self._phrases),
+                return_exceptions=True
+            )
+            clips = [audio for audio in results if isinstance(audio, bytes) and audio]
+            failed = len(results) - len(clips)
+            if failed:
+                print(f"[Interjections] {failed}/{len(results)} clips failed to render for voice {voice_id}")
+            if clips:
+                self._clips[voice_id] = clips
+        finally:
+            self._warming.pop(voice_id, None)
@@ -0,0 +1,170 @@
+"""
+Provider Limits: concurrency caps, token-bucket rate limits and global pipeline admission
+Configured for the whole server, each of its worker processes enforces its share
+"""
+import asyncio
+import os
+import time
+
+# Default in-flight calls per provider, override with <PROVIDER>_MAX_CONCURRENCY
+DEFAULT_MAX_CONCURRENCY = {
+    "gemini": 16,
+    "grok": 16,
+    "elevenlabs": 8,
+}
+
+# Default (calls per second, burst) per provider, override with <PROVIDER>_RATE_LIMIT / <PROVIDER>_BURST
+DEFAULT_RATE_LIMIT = {
+    "gemini": (10.0, 20),
+    "grok": (10.0, 20),
+    "elevenlabs": (5.0, 10),
+}
+
+_semaphores = {}    # {provider: asyncio.Semaphore}
+_buckets = {}       # {provider: TokenBucket | None}
+_admission = None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """
+        Reserving token bucket: callers queue up by taking tokens into debt
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket size (calls allowed back to back after an idle period)
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds a call made now would wait for its token (includes everyone already queued)"""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        """Take a token, sleeping until it has been refilled if the bucket is in debt"""
+        self._refill()
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class Admission:
+    def __init__(self, max_runs: int):
+        """
+        Global cap on frames in the Vision -> LLM -> TTS pipeline at once, across all sessions
+
+        Args:
+            max_runs: Concurrent pipeline runs allowed
+        """
+        self.max_runs = max(1, max_runs)
+        self.active = 0
+        self.rejected = 0
+
+    def try_enter(self) -> bool:
+        """Claim a run slot without waiting, False if the server is at capacity"""
+        if self.active >= self.max_runs:
+            self.rejected += 1
+            return False
+        self.active += 1
+        return True
+
+    def leave(self) -> None:
+        self.active = max(0, self.active - 1)
+
+
+def worker_processes() -> int:
+    """Server processes splitting the configured limits (WEB_CONCURRENCY, set by run_server.py)"""
+    return max(1, int(os.getenv("WEB_CONCURRENCY") or 1))
+
+
+def thin_shares(minimum: int = 2) -> list[str]:
+    """
+    Limits whose per-worker share is below minimum (logged at startup)
+
+    A two-speaker frame synthesizes both voices at once, and connections don't spread evenly
+    over workers, so a share of 1 serializes a worker while the others sit idle.
+    """
+    workers = worker_processes()
+    totals = {"MAX_CONCURRENT_PIPELINES": int(os.getenv("MAX_CONCURRENT_PIPELINES", "32"))}
+    for provider, default in DEFAULT_MAX_CONCURRENCY.items():
+        totals[f"{provider.upper()}_MAX_CONCURRENCY"] = int(os.getenv(f"{provider.upper()}_MAX_CONCURRENCY", default))
+    for provider, (rate, burst) in DEFAULT_RATE_LIMIT.items():
+        if float(os.getenv(f"{provider.upper()}_RATE_LIMIT", rate)) > 0:
+            totals[f"{provider.upper()}_BURST"] = int(os.getenv(f"{provider.upper()}_BURST", burst))
+    return [
+        f"{name}={total} over {workers} workers leaves {max(1, total // workers)} per worker"
+        for name, total in totals.items() if total // workers < minimum
+    ]
+
+
+def max_concurrency(provider: str) -> int:
+    """This process's share of the in-flight limit for a provider"""
+    default = DEFAULT_MAX_CONCURRENCY.get(provider, 8)
+    return max(1, int(os.getenv(f"{provider.upper()}_MAX_CONCURRENCY", default)) // worker_processes())
+
+
+def rate_bucket(provider: str) -> TokenBucket | None:
+    """
+    Token bucket for a provider, shared by this process's sessions
+
+    Refills at this process's share of <PROVIDER>_RATE_LIMIT (and <PROVIDER>_BURST),
+    so N workers together stay within the configured rate. None when the limit is 0 (unlimited).
+    """
+    if provider not in _buckets:
+        default_rate, default_burst = DEFAULT_RATE_LIMIT.get(provider, (5.0, 10))
+        rate = float(os.getenv(f"{provider.upper()}_RATE_LIMIT", default_rate)) / worker_processes()
+        burst = int(os.getenv(f"{provider.upper()}_BURST", default_burst)) // worker_processes()
+        _buckets[provider] = TokenBucket(rate, burst) if rate > 0 else None
+    return _buckets[provider]
+
+
+def provider_backlog(provider: str) -> float:
+    """Seconds a new call to a provider would wait for its rate-limit token"""
+    bucket = rate_bucket(provider)
+    return bucket.wait_time() if bucket is not None else 0.0
+
+
+class _ProviderSlot:
+    def __init__(self, provider: str):
+        self._provider = provider
+        self._semaphore = _semaphores.get(provider)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max_concurrency(provider))
+            _semaphores[provider] = self._semaphore
+
+    async def __aenter__(self):
+        bucket = rate_bucket(self._provider)
+        if bucket is not None:
+            await bucket.acquire()
+        await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+def provider_slot(provider: str) -> _ProviderSlot:
+    """
+    Rate limit + concurrency cap for one provider call (use as `async with provider_slot("grok"):`)
+
+    Waits for a token from the provider's bucket, then for an in-flight slot,
+    instead of letting bursts pile onto the provider and come back as 429s.
+    """
+    return _ProviderSlot(provider)
+
+
+def pipeline_admission() -> Admission:
+    """Get or create the admission singleton, this process's share of MAX_CONCURRENT_PIPELINES (default 32)"""
+    global _admission
+    if _admission is None:
+        _admission = Admission(int(os.getenv("MAX_CONCURRENT_PIPELINES", "32")) // worker_processes())
+    return _admission
@@ -2,16 +2,45 @@
 Grok LLM Service
 Generate humorous commentary from vision descriptions
 """
-from xai_sdk import Client
-from xai_sdk.chat import system, user
+import asyncio
+from collections.abc import AsyncIterator
+from xai_sdk import AsyncClient
+from xai_sdk.chat import assistant, system, user
 import os
+import re
+
+from . import metrics
+from .hedging import hedged_call, hedged_stream
+from .limits import provider_slot
+from .sessions import get_session_store
+
+SPEAKER_DELIMITER = " | "
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _frame_prompt(description: str) -> str:
+    return f"Describe what's happening: {description}"
+
+
+def _record_usage(response) -> None:
+    """Count prompt tokens (and how many came from the provider's prefix cache) and completion tokens"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    metrics.LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens)
+    metrics.LLM_TOKENS.labels("cached").inc(usage.cached_prompt_text_tokens)
+    metrics.LLM_TOKENS.labels("completion").inc(usage.completion_tokens)
 
 
 class LlmService:
-    def __init__(self):
-        """Initialize Grok client (stateless)"""
-        self._client = Client(api_key=os.getenv("XAI_API_KEY"), timeout=3600)
+    def __init__(self, client=None):
+        """Initialize Grok client (stateless, async so a slow completion never blocks the event loop)"""
+        # Hard cap on one whole completion; hedging.py bounds the wait for the first token (GROK_DEADLINE_MS)
+        timeout = float(os.getenv("GROK_TIMEOUT_SECONDS", "30"))
+        self._client = client or AsyncClient(api_key=os.getenv("XAI_API_KEY"), timeout=timeout)
         self._model = "grok-4-fast"
+        # Hedge / fallback target when the primary is slow or failing (defaults to a duplicate of the primary)
+        self._fallback_model = os.getenv("GROK_FALLBACK_MODEL", self._model)
         self._system_prompt = (
             "You are TWO sports commentators (American hype caster + British analyst) providing real-time commentary.\n\n"
             "FORMAT: '[tag] commentary text | [tag] commentary text'\n"
@@ -29,36 +58,151 @@ class LlmService:
             "- Speaker 2: Provide INSIGHT, ANALYSIS, or HUMOR about the play\n"
             "- Keep it fast-paced but give full thoughts—aim for 15-20 words each"
         )
+        self._single_prompt = (
+            "You are a high-energy sports commentator providing FAST real-time commentary.\n\n"
+            "FORMAT: '[tag] commentary text'\n"
+            "LENGTH: 15-20 words max\n"
+            "STYLE: Play-by-play with hype and excitement\n\n"
+            "AUDIO TAGS: [excited], [intense], [dramatic], [laughs], [gasps]\n\n"
+            "EXAMPLE: '[excited] Reinhardt just charged in and absolutely DEMOLISHED their entire backline!'\n\n"
+            "Keep it FAST and PUNCHY for quick action commentary."
+        )
+
+    @property
+    def model(self) -> str:
+        """Primary Grok model, as recorded with each commentary"""
+        return self._model
 
-    async def generate_comment(self, description: str, dual_speaker: bool = True) -> str:
+    async def warm(self) -> None:
+        """Connect the gRPC channel with a model lookup, so the first frame doesn't pay the handshake"""
+        await self._client.models.get_language_model(self._model)
+
+    def _create_chat(self, description: str, dual_speaker: bool, model: str | None = None, session_id=None):
+        """
+        Build the Grok chat for one frame description
+
+        Laid out stable-first so the provider's prefix cache keeps hitting: the fixed system prompt,
+        the session's recap and earlier turns (append-only between compactions), then the new frame.
+        """
+        chat = self._client.chat.create(model=model or self._model)
+        # Use different prompt for single vs dual speaker
+        chat.append(system(self._system_prompt if dual_speaker else self._single_prompt))
+        if session_id is not None:
+            recap, turns = get_session_store().commentary(session_id)
+            if recap:
+                chat.append(user(f"Lines you've already used this session, don't repeat them:\n{recap}"))
+            for previous, comment in turns:
+                chat.append(user(_frame_prompt(previous)))
+                chat.append(assistant(comment))
+        chat.append(user(_frame_prompt(description)))
+        return chat
+
+    async def generate_comment(self, description: str, dual_speaker: bool = True, session_id=None) -> str:
         """
         Generate commentary from vision description
 
         Args:
             description: Text description of current frame
             dual_speaker: True for dual commentary, False for single speaker
+            session_id: Session whose earlier commentary is context (and which remembers this one), None for none
 
         Returns:
             str: Commentary text for TTS
         """
-        # Use different prompt for single vs dual speaker
-        if not dual_speaker:
-            single_prompt = (
-                "You are a high-energy sports commentator providing FAST real-time commentary.\n\n"
-                "FORMAT: '[tag] commentary text'\n"
-                "LENGTH: 15-20 words max\n"
-                "STYLE: Play-by-play with hype and excitement\n\n"
-                "AUDIO TAGS: [excited], [intense], [dramatic], [laughs], [gasps]\n\n"
-                "EXAMPLE: '[excited] Reinhardt just charged in and absolutely DEMOLISHED their entire backline!'\n\n"
-                "Keep it FAST and PUNCHY for quick action commentary."
-            )
-            chat = self._client.chat.create(model=self._model)
-            chat.append(system(single_prompt))
-            chat.append(user(f"Describe what's happening: {description}"))
-        else:
-            chat = self._client.chat.create(model=self._model)
-            chat.append(system(self._system_prompt))
-            chat.append(user(f"Describe what's happening: {description}"))
-
-        response = chat.sample()
-        return response.content.strip()
+        async def sample(model):
+            chat = self._create_chat(description, dual_speaker, model, session_id)
+            async with provider_slot("grok"):
+                return await chat.sample()
+
+        response = await hedged_call("grok", [lambda: sample(self._model), lambda: sample(self._fallback_model)])
+        _record_usage(response)
+        comment = response.content.strip()
+        if session_id is not None:
+            get_session_store().add_commentary(session_id, description, comment)
+        return comment
+
+    async def stream_comment(
+        self,
+        description: str,
+        dual_speaker: bool = True,
+        session_id=None
+    ) -> AsyncIterator[tuple[int, str]]:
+        """
+        Stream commentary as speakable segments while Grok is still generating
+
+        Dual speaker: speaker 1 is yielded the moment the " | " delimiter arrives,
+        speaker 2 once the completion ends. Single speaker: each sentence is yielded
+        as soon as it is complete. TTS can start on a segment while the rest is still
+        being generated.
+
+        Args:
+            description: Text description of current frame
+            dual_speaker: True for dual commentary, False for single speaker
+            session_id: Session whose earlier commentary is context (and which remembers this one), None for none
+
+        Yields:
+            (speaker, text): speaker is 0 for the first voice, 1 for the second
+        """
+        buffer = ""
+        completion = ""
+        speaker = 0
+        tokens = hedged_stream("grok", [
+            lambda: self._stream_tokens(description, dual_speaker, self._model, session_id),
+            lambda: self._stream_tokens(description, dual_speaker, self._fallback_model, session_id),
+        ])
+        async for token in tokens:
+            buffer += token
+            completion += token
+            if dual_speaker:
+                # Only the first delimiter switches speakers, like tts._split_speakers
+                if speaker == 0 and SPEAKER_DELIMITER in buffer:
+                    speaker1_text, buffer = buffer.split(SPEAKER_DELIMITER, 1)
+                    if speaker1_text.strip():
+                        yield 0, speaker1_text.strip()
+                    speaker = 1
+            else:
+                *sentences, buffer = _SENTENCE_END.split(buffer)
+                for sentence in sentences:
+                    if sentence.strip():
+                        yield 0, sentence.strip()
+
+        if buffer.strip():
+            yield speaker, buffer.strip()
+        # Only a completion that was streamed to the end becomes context for the next frame
+        if session_id is not None and completion.strip():
+            get_session_store().add_commentary(session_id, description, completion.strip())
+
+    async def _stream_tokens(
+        self,
+        description: str,
+        dual_speaker: bool,
+        model: str,
+        session_id=None
+    ) -> AsyncIterator[str]:
+        """
+        Raw completion text from one model
+
+        A reader task drains the stream into a buffer while holding the Grok slot, so the slot
+        goes back as soon as Grok is done, not when a consumer stuck behind TTS gets to the end.
+        """
+        chat = self._create_chat(description, dual_speaker, model, session_id)
+        tokens = asyncio.Queue()    # Completion text, None once the stream is over
+
+        async def read():
+            try:
+                response = None
+                async with provider_slot("grok"):
+                    async for response, chunk in chat.stream():
+                        tokens.put_nowait(chunk.content)
+                _record_usage(response)
+            finally:
+                tokens.put_nowait(None)
+
+        reader = asyncio.create_task(read())
+        try:
+            while (token := await tokens.get()) is not None:
+                yield token
+            await reader    # Re-raises a failed stream
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
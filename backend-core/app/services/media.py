@@ -0,0 +1,355 @@
+"""
+Media Archive: generated audio and sampled keyframes kept in an object store (S3 API, or a local directory)
+Objects are keyed by content hash so repeats are stored once; uploads run in rate-limited batches off the frame path
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from . import metrics
+from .limits import TokenBucket
+from .persistence import CommentaryWriter, get_commentary_writer
+
+# kind: (key prefix, file extension, content type)
+KINDS = {
+    "audio": ("audio", ".mp3", "audio/mpeg"),
+    "frame": ("frames", ".jpg", "image/jpeg"),
+}
+
+
+def media_key(kind: str, data: bytes) -> str:
+    """Content-addressed object key, e.g. audio/<sha256>.mp3"""
+    prefix, extension, _ = KINDS[kind]
+    return f"{prefix}/{hashlib.sha256(data).hexdigest()}{extension}"
+
+
+class LocalMediaStore:
+    """Objects as files under one directory, a stand-in for S3 in development and tests"""
+
+    def __init__(self, root: str):
+        self._root = Path(root)
+
+    def put_if_absent(self, key: str, data: bytes, content_type: str) -> bool:
+        path = self._root / key
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a reader never sees half an object
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return True
+
+    def key(self, key: str) -> str:
+        """Where a content key is stored: its path under the root directory"""
+        return key
+
+    def url(self, key: str) -> str:
+        return (self._root / self.key(key)).resolve().as_uri()
+
+
+class S3MediaStore:
+    """Objects in an S3 bucket, or any S3-compatible store (MinIO) via endpoint_url"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None, client=None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("An s3:// MEDIA_STORE_URL needs the boto3 package (pip install boto3)") from e
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self._client = client
+        self._bucket = bucket
+        self._prefix = prefix.strip("/")
+
+    def key(self, key: str) -> str:
+        """Where a content key is stored: the S3 object key, under the URL's prefix"""
+        return f"{self._prefix}/{key}" if self._prefix else key
+
+    def put_if_absent(self, key: str, data: bytes, content_type: str) -> bool:
+        # A conditional write instead of HEAD + PUT: one round trip, and it needs only s3:PutObject
+        # (without s3:ListBucket, S3 answers a HEAD on a missing key with 403, not 404)
+        try:
+            self._client.put_object(
+                Bucket=self._bucket, Key=self.key(key), Body=data, ContentType=content_type, IfNoneMatch="*"
+            )
+        except Exception as e:
+            if getattr(e, "response", {}).get("Error", {}).get("Code") in ("PreconditionFailed", "412"):
+                return False    # Already stored
+            raise
+        return True
+
+    def url(self, key: str) -> str:
+        return f"s3://{self._bucket}/{self.key(key)}"
+
+
+def store_from_url(url: str | None, endpoint_url: str | None = None):
+    """
+    Build an object store from MEDIA_STORE_URL
+
+    Args:
+        url: "" for no archive, "file:///path/to/media" or "s3://bucket/optional/prefix"
+        endpoint_url: S3 API endpoint for S3-compatible stores (MinIO), None for AWS
+
+    Returns:
+        Store, or None when archival is off
+    """
+    if not url:
+        return None
+    if url.startswith("file://"):
+        return LocalMediaStore(url[len("file://"):])
+    if url.startswith("s3://"):
+        bucket, _, prefix = url[len("s3://"):].partition("/")
+        return S3MediaStore(bucket, prefix, endpoint_url)
+    raise ValueError(f"Unsupported MEDIA_STORE_URL: {url}")
+
+
+class _Job:
+    """One spoken commentary and the media that goes with it"""
+    __slots__ = ("session_id", "model", "description", "commentary", "objects", "attempts")
+
+    def __init__(self, session_id, model: str, description: str, commentary: str, objects: dict[str, bytes]):
+        self.session_id = session_id
+        self.model = model
+        self.description = description
+        self.commentary = commentary
+        self.objects = objects      # {kind: bytes}
+        self.attempts = 0
+
+
+class MediaArchive:
+    def __init__(
+        self,
+        store,
+        writer: CommentaryWriter | None = None,
+        batch_size: int = 8,
+        rate: float = 10.0,
+        burst: int = 20,
+        max_pending: int = 64,
+        keyframe_interval: float = 10.0,
+        known_keys: int = 4096,
+        max_attempts: int = 3
+    ):
+        """
+        Uploads of spoken commentary audio and keyframes, with their keys written to the database
+
+        add() only queues: run() takes up to batch_size commentaries at a time, hashes their
+        media, uploads whatever the store doesn't have yet (rate-limited to rate puts per
+        second) and then hands each commentary to the writer with its audio URL and keyframe
+        key, so the database only ever points at stored objects. A commentary whose media
+        can't be stored after max_attempts batches, or that falls out of the max_pending
+        queue, is still written, just without media.
+
+        Args:
+            store: Store from store_from_url()
+            writer: Commentary writer for the keys, None to upload only
+            batch_size: Commentaries uploaded together
+            rate: Object uploads per second
+            burst: Uploads allowed back to back after an idle period
+            max_pending: Commentaries whose media may wait for upload (about this many clips and frames in memory)
+            keyframe_interval: Seconds between archived keyframes per session
+            known_keys: Recently stored keys remembered, repeats skip the store round trip
+            max_attempts: Batches a commentary's media gets before it's written without
+        """
+        self._store = store
+        self._writer = writer
+        self._batch_size = max(1, batch_size)
+        self._bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self._pending = deque()
+        self._max_pending = max(1, max_pending)
+        self.keyframe_interval = keyframe_interval
+        self._known = OrderedDict()     # {key: None}, least recently used first
+        self._known_keys = max(1, known_keys)
+        self._uploading = {}            # {key: upload future}, so one batch never puts the same content twice
+        self._max_attempts = max(1, max_attempts)
+        self._wakeup = None
+        self.uploaded = 0
+        self.deduplicated = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(
+        self,
+        session_id,
+        model: str,
+        description: str,
+        commentary: str,
+        audio: bytes | None = None,
+        keyframe: bytes | memoryview | None = None
+    ) -> None:
+        """Queue a spoken commentary with its audio and (sampled) keyframe"""
+        objects = {}
+        if audio:
+            objects["audio"] = audio
+        if keyframe:
+            objects["frame"] = bytes(keyframe)    # The frame buffer may belong to the socket reader
+        if len(self._pending) >= self._max_pending:
+            self._give_up(self._pending.popleft(), "dropped")
+        self._pending.append(_Job(session_id, model, description, commentary, objects))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """Background uploader (started from the app lifespan)"""
+        self._wakeup = asyncio.Event()
+        retry_delay = 0.0
+        while True:
+            if retry_delay:
+                await asyncio.sleep(retry_delay)
+            while not self._pending:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+            if await self.upload_batch():
+                retry_delay = 0.0
+            else:
+                retry_delay = min(30.0, max(1.0, retry_delay * 2))
+
+    async def upload_batch(self) -> bool:
+        """
+        Store the media of the oldest pending commentaries (up to one batch) and queue their rows
+
+        Returns:
+            False if any upload failed (those commentaries go back to the front of the queue)
+        """
+        jobs = [self._pending.popleft() for _ in range(min(self._batch_size, len(self._pending)))]
+        try:
+            results = await asyncio.gather(*(
+                self._store_object(kind, data) for job in jobs for kind, data in job.objects.items()
+            ), return_exceptions=True)
+        except asyncio.CancelledError:
+            self._pending.extendleft(reversed(jobs))
+            raise
+
+        retry = []
+        results = iter(results)
+        for job in jobs:
+            keys = {kind: next(results) for kind in job.objects}
+            failed = [key for key in keys.values() if isinstance(key, BaseException)]
+            if not failed:
+                self._record(job, keys)
+                continue
+            job.attempts += 1
+            print(f"[MediaArchive] Upload for session {job.session_id} failed "
+                  f"(attempt {job.attempts}/{self._max_attempts}): {failed[0]}")
+            if job.attempts >= self._max_attempts:
+                self._give_up(job, "failed")
+            else:
+                retry.append(job)
+        # Retries keep their place ahead of anything queued meanwhile
+        self._pending.extendleft(reversed(retry))
+        return not retry
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Store what's still pending (server shutdown), writing the rest without media after timeout seconds"""
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except TimeoutError:
+            pass
+        while self._pending:
+            self._give_up(self._pending.popleft(), "dropped")
+
+    async def _drain(self):
+        while self._pending:
+            if not await self.upload_batch():
+                return
+
+    async def _store_object(self, kind: str, data: bytes) -> str:
+        """Upload one object unless the store already has it, returns its key"""
+        key = await asyncio.to_thread(media_key, kind, data)
+        if key in self._known:
+            self._known.move_to_end(key)
+            self._count(kind, "deduplicated")
+            return key
+        uploading = self._uploading.get(key)
+        if uploading is not None:
+            # Same content elsewhere in this batch: share its upload
+            await asyncio.shield(uploading)
+            self._count(kind, "deduplicated")
+            return key
+
+        self._uploading[key] = asyncio.ensure_future(self._put(key, data, KINDS[kind][2]))
+        try:
+            stored = await asyncio.shield(self._uploading[key])
+        finally:
+            del self._uploading[key]
+        self._count(kind, "uploaded" if stored else "deduplicated")
+        self._known[key] = None
+        if len(self._known) > self._known_keys:
+            self._known.popitem(last=False)
+        return key
+
+    async def _put(self, key: str, data: bytes, content_type: str) -> bool:
+        if self._bucket is not None:
+            await self._bucket.acquire()
+        return await asyncio.to_thread(self._store.put_if_absent, key, data, content_type)
+
+    def _count(self, kind: str, outcome: str):
+        if outcome == "uploaded":
+            self.uploaded += 1
+        elif outcome == "deduplicated":
+            self.deduplicated += 1
+        metrics.MEDIA_OBJECTS.labels(kind, outcome).inc()
+
+    def _record(self, job: _Job, keys: dict[str, str]):
+        """Hand a commentary and its stored media keys to the database writer"""
+        if self._writer is None:
+            return
+        # Content keys become what the store actually holds (S3: under the bucket prefix)
+        audio_key = keys.get("audio")
+        self._writer.add(
+            job.session_id, job.model, job.description, job.commentary,
+            audio_url=self._store.url(audio_key) if audio_key else None
+        )
+        if "frame" in keys:
+            self._writer.add_frame(job.session_id, self._store.key(keys["frame"]))
+
+    def _give_up(self, job: _Job, outcome: str):
+        """Write a commentary without its media (store down or queue full)"""
+        if outcome == "dropped":
+            self.dropped += 1
+        for kind in job.objects:
+            metrics.MEDIA_OBJECTS.labels(kind, outcome).inc()
+        self._record(job, {})
+
+    def stats(self) -> dict:
+        """Live gauge for monitoring"""
+        return {
+            "pending": len(self._pending),
+            "uploaded": self.uploaded,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+        }
+
+
+_archive = None
+
+
+def get_media_archive() -> MediaArchive | None:
+    """
+    Get or create the media archive singleton, None when MEDIA_STORE_URL is unset
+
+    Configured by MEDIA_STORE_URL, MEDIA_S3_ENDPOINT, MEDIA_UPLOAD_BATCH, MEDIA_UPLOAD_RATE_LIMIT,
+    MEDIA_UPLOAD_BURST, MEDIA_MAX_PENDING and MEDIA_KEYFRAME_INTERVAL_MS; keys go to the
+    commentary writer (COMMENTARY_DB_URL).
+    """
+    global _archive
+    if _archive is None:
+        store = store_from_url(os.getenv("MEDIA_STORE_URL"), endpoint_url=os.getenv("MEDIA_S3_ENDPOINT") or None)
+        if store is None:
+            return None
+        _archive = MediaArchive(
+            store,
+            writer=get_commentary_writer(),
+            batch_size=int(os.getenv("MEDIA_UPLOAD_BATCH", "8")),
+            rate=float(os.getenv("MEDIA_UPLOAD_RATE_LIMIT", "10")),
+            burst=int(os.getenv("MEDIA_UPLOAD_BURST", "20")),
+            max_pending=int(os.getenv("MEDIA_MAX_PENDING", "64")),
+            keyframe_interval=int(os.getenv("MEDIA_KEYFRAME_INTERVAL_MS", "10000")) / 1000
+        )
+    return _archive
@@ -0,0 +1,156 @@
+"""
+Pipeline Metrics: per-stage latency histograms, frame/error counters and session gauges
+Served in Prometheus text format on /metrics, plus optional JSON trace logs per session
+"""
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+# decode: frame message -> JPEG bytes, gate: scene hash, normalize: resize/re-encode,
+# vision / llm: provider calls, tts: waiting on audio, encode: audio -> wire message, send: socket write
+STAGES = ("decode", "gate", "normalize", "vision", "llm", "tts", "encode", "send")
+
+# Seconds, from sub-millisecond socket writes up to slow provider calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "nexcast_stage_seconds", "Time spent in each pipeline stage per frame", ["stage"], buckets=LATENCY_BUCKETS
+)
+FIRST_AUDIO_SECONDS = Histogram(
+    "nexcast_time_to_first_audio_seconds", "Frame received to first audio sent", buckets=LATENCY_BUCKETS
+)
+FRAMES = Counter(
+    "nexcast_frames",
+    "Frames by outcome: received, dropped, skipped, throttled, batched, superseded, expired, deadline, processed",
+    ["outcome"]
+)
+ERRORS = Counter("nexcast_errors", "Pipeline failures by stage", ["stage"])
+HEDGED_CALLS = Counter(
+    "nexcast_hedged_calls", "Extra provider attempts by reason: hedge (slow) or fallback (failed)", ["provider", "reason"]
+)
+HEDGE_WINS = Counter("nexcast_hedge_wins", "Provider calls answered by a hedge or fallback attempt", ["provider"])
+PROVIDER_DEADLINES = Counter("nexcast_provider_deadlines", "Provider calls that missed their deadline", ["provider"])
+LLM_TOKENS = Counter(
+    "nexcast_llm_tokens", "Grok tokens by kind: prompt, cached (prompt tokens served from the prefix cache), completion", ["kind"]
+)
+PROVIDER_SECONDS_SAVED = Counter(
+    "nexcast_provider_seconds_saved", "Estimated LLM/TTS time not spent on superseded or expired frames", ["stage"]
+)
+COMMENTARY_ROWS = Counter(
+    "nexcast_commentary_rows",
+    "Commentary rows by outcome: written (to the database), failed (in a write that will be retried), dropped (buffer full)",
+    ["outcome"]
+)
+MEDIA_OBJECTS = Counter(
+    "nexcast_media_objects",
+    "Archived audio/frame objects by outcome: uploaded, deduplicated (already stored), failed, dropped (queue full)",
+    ["kind", "outcome"]
+)
+# max: with several workers, /metrics shows the slowest worker's warmup
+STARTUP_SECONDS = Gauge(
+    "nexcast_startup_seconds", "Time each component took to warm up at startup", ["component"], multiprocess_mode="max"
+)
+# livesum: with several workers, /metrics adds up the gauges of the workers still running
+ACTIVE_SESSIONS = Gauge("nexcast_active_sessions", "Open WebSocket sessions", multiprocess_mode="livesum")
+PIPELINES_IN_FLIGHT = Gauge(
+    "nexcast_pipelines_in_flight", "Frames holding a pipeline admission slot", multiprocess_mode="livesum"
+)
+SESSION_RECORDS = Gauge(
+    "nexcast_session_records", "Session records held by the session store", multiprocess_mode="livesum"
+)
+SESSION_STORE_BYTES = Gauge(
+    "nexcast_session_store_bytes", "Estimated memory of the session store's records", multiprocess_mode="livesum"
+)
+SESSIONS_EVICTED = Counter("nexcast_sessions_evicted", "Session records evicted for being idle or over the byte budget")
+WORKER_QUEUE_DEPTH = Gauge(
+    "nexcast_worker_queue_depth", "CPU pool calls waiting for or running on a worker", ["pool"], multiprocess_mode="livesum"
+)
+WORKER_TASK_SECONDS = Histogram(
+    "nexcast_worker_task_seconds", "CPU pool calls: time queued before a worker took them (wait) and in the worker (run)",
+    ["pool", "phase"], buckets=LATENCY_BUCKETS
+)
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record one frame's time in a stage"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the time spent in the block (not recorded if it raises)"""
+    started = time.perf_counter()
+    yield
+    observe(stage, time.perf_counter() - started)
+
+
+def multiprocess_dir() -> str | None:
+    """Shared metrics directory when running several workers (set before prometheus_client is imported)"""
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Current metrics in the Prometheus text format
+
+    Returns:
+        (body, content type)
+    """
+    registry = REGISTRY
+    if multiprocess_dir():
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def shutdown() -> None:
+    """Drop this worker's live gauges from the shared directory (server shutdown)"""
+    if multiprocess_dir():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class SessionTrace:
+    def __init__(self, session_id, trace_id: str | None = None, enabled: bool | None = None):
+        """
+        Structured log events for one session, tagged with a trace ID
+
+        Args:
+            session_id: Session the events belong to
+            trace_id: ID to correlate with client logs (default: a new random one)
+            enabled: Print JSON lines (default: TRACE_LOGS=1)
+        """
+        self.session_id = session_id
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.enabled = os.getenv("TRACE_LOGS", "0") == "1" if enabled is None else enabled
+
+    def event(self, event: str, **fields) -> None:
+        """Print one JSON line (no-op unless enabled)"""
+        if not self.enabled:
+            return
+        print(json.dumps({
+            "ts": round(time.time(), 3),
+            "session_id": self.session_id,
+            "trace_id": self.trace_id,
+            "event": event,
+            **fields
+        }))
+
+    def stage(self, stage: str, seq: int, seconds: float) -> None:
+        """Record a stage timing in the histogram and, if enabled, the trace log"""
+        observe(stage, seconds)
+        self.event("stage", stage=stage, seq=seq, ms=round(seconds * 1000, 2))
+
+    @contextmanager
+    def timed(self, stage: str, seq: int):
+        """stage() for the time spent in the block (not recorded if it raises)"""
+        started = time.perf_counter()
+        yield
+        self.stage(stage, seq, time.perf_counter() - started)
@@ -0,0 +1,66 @@
+"""
+Capture Pacing: how often a session's client should send frames
+Learned from the session's pipeline latency and frame drops, pushed to the client as rate_hint messages
+"""
+
+
+class CapturePacer:
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        headroom: float = 1.2,
+        min_change: float = 0.2
+    ):
+        """
+        Frame interval that keeps one session's pipeline busy without throwing frames away
+
+        A new frame is worth sending once the previous one has started speaking (sooner and it
+        supersedes it) and the slowest stage has room for it (sooner and the ring drops it),
+        so the interval follows the larger of time to first audio and the slowest stage.
+
+        Args:
+            min_interval: Fastest capture rate hinted, seconds between frames
+            max_interval: Slowest capture rate hinted, seconds between frames
+            headroom: Margin over the measured latency (1.2 = 20% slower than the pipeline)
+            min_change: Relative change needed before a new hint is sent
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.headroom = headroom
+        self.min_change = min_change
+        self.interval = None    # Last hinted seconds, None until the first hint
+        self._latency = {}      # {"first_audio" | stage: recent seconds per frame}
+        self._backoff = 1.0     # Grows while frames are dropped, shrinks back once they aren't
+        self._dropped = 0
+
+    def observe(self, name: str, seconds: float) -> None:
+        previous = self._latency.get(name)
+        self._latency[name] = seconds if previous is None else 0.7 * previous + 0.3 * seconds
+
+    def recommend(self, dropped: int) -> tuple[float, str] | None:
+        """
+        Interval to hint now, if it moved enough since the last hint
+
+        Args:
+            dropped: Frames the session's ring has dropped so far
+
+        Returns:
+            (seconds between frames, reason) or None to leave the client alone
+        """
+        if not self._latency:
+            return None
+        reason = "pipeline_latency"
+        if dropped > self._dropped:
+            self._backoff = min(4.0, self._backoff * 1.5)
+            reason = "frames_dropped"
+        else:
+            self._backoff = max(1.0, self._backoff * 0.9)
+        self._dropped = dropped
+
+        target = max(self._latency.values()) * self.headroom * self._backoff
+        target = min(self.max_interval, max(self.min_interval, target))
+        if self.interval is not None and abs(target - self.interval) < self.min_change * self.interval:
+            return None
+        self.interval = target
+        return target, reason
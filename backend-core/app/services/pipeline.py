@@ -2,15 +2,33 @@
 Commentary Pipeline: Frame -> Vision -> LLM -> TTS -> Audio
 Singleton services for efficient resource usage
 """
+import asyncio
+import os
+import time
+
+from . import metrics
+from .frames import FrameNormalizer
+from .hedging import DeadlineExceeded
+from .ingest import FrameQueue
+from .interjections import InterjectionLibrary
+from .media import MediaArchive
+from .limits import pipeline_admission, provider_backlog
+from .metrics import SessionTrace
+from .pacing import CapturePacer
+from .persistence import CommentaryWriter
+from .scene_gate import SceneGate
 from .vision import VisionService
-from .llm import LlmService
+from .llm import SPEAKER_DELIMITER, LlmService
 from .tts import TTSService
-import base64
+
+DEFAULT_SPEAKER1_VOICE_ID = "qVpGLzi5EhjW3WGVhOa9"
+PROVIDERS = ("gemini", "grok", "elevenlabs")
 
 # Singleton instances (lazy-loaded on first use)
 _vision_service = None
 _llm_service = None
 _tts_service = None
+_interjection_library = None
 
 
 def get_vision_service() -> VisionService:
@@ -37,46 +55,485 @@ def get_tts_service() -> TTSService:
     return _tts_service
 
 
-async def process_frame(
-    session_id: str,
-    frame_base64: str,
-    preferences: dict
-) -> str:
+def get_interjection_library() -> InterjectionLibrary:
+    """Get or create the interjection library singleton (renders through the TTS cache)"""
+    global _interjection_library
+    if _interjection_library is None:
+        _interjection_library = InterjectionLibrary(get_tts_service())
+    return _interjection_library
+
+
+class SessionPipeline:
     """
-    Process frame through full pipeline
+    Per-session staged pipeline: Vision -> LLM -> TTS as three concurrent stages
+
+    Stages are joined by bounded queues, so vision for frame N+1 runs while LLM/TTS
+    for frame N are still in flight and throughput approaches 1 / max(stage latency).
+    Each stage is a single FIFO worker, so audio always leaves in frame order.
+    LLM and TTS also overlap within a frame: commentary is streamed and each speaker
+    (or sentence, in single-speaker mode) starts rendering as soon as its text is complete.
+
+    When a frame is a big scene change (gate distance >= interjection_distance) and
+    nothing else is in flight, a pre-rendered interjection is sent right away: in
+    streaming mode as the first chunk of that frame's clip, in buffered mode as its own clip.
 
-    Args:
-        session_id: Session identifier for context tracking
-        frame_base64: Base64-encoded JPEG frame
-        preferences: User preferences (voice, commentary_style)
+    Frames are only admitted while the server has a free pipeline slot
+    (MAX_CONCURRENT_PIPELINES) and no provider's rate-limit backlog exceeds
+    PROVIDER_MAX_WAIT_MS, otherwise the session is told to back off.
 
-    Returns:
-        str: Base64-encoded MP3 audio
+    Each frame carries the time it was received. Until its commentary starts playing,
+    a frame's LLM/TTS work is cancelled once it is older than frame_deadline (expired)
+    or a newer frame already has its description (superseded), so the session isn't
+    paying for commentary on a scene that's gone. After supersede_limit frames in a row
+    were superseded, the next one is left to finish so a fast-changing screen still
+    gets commentary. The provider time saved is estimated from the session's recent
+    LLM/TTS durations. A provider call that misses its deadline (<PROVIDER>_DEADLINE_MS)
+    drops just that frame, reported the same way with reason "deadline".
+
+    With vision_batch > 1, the vision stage takes up to that many pending frames at once
+    (waiting up to vision_batch_wait for more) and describes the newest in one request,
+    the earlier ones riding along as motion context instead of being dropped or
+    sent one request each. The newest frame is the one that gets commentary.
+
+    With a pacer, the session's stage and first-audio latencies (and frames the ring
+    dropped) decide how often the client should capture, sent as a rate hint whenever
+    that interval moves enough.
+
+    With an archive, every commentary whose audio reached the client is queued for the
+    commentaries table; the archive writes it in the background, off the frame's path.
+    With media, the commentary goes through the media archive instead, which stores its
+    audio (and a keyframe every keyframe_interval) before the row is written.
+
+    Stage timings, frame outcomes and failures go to the metrics module (/metrics),
+    and to the session's trace log when TRACE_LOGS=1.
+
+    The sink receives the results (see routes/ws_stream.py SocketSink):
+        skipped(seq, distance, frames_skipped)
+        throttle(seq, reason, retry_after_ms)
+        audio(seq, audio_bytes)                       # buffered mode
+        audio_chunk(seq, index, chunk) / audio_end(seq, stats)   # streaming mode
+        abandoned(seq, reason, saved_ms)              # superseded / expired before its audio
+        rate_hint(interval_ms, reason)                # with a pacer
     """
-    # 1. Vision: Frame + Context -> Description
-    vision = get_vision_service()
-    description = await vision.analyze_with_context(frame_base64, session_id)
-    print(f"[{session_id}] Vision: {description}")
-
-    # 2. LLM: Description -> Commentary
-    llm = get_llm_service()
-    speaker2 = preferences.get("speaker2_voice_id")
-    dual_speaker = bool(speaker2)  # True if speaker2 is set
-    comment = await llm.generate_comment(description, dual_speaker=dual_speaker)
-    print(f"[{session_id}] Comment: {comment}")
-
-    # 3. TTS: Commentary -> Audio (ElevenLabs multi-speaker)
-    tts = get_tts_service()
-    speaker1 = preferences.get("speaker1_voice_id", "qVpGLzi5EhjW3WGVhOa9")
-
-    audio_bytes = await tts.synthesize(
-        text=comment,
-        voice_id=speaker1,
-        voice_id_2=speaker2 if dual_speaker else None
-    )
-
-    # Convert to base64 for WebSocket transmission
-    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-    print(f"[{session_id}] Audio generated: {len(audio_bytes)} bytes")
-
-    return audio_base64
+
+    def __init__(
+        self,
+        session_id,
+        preferences: dict,
+        sink,
+        gate: SceneGate | None = None,
+        normalizer: FrameNormalizer | None = None,
+        stream_audio: bool = False,
+        depth: int = 1,
+        interjection_distance: int = 0,
+        trace: SessionTrace | None = None,
+        frame_deadline: float = 0,
+        supersede_limit: int = 0,
+        pacer: CapturePacer | None = None,
+        vision_batch: int = 1,
+        vision_batch_wait: float = 0.0,
+        archive: CommentaryWriter | None = None,
+        media: MediaArchive | None = None
+    ):
+        self._session_id = session_id
+        self._preferences = preferences
+        self._sink = sink
+        self._gate = gate
+        self._normalizer = normalizer
+        self._stream_audio = stream_audio
+        self._interjection_distance = interjection_distance
+        self._trace = trace or SessionTrace(session_id)
+        self._frame_deadline = frame_deadline     # Seconds after receipt, 0 = frames never expire
+        self._supersede_limit = supersede_limit   # Frames superseded in a row before one must finish, 0 = never
+        self._pacer = pacer
+        self._vision_batch = max(1, vision_batch)
+        self._vision_batch_wait = vision_batch_wait
+        self._archive = archive
+        self._media = media
+        self._last_keyframe = None      # When this session last archived a keyframe
+        self._frames = None
+        self._in_flight = 0     # Admitted frames whose audio hasn't been sent yet (each holds an admission slot)
+        self._descriptions = asyncio.Queue(maxsize=max(1, depth))    # (seq, captured, lead-in chunks, description, frame)
+        self._comments = asyncio.Queue(maxsize=max(1, depth))        # (seq, captured, lead-in chunks, segment queue, turn)
+        self._progress = asyncio.Condition()    # Notified when a newer frame is described or a frame is abandoned
+        self._newest = -1           # Newest frame with a description
+        self._speaking = -1         # Newest frame whose commentary audio has started (never cut off)
+        self._abandoned = {}        # {seq: "superseded" | "expired" | "deadline"}
+        self._superseded_in_row = 0
+        self._typical = {}          # {"llm" | "tts": recent seconds per frame}, for the savings estimate
+        self.seconds_saved = 0.0
+
+    @property
+    def _cancels(self) -> bool:
+        return self._frame_deadline > 0 or self._supersede_limit > 0
+
+    async def run(self, frames: FrameQueue):
+        """Run all stages until cancelled; a failure in any stage stops the pipeline"""
+        if self._interjection_distance > 0:
+            get_interjection_library().prefetch(self._voices()[0])
+        self._frames = frames
+        tasks = {
+            asyncio.create_task(self._vision_stage(frames)): "vision",
+            asyncio.create_task(self._llm_stage()): "llm",
+            asyncio.create_task(self._tts_stage()): "tts",
+        }
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    metrics.ERRORS.labels(tasks[task]).inc()
+                    self._trace.event("error", stage=tasks[task], error=repr(task.exception()))
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Give back the admission slots of frames that never reached the client
+            for _ in range(self._in_flight):
+                pipeline_admission().leave()
+            metrics.PIPELINES_IN_FLIGHT.dec(self._in_flight)
+            self._in_flight = 0
+
+    def _voices(self) -> tuple[str, str | None]:
+        speaker1 = self._preferences.get("speaker1_voice_id", DEFAULT_SPEAKER1_VOICE_ID)
+        speaker2 = self._preferences.get("speaker2_voice_id") or None
+        return speaker1, speaker2
+
+    async def _vision_stage(self, frames: FrameQueue):
+        session_id = self._session_id
+        while True:
+            batch = await frames.get_batch(self._vision_batch, self._vision_batch_wait)
+            seq, frame, captured = batch[-1]
+            earlier = [context for _, context, _ in batch[:-1]]
+            busy_started = time.perf_counter()
+            await self._pace()
+
+            # Skip the whole Vision -> LLM -> TTS chain if the screen barely changed
+            distance, frame_hash = -1, None
+            if self._gate is not None:
+                with self._trace.timed("gate", seq):
+                    changed, distance, frame_hash = await self._gate.check(frame)
+                if not changed:
+                    print(f"[{session_id}] Frame {seq} skipped: no scene change (distance {distance})")
+                    metrics.FRAMES.labels("skipped").inc()
+                    await self._sink.skipped(seq, distance, self._gate.skipped)
+                    continue
+
+            # Tell the client to back off instead of queueing behind a saturated server/provider
+            throttle = self._admit()
+            if throttle is not None:
+                reason, retry_after_ms = throttle
+                print(f"[{session_id}] Frame {seq} throttled: {reason}, retry in {retry_after_ms} ms")
+                metrics.FRAMES.labels("throttled").inc()
+                await self._sink.throttle(seq, reason, retry_after_ms)
+                continue
+            # Only an admitted frame's scene counts as seen, a throttled one gets its chance on the next frame
+            if self._gate is not None:
+                self._gate.commit(frame_hash)
+
+            print(f"[{session_id}] Processing frame {seq}... (dropped so far: {frames.dropped})"
+                  + (f", with {len(earlier)} earlier frames as context" if earlier else ""))
+            if earlier:
+                metrics.FRAMES.labels("batched").inc(len(earlier))
+            self._in_flight += 1
+            metrics.PIPELINES_IN_FLIGHT.inc()
+            lead_in = await self._interject(seq, distance)
+
+            # Downscale/re-encode so vision cost doesn't depend on the client's screen size
+            if self._normalizer is not None:
+                size_in = len(frame) + sum(len(context) for context in earlier)
+                with self._trace.timed("normalize", seq):
+                    frame, *earlier = await asyncio.gather(
+                        *(self._normalizer.normalize(image) for image in (frame, *earlier))
+                    )
+                size_out = len(frame) + sum(len(context) for context in earlier)
+                print(f"[{session_id}] Frame {seq} normalized: {size_in // 1024} KB -> {size_out // 1024} KB "
+                      f"(saved {self._normalizer.bytes_saved // 1024} KB so far)")
+
+            try:
+                with self._trace.timed("vision", seq):
+                    description = await get_vision_service().analyze_with_context(
+                        frame, session_id, earlier=earlier, span=captured - batch[0][2]
+                    )
+            except DeadlineExceeded as e:
+                # Only this frame is lost: LLM passes it on and TTS reports it abandoned
+                print(f"[{session_id}] Frame {seq} dropped: {e}")
+                self._abandoned[seq] = "deadline"
+                await self._descriptions.put((seq, captured, lead_in, None, frame))
+                continue
+            print(f"[{session_id}] Vision: {description}")
+            self._observe("vision", time.perf_counter() - busy_started)
+            if self._cancels:
+                self._newest = seq
+                async with self._progress:
+                    self._progress.notify_all()
+            await self._descriptions.put((seq, captured, lead_in, description, frame))
+
+    def _admit(self) -> tuple[str, int] | None:
+        """Claim a global pipeline slot, returns (reason, retry_after_ms) when the frame should be refused"""
+        max_wait = int(os.getenv("PROVIDER_MAX_WAIT_MS", "2000")) / 1000
+        backlog = max(provider_backlog(provider) for provider in PROVIDERS)
+        if backlog > max_wait:
+            return "provider_rate_limit", round(backlog * 1000)
+        if not pipeline_admission().try_enter():
+            return "server_busy", int(os.getenv("ADMISSION_RETRY_MS", "1000"))
+        return None
+
+    async def _interject(self, seq: int, distance: int) -> int:
+        """Send a ready interjection for a big, otherwise silent scene change, returns chunks sent"""
+        if self._interjection_distance <= 0 or distance < self._interjection_distance or self._in_flight > 1:
+            return 0
+        clip = get_interjection_library().clip(self._voices()[0])
+        if clip is None:
+            return 0
+
+        print(f"[{self._session_id}] Interjection for frame {seq} (distance {distance})")
+        if self._stream_audio:
+            await self._sink.audio_chunk(seq, 0, clip)
+        else:
+            await self._sink.audio(seq, clip)
+        return 1
+
+    async def _llm_stage(self):
+        session_id = self._session_id
+        while True:
+            seq, captured, lead_in, description, frame = await self._descriptions.get()
+            speaker1, speaker2 = self._voices()
+            llm_started = time.perf_counter()
+
+            # Hand the frame to TTS on the first finished segment, the rest follows through the queue
+            segments = asyncio.Queue()    # (text, voice_id), None marks the end
+            spoken = []                   # (speaker, text) segments so far, complete once segments ends
+            turn = (description, spoken, frame)
+
+            async def comment():
+                async for speaker, text in get_llm_service().stream_comment(
+                    description, dual_speaker=bool(speaker2), session_id=session_id
+                ):
+                    if not spoken:
+                        llm_ms = round((time.perf_counter() - captured) * 1000)
+                        print(f"[{session_id}] First segment ready {llm_ms} ms after frame {seq}")
+                        await self._comments.put((seq, captured, lead_in, segments, turn))
+                    spoken.append((speaker, text))
+                    await segments.put((text, speaker2 if speaker else speaker1))
+
+            try:
+                reason = await self._unless_stale(seq, captured, comment())
+            except DeadlineExceeded as e:
+                print(f"[{session_id}] Frame {seq}: {e}")
+                reason = self._abandoned[seq] = "deadline"
+            finally:
+                await segments.put(None)
+
+            llm_seconds = time.perf_counter() - llm_started
+            if reason is not None:
+                saved = self._record_saving("llm", llm_seconds)
+                print(f"[{session_id}] Frame {seq} {reason}, commentary dropped (saved ~{round(saved * 1000)} ms of LLM)")
+            elif spoken:
+                self._learn("llm", llm_seconds)
+                self._observe("llm", llm_seconds)
+                self._trace.stage("llm", seq, llm_seconds)
+                print(f"[{session_id}] Comment: {' '.join(text for _, text in spoken)}")
+            else:
+                self._trace.stage("llm", seq, llm_seconds)
+                print(f"[{session_id}] Frame {seq}: empty commentary, nothing to say")
+            if not spoken:
+                # Still hand it over, so TTS closes out the frame (and any interjection clip)
+                await self._comments.put((seq, captured, lead_in, segments, turn))
+
+    async def _tts_stage(self):
+        session_id = self._session_id
+        while True:
+            seq, captured, lead_in, segments, turn = await self._comments.get()
+            # Earlier frames are done with, only this one or later ones can still be running in the LLM stage
+            for done in [done for done in self._abandoned if done < seq]:
+                del self._abandoned[done]
+            tts_started = time.perf_counter()
+            try:
+                try:
+                    reason = await self._unless_stale(seq, captured, self._send_audio(seq, captured, lead_in, segments, turn))
+                except DeadlineExceeded as e:
+                    print(f"[{session_id}] Frame {seq}: {e}")
+                    reason = "deadline"
+                if reason is None:
+                    self._learn("tts", time.perf_counter() - tts_started)
+                    self._observe("tts", time.perf_counter() - tts_started)
+                    metrics.FRAMES.labels("processed").inc()
+                    await self._pace()
+                    continue
+
+                saved = self._record_saving("tts", time.perf_counter() - tts_started)
+                metrics.FRAMES.labels(reason).inc()
+                print(f"[{session_id}] Frame {seq} {reason} before its audio (saved ~{round(saved * 1000)} ms of TTS, "
+                      f"{round(self.seconds_saved * 1000)} ms this session)")
+                self._trace.event("abandoned", seq=seq, reason=reason, saved_ms=round(self.seconds_saved * 1000))
+                await self._sink.abandoned(seq, reason, round(self.seconds_saved * 1000))
+            finally:
+                self._in_flight -= 1
+                metrics.PIPELINES_IN_FLIGHT.dec()
+                pipeline_admission().leave()
+
+    def _archive_turn(self, description: str, spoken: list[tuple[int, str]], frame, audio: bytes):
+        """Queue a spoken commentary for the database, speakers joined the way the LLM wrote them"""
+        if (self._archive is None and self._media is None) or not spoken:
+            return
+        voices = {}
+        for speaker, text in spoken:
+            voices.setdefault(speaker, []).append(text)
+        commentary = SPEAKER_DELIMITER.join(" ".join(texts) for _, texts in sorted(voices.items()))
+        model = get_llm_service().model
+        if self._media is None:
+            self._archive.add(self._session_id, model, description, commentary)
+            return
+
+        keyframe = None
+        now = time.monotonic()
+        if self._last_keyframe is None or now - self._last_keyframe >= self._media.keyframe_interval:
+            keyframe = frame
+            self._last_keyframe = now
+        self._media.add(self._session_id, model, description, commentary, audio=audio, keyframe=keyframe)
+
+    def _stale_reason(self, seq: int, captured: float) -> str | None:
+        """Why frame seq's remaining work should be dropped, None while it's still worth finishing"""
+        if seq in self._abandoned:
+            return self._abandoned[seq]
+        if seq <= self._speaking:
+            return None     # Never cut off commentary that has started playing
+        if self._frame_deadline > 0 and time.perf_counter() - captured > self._frame_deadline:
+            return "expired"
+        if self._newest > seq and self._superseded_in_row < self._supersede_limit:
+            return "superseded"
+        return None
+
+    def _check_stale(self, seq: int, captured: float) -> str | None:
+        """_stale_reason(), recording the decision so both stages drop the frame"""
+        reason = self._stale_reason(seq, captured)
+        if reason is not None and seq not in self._abandoned:
+            self._abandoned[seq] = reason
+            if reason == "superseded":
+                self._superseded_in_row += 1
+        return reason
+
+    async def _stale(self, seq: int, captured: float) -> str:
+        """Wait until frame seq is superseded or expired"""
+        async with self._progress:
+            while (reason := self._check_stale(seq, captured)) is None:
+                remaining = captured + self._frame_deadline - time.perf_counter()
+                try:
+                    await asyncio.wait_for(
+                        self._progress.wait(), timeout=remaining if self._frame_deadline > 0 and remaining > 0 else None
+                    )
+                except TimeoutError:
+                    pass
+            self._progress.notify_all()     # The other stage may be working on the same frame
+        return reason
+
+    async def _unless_stale(self, seq: int, captured: float, work) -> str | None:
+        """Run a stage's work for frame seq, cancelled if the frame goes stale first; returns why, None if it finished"""
+        if (reason := self._check_stale(seq, captured)) is not None:
+            work.close()    # Already stale (or missed a provider deadline), don't start it at all
+            async with self._progress:
+                self._progress.notify_all()
+            return reason
+        if not self._cancels:
+            await work
+            return None
+        task = asyncio.create_task(work)
+        watch = asyncio.create_task(self._stale(seq, captured))
+        try:
+            await asyncio.wait({task, watch}, return_when=asyncio.FIRST_COMPLETED)
+            if task.done():
+                task.result()
+                return None
+            return watch.result()
+        finally:
+            task.cancel()
+            watch.cancel()
+            await asyncio.gather(task, watch, return_exceptions=True)
+
+    def _learn(self, stage: str, seconds: float):
+        previous = self._typical.get(stage)
+        self._typical[stage] = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+
+    def _record_saving(self, stage: str, spent: float) -> float:
+        """Provider time a dropped frame didn't use: the stage's usual duration minus what it already ran"""
+        saved = max(0.0, self._typical.get(stage, 0.0) - spent)
+        self.seconds_saved += saved
+        metrics.PROVIDER_SECONDS_SAVED.labels(stage).inc(saved)
+        return saved
+
+    def _observe(self, name: str, seconds: float):
+        if self._pacer is not None:
+            self._pacer.observe(name, seconds)
+
+    async def _pace(self):
+        """Send the client a new capture interval when the pacer has one"""
+        if self._pacer is None:
+            return
+        hint = self._pacer.recommend(self._frames.dropped)
+        if hint is not None:
+            interval, reason = hint
+            print(f"[{self._session_id}] Rate hint: capture every {round(interval * 1000)} ms ({reason})")
+            self._trace.event("rate_hint", interval_ms=round(interval * 1000), reason=reason)
+            await self._sink.rate_hint(round(interval * 1000), reason)
+
+    def _started_speaking(self, seq: int):
+        self._speaking = seq
+        self._superseded_in_row = 0
+
+    async def _send_audio(self, seq: int, captured: float, lead_in: int, segments: asyncio.Queue, turn: tuple):
+        session_id = self._session_id
+        audio = get_tts_service().stream_segments(_drain(segments))
+
+        if not self._stream_audio:
+            with self._trace.timed("tts", seq):
+                audio_bytes = b"".join([chunk async for chunk in audio])
+            print(f"[{session_id}] Audio generated: {len(audio_bytes)} bytes")
+            if audio_bytes:
+                self._started_speaking(seq)
+                self._archive_turn(*turn, audio_bytes)
+                await self._sink.audio(seq, audio_bytes)
+                metrics.FIRST_AUDIO_SECONDS.observe(time.perf_counter() - captured)
+                self._observe("first_audio", time.perf_counter() - captured)
+            return
+
+        first_chunk_ms = None
+        index = lead_in
+        clip = []       # The commentary's audio, kept for the media archive
+        total_bytes = 0
+        # TTS time is time spent waiting on the next chunk, not sending the previous one
+        tts_seconds = 0.0
+        waiting = time.perf_counter()
+        async for chunk in audio:
+            tts_seconds += time.perf_counter() - waiting
+            if first_chunk_ms is None:
+                self._started_speaking(seq)
+                first_chunk_ms = round((time.perf_counter() - captured) * 1000)
+                print(f"[{session_id}] Time to first audio: {first_chunk_ms} ms")
+                metrics.FIRST_AUDIO_SECONDS.observe(first_chunk_ms / 1000)
+                self._observe("first_audio", first_chunk_ms / 1000)
+            await self._sink.audio_chunk(seq, index, chunk)
+            if self._media is not None:
+                clip.append(chunk)
+            index += 1
+            total_bytes += len(chunk)
+            waiting = time.perf_counter()
+        self._trace.stage("tts", seq, tts_seconds + time.perf_counter() - waiting)
+
+        total_ms = round((time.perf_counter() - captured) * 1000)
+        print(f"[{session_id}] Audio streamed: {index} chunks, {total_bytes} bytes in {total_ms} ms")
+        if first_chunk_ms is not None:
+            self._archive_turn(*turn, b"".join(clip))
+        await self._sink.audio_end(seq, {
+            "chunks": index,
+            "bytes": total_bytes,
+            "time_to_first_audio_ms": first_chunk_ms,
+            "total_ms": total_ms,
+            "interjection": bool(lead_in)
+        })
+
+
+async def _drain(queue: asyncio.Queue):
+    """Yield queue items until the None sentinel"""
+    while (item := await queue.get()) is not None:
+        yield item
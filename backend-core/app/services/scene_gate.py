@@ -0,0 +1,85 @@
+"""
+Scene-Change Gate: skip Vision -> LLM -> TTS when the screen hasn't changed
+Difference hash (dHash) of a tiny grayscale thumbnail, compared by Hamming distance
+"""
+from io import BytesIO
+
+from PIL import Image, UnidentifiedImageError
+
+from .workers import run_cpu
+
+HASH_SIZE = 8   # 8x8 gradient bits = 64-bit hash
+
+
+def dhash(image_bytes: bytes | memoryview, hash_size: int = HASH_SIZE) -> int:
+    """
+    Compute a difference hash of a JPEG
+
+    Args:
+        image_bytes: Encoded image
+        hash_size: Hash is hash_size x hash_size bits
+
+    Returns:
+        int: Perceptual hash (similar images -> small Hamming distance)
+    """
+    with Image.open(BytesIO(image_bytes)) as image:
+        # Let the JPEG decoder downscale via DCT so we never decode full resolution
+        image.draft("L", (hash_size * 16, hash_size * 16))
+        thumb = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+
+    pixels = thumb.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+class SceneGate:
+    def __init__(self, threshold: int = 5):
+        """
+        Per-session gate in front of the vision stage
+
+        Args:
+            threshold: Minimum Hamming distance (out of 64 bits) that counts as a new scene,
+                       0 disables the gate
+        """
+        self._threshold = threshold
+        self._last_hash = None      # Hash of the last frame that went through the pipeline
+        self.skipped = 0
+
+    async def check(self, image_bytes: bytes | memoryview) -> tuple[bool, int, int | None]:
+        """
+        Decide whether a frame is worth a pipeline pass
+
+        A changed frame only becomes the new reference once commit() is called with its hash,
+        so a frame that is then refused (throttled) doesn't mark its scene as seen.
+
+        Returns:
+            (changed, distance, hash) - distance is -1 when there is nothing to compare against,
+            hash is None when the frame couldn't be hashed (or the gate is off)
+        """
+        if self._threshold <= 0:
+            return True, -1, None
+
+        try:
+            frame_hash = await run_cpu(dhash, image_bytes)
+        except (UnidentifiedImageError, OSError):
+            # Can't hash it, let vision decide what it is
+            return True, -1, None
+
+        if self._last_hash is None:
+            return True, -1, frame_hash
+
+        distance = (frame_hash ^ self._last_hash).bit_count()
+        if distance < self._threshold:
+            self.skipped += 1
+            return False, distance, frame_hash
+        return True, distance, frame_hash
+
+    def commit(self, frame_hash: int | None) -> None:
+        """The frame with this hash is going through the pipeline: compare later frames against it"""
+        if frame_hash is not None:
+            # Compare against the last processed frame, so slow drift still adds up
+            self._last_hash = frame_hash
@@ -0,0 +1,406 @@
+"""
+Session State Store: one bounded home for per-session preferences, vision/commentary history and counters
+Records are dropped on disconnect, after SESSION_TTL_SECONDS idle, or oldest-first past SESSION_MAX_BYTES
+(a session whose socket is still open gets its record back on its next activity)
+Optionally written through to a shared backend (SESSION_STORE_URL) so other workers can resume them
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+from . import metrics
+
+# Rough fixed cost of one record (slots object, deque, dict) on 64-bit CPython
+_RECORD_OVERHEAD = 1024
+# Compacted commentary kept as a recap, oldest lines are dropped past this
+_RECAP_CHARS = 600
+
+
+class SessionState:
+    __slots__ = (
+        "session_id", "preferences", "protocol", "stream_audio",
+        "history", "turns", "recap", "created", "last_seen", "frames", "clips", "bytes", "sockets", "__weakref__",
+    )
+
+    def __init__(self, session_id, preferences: dict, protocol: str, stream_audio: bool, history_len: int = 3):
+        self.session_id = session_id
+        self.preferences = preferences
+        self.protocol = protocol
+        self.stream_audio = stream_audio
+        self.history = deque(maxlen=history_len)    # Most recent vision descriptions, oldest first
+        self.turns = []         # Recent [description, commentary] LLM turns, oldest first
+        self.recap = ""         # Commentary lines compacted out of turns, oldest first
+        self.created = time.monotonic()
+        self.last_seen = self.created
+        self.frames = 0         # Frames received
+        self.clips = 0          # Commentary clips sent
+        self.sockets = 0        # Open sockets using this record (a reconnect can overlap the old socket)
+        self.bytes = _RECORD_OVERHEAD + len(json.dumps(preferences))
+
+    def _history_bytes(self) -> int:
+        return (
+            sum(sys.getsizeof(description) for description in self.history)
+            + sum(sys.getsizeof(description) + sys.getsizeof(comment) for description, comment in self.turns)
+            + sys.getsizeof(self.recap)
+        )
+
+    def to_record(self) -> dict:
+        """What a shared backend keeps (everything except local timestamps)"""
+        return {
+            "preferences": self.preferences,
+            "protocol": self.protocol,
+            "stream_audio": self.stream_audio,
+            "history": list(self.history),
+            "turns": self.turns,
+            "recap": self.recap,
+            "frames": self.frames,
+            "clips": self.clips,
+        }
+
+    def restore(self, record: dict) -> None:
+        """Pick up history and counters saved by another worker"""
+        self.history.extend(record.get("history", ()))
+        self.turns = [list(turn) for turn in record.get("turns", ())]
+        self.recap = record.get("recap", "")
+        self.frames = record.get("frames", 0)
+        self.clips = record.get("clips", 0)
+
+
+class SqliteBackend:
+    """Shared records in one SQLite file, for workers on the same host"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()     # sqlite3 connections can't cross threads
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def load(self, session_id: str) -> dict | None:
+        row = self._connection().execute(
+            "SELECT record FROM sessions WHERE session_id = ? AND expires_at > ?", (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_many(self, records: dict[str, dict], ttl: float) -> None:
+        expires_at = time.time() + ttl
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO sessions (session_id, record, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET record = excluded.record, expires_at = excluded.expires_at",
+                [(session_id, json.dumps(record), expires_at) for session_id, record in records.items()]
+            )
+
+    def purge_expired(self) -> int:
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class RedisBackend:
+    """Shared records in Redis (keys expire on their own), for workers on several hosts"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("A redis:// SESSION_STORE_URL needs the redis package (pip install redis)") from e
+        self._client = redis.Redis.from_url(url)
+
+    def load(self, session_id: str) -> dict | None:
+        raw = self._client.get(f"nexcast:session:{session_id}")
+        return json.loads(raw) if raw else None
+
+    def save_many(self, records: dict[str, dict], ttl: float) -> None:
+        pipe = self._client.pipeline()
+        for session_id, record in records.items():
+            pipe.set(f"nexcast:session:{session_id}", json.dumps(record), ex=max(1, int(ttl)))
+        pipe.execute()
+
+    def purge_expired(self) -> int:
+        return 0
+
+
+def backend_from_url(url: str | None):
+    """
+    Build a shared backend from SESSION_STORE_URL
+
+    Args:
+        url: "" / "memory" for in-process only, "sqlite:///path/to/sessions.db" or "redis://host:6379/0"
+
+    Returns:
+        Backend, or None for in-process only
+    """
+    if not url or url == "memory":
+        return None
+    if url.startswith("sqlite:///"):
+        return SqliteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported SESSION_STORE_URL: {url}")
+
+
+class SessionStore:
+    def __init__(
+        self,
+        ttl: float = 1800,
+        max_bytes: int = 64 * 1024 * 1024,
+        history_len: int = 3,
+        backend=None,
+        context_turns: int = 6
+    ):
+        """
+        Session records for this worker, optionally shared with other workers
+
+        Args:
+            ttl: Seconds without activity before a session is evicted (and its shared record expires)
+            max_bytes: Estimated memory budget for all records, least recently active go first
+            history_len: Vision descriptions kept per session
+            backend: Shared backend from backend_from_url(), None keeps everything in-process
+            context_turns: LLM turns kept verbatim per session, past that the oldest half is compacted into a recap
+        """
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._history_len = history_len
+        self._context_turns = max(1, context_turns)
+        self._backend = backend
+        self._sessions = OrderedDict()      # {session_id: SessionState}, least recently active first
+        # Evicted records, until the socket holding them closes (then they're collected)
+        self._evicted = weakref.WeakValueDictionary()
+        self._dirty = {}                    # {session_id: SessionState} waiting to be written to the backend
+        self._flusher = None
+        self._flush_lock = None
+        self.bytes = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def open(self, session_id, preferences: dict, protocol: str, stream_audio: bool) -> SessionState:
+        """Create (or refresh, on reconnect) a session's record, resuming it from the backend if another worker had it"""
+        state = self._live(session_id)
+        if state is None:
+            state = SessionState(session_id, preferences, protocol, stream_audio, self._history_len)
+            if self._backend is not None:
+                record = await asyncio.to_thread(self._backend.load, str(session_id))
+                if record is not None:
+                    state.restore(record)
+                    print(f"[{session_id}] Session resumed from shared store ({len(state.history)} descriptions)")
+            self._sessions[session_id] = state
+            self.bytes += state.bytes
+        else:
+            state.preferences = preferences
+            state.protocol = protocol
+            state.stream_audio = stream_audio
+        state.sockets += 1
+        self._resize(state)
+        self.touch(state)
+        self.sweep()
+        self._publish()
+        self._mark_dirty(state)
+        return state
+
+    def get(self, session_id) -> SessionState | None:
+        return self._sessions.get(session_id)
+
+    def close(self, state: SessionState) -> None:
+        """
+        A socket using this record closed: drop the local record once no socket uses it
+
+        The shared record stays until it expires.
+        """
+        state.sockets -= 1
+        if state.sockets > 0:
+            return      # A reconnect opened the same session before the old socket went away
+        session_id = state.session_id
+        if self._evicted.get(session_id) is state:
+            del self._evicted[session_id]
+        if self._sessions.get(session_id) is state:
+            del self._sessions[session_id]
+            self.bytes -= state.bytes
+            self._publish()
+
+    def touch(self, state: SessionState) -> None:
+        """Mark a session as active now, taking its record back if it was evicted while the socket stayed open"""
+        state.last_seen = time.monotonic()
+        if state.session_id in self._sessions:
+            self._sessions.move_to_end(state.session_id)
+        elif self._evicted.get(state.session_id) is state:
+            self._readmit(state)
+
+    def history(self, session_id) -> tuple[str, ...]:
+        """Recent vision descriptions for a session, oldest first (empty if unknown)"""
+        state = self._live(session_id)
+        return tuple(state.history) if state is not None else ()
+
+    def add_description(self, session_id, description: str) -> None:
+        """Remember a vision description (ignored for sessions without a record)"""
+        state = self._live(session_id)
+        if state is None:
+            return
+        state.history.append(description)
+        self._resize(state)
+        self.touch(state)
+        self._enforce_budget()
+        self._publish()
+        self._mark_dirty(state)
+
+    def commentary(self, session_id) -> tuple[str, tuple[tuple[str, str], ...]]:
+        """The session's LLM context: (recap of older lines, recent (description, commentary) turns oldest first)"""
+        state = self._live(session_id)
+        if state is None:
+            return "", ()
+        return state.recap, tuple((description, comment) for description, comment in state.turns)
+
+    def add_commentary(self, session_id, description: str, comment: str) -> None:
+        """
+        Remember an LLM turn (ignored for sessions without a record)
+
+        Turns only ever get appended, so consecutive prompts share everything but the newest
+        turn (provider prefix caches keep hitting). Past context_turns the oldest half is
+        folded into the recap in one go, so the prefix changes once per compaction instead of every frame.
+        """
+        state = self._live(session_id)
+        if state is None:
+            return
+        state.turns.append([description, comment])
+        if len(state.turns) > self._context_turns:
+            keep = self._context_turns // 2
+            compacted = [comment for _, comment in state.turns[:len(state.turns) - keep]]
+            state.turns = state.turns[len(state.turns) - keep:]
+            lines = [line for line in state.recap.split("\n") if line] + compacted
+            while len(lines) > 1 and sum(len(line) + 1 for line in lines) > _RECAP_CHARS:
+                lines.pop(0)
+            state.recap = "\n".join(lines)
+        self._resize(state)
+        self.touch(state)
+        self._enforce_budget()
+        self._publish()
+        self._mark_dirty(state)
+
+    def sweep(self) -> int:
+        """Evict idle sessions and enforce the byte budget, returns sessions evicted"""
+        evicted = 0
+        cutoff = time.monotonic() - self._ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen > cutoff:
+                break
+            self._evict(oldest.session_id, f"idle for {self._ttl:.0f}s")
+            evicted += 1
+        evicted += self._enforce_budget()
+        self._publish()
+        return evicted
+
+    async def sweep_forever(self, interval: float = 60) -> None:
+        """Background sweeper (started from the app lifespan)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+            if self._backend is not None:
+                try:
+                    await asyncio.to_thread(self._backend.purge_expired)
+                except Exception as e:
+                    print(f"[SessionStore] Backend purge failed: {e}")
+
+    async def flush(self) -> None:
+        """Write every changed session to the backend (one writer at a time, so writes stay ordered)"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._dirty:
+                records = {str(session_id): state.to_record() for session_id, state in self._dirty.items()}
+                self._dirty.clear()
+                try:
+                    await asyncio.to_thread(self._backend.save_many, records, self._ttl)
+                except Exception as e:
+                    # Shared state is best effort, the live session keeps going on this worker
+                    print(f"[SessionStore] Backend write failed: {e}")
+
+    def _mark_dirty(self, state: SessionState):
+        if self._backend is None:
+            return
+        self._dirty[state.session_id] = state
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self.flush())
+
+    def stats(self) -> dict:
+        """Live gauge for monitoring"""
+        return {"sessions": len(self._sessions), "bytes": self.bytes, "evicted": self.evicted}
+
+    def _publish(self):
+        """Put the record count and size on /metrics"""
+        metrics.SESSION_RECORDS.set(len(self._sessions))
+        metrics.SESSION_STORE_BYTES.set(self.bytes)
+
+    def _resize(self, state: SessionState):
+        size = _RECORD_OVERHEAD + len(json.dumps(state.preferences)) + state._history_bytes()
+        self.bytes += size - state.bytes
+        state.bytes = size
+
+    def _enforce_budget(self) -> int:
+        evicted = 0
+        while self.bytes > self._max_bytes and len(self._sessions) > 1:
+            self._evict(next(iter(self._sessions)), f"store over {self._max_bytes} bytes")
+            evicted += 1
+        return evicted
+
+    def _live(self, session_id) -> SessionState | None:
+        """A session's record, readmitting it if it was evicted while its socket stayed open"""
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._evicted.get(session_id)
+            if state is not None:
+                self._readmit(state)
+        return state
+
+    def _readmit(self, state: SessionState):
+        print(f"[{state.session_id}] Session active again after eviction, record restored")
+        del self._evicted[state.session_id]
+        self._sessions[state.session_id] = state
+        self.bytes += state.bytes
+        self._publish()
+
+    def _evict(self, session_id, reason: str):
+        print(f"[{session_id}] Session evicted: {reason}")
+        state = self._sessions.pop(session_id)
+        self.bytes -= state.bytes
+        # Only the store lets go: a socket still holding the state brings it back on its next activity
+        self._evicted[session_id] = state
+        self.evicted += 1
+        metrics.SESSIONS_EVICTED.inc()
+
+
+_store = None
+
+
+def get_session_store() -> SessionStore:
+    """
+    Get or create the session store singleton
+
+    Configured by SESSION_TTL_SECONDS, SESSION_MAX_BYTES, SESSION_HISTORY, SESSION_CONTEXT_TURNS and SESSION_STORE_URL.
+    """
+    global _store
+    if _store is None:
+        _store = SessionStore(
+            ttl=float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+            max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+            history_len=int(os.getenv("SESSION_HISTORY", "3")),
+            backend=backend_from_url(os.getenv("SESSION_STORE_URL")),
+            context_turns=int(os.getenv("SESSION_CONTEXT_TURNS", "6"))
+        )
+    return _store
@@ -2,20 +2,92 @@
 ElevenLabs Text-to-Speech Service
 Using Eleven Turbo v2.5 for low latency
 """
-from elevenlabs import ElevenLabs
+from collections.abc import AsyncIterator
+from elevenlabs import AsyncElevenLabs
 from pathlib import Path
 from dotenv import load_dotenv
+import asyncio
 import os
+import re
+import time
+
+from .audio_cache import AudioCache, cache_from_env
+from .hedging import hedged_call, hedged_stream
+from .limits import provider_slot
 
 # Load environment variables
 env_path = Path(__file__).parent.parent / "config" / ".env"
 load_dotenv(env_path)
 
+MODEL_ID = "eleven_v3"
+OUTPUT_FORMAT = "mp3_44100_128"
+_AUDIO_TAG = re.compile(r"\[[^\]]*\]\s*")
+
+
+def _speakable(text: str, model_id: str) -> str:
+    """Audio tags ([excited], ...) are a v3 feature, older models would read them out"""
+    return text if model_id == MODEL_ID else _AUDIO_TAG.sub("", text).strip()
+
+
+def _split_speakers(text: str, voice_id: str, voice_id_2: str | None) -> list[tuple[str, str]]:
+    """Split commentary into (text, voice_id) parts, one per speaker"""
+    # Multi-speaker only if text contains " | " and voice_id_2 is provided
+    if " | " in text and voice_id_2:
+        speaker1_text, speaker2_text = (part.strip() for part in text.split(" | ", 1))
+        return [(speaker1_text, voice_id), (speaker2_text, voice_id_2)]
+    return [(text, voice_id)]
+
 
 class TTSService:
-    def __init__(self):
-        """Initialize ElevenLabs client"""
-        self._client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+    def __init__(self, client=None, cache: AudioCache | None = None):
+        """Initialize ElevenLabs client (async, so renders never block the event loop)"""
+        self._client = client or AsyncElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+        self.cache = cache if cache is not None else cache_from_env()
+        # Hedge / fallback model when v3 is slow or failing (low-latency, no audio tags)
+        self._fallback_model = os.getenv("ELEVENLABS_FALLBACK_MODEL", "eleven_flash_v2_5")
+
+    async def warm(self) -> None:
+        """Open the client's connection pool with a model listing, nothing is rendered"""
+        await self._client.models.list()
+
+    async def _render(self, text: str, voice_id: str, model_id: str) -> tuple[str, bytes]:
+        """One complete render with one model, returns (model_id, mp3 bytes)"""
+        async with provider_slot("elevenlabs"):
+            audio = self._client.text_to_speech.convert(
+                text=_speakable(text, model_id),
+                voice_id=voice_id,
+                model_id=model_id,
+                output_format=OUTPUT_FORMAT
+            )
+            return model_id, b"".join([chunk async for chunk in audio])
+
+    async def _render_stream(self, text: str, voice_id: str, model_id: str) -> AsyncIterator[tuple[str, bytes]]:
+        """One streamed render with one model, yields (model_id, chunk)"""
+        async with provider_slot("elevenlabs"):
+            chunks = self._client.text_to_speech.stream(
+                text=_speakable(text, model_id),
+                voice_id=voice_id,
+                model_id=model_id,
+                output_format=OUTPUT_FORMAT
+            )
+            async for chunk in chunks:
+                if chunk:
+                    yield model_id, chunk
+
+    async def _convert(self, text: str, voice_id: str) -> tuple[bytes, float]:
+        """Render one speaker, returns (mp3 bytes, seconds taken)"""
+        start = time.perf_counter()
+        key = (text, voice_id, MODEL_ID, OUTPUT_FORMAT)
+        audio_bytes = await self.cache.get(key)
+        if audio_bytes is None:
+            model_id, audio_bytes = await hedged_call("elevenlabs", [
+                lambda: self._render(text, voice_id, MODEL_ID),
+                lambda: self._render(text, voice_id, self._fallback_model),
+            ])
+            # Fallback renders aren't cached, the v3 voice comes back once the primary recovers
+            if model_id == MODEL_ID:
+                await self.cache.put(key, audio_bytes)
+        return audio_bytes, time.perf_counter() - start
 
     async def synthesize(
         self,
@@ -28,6 +100,9 @@ class TTSService:
         """
         Generate speech audio with ElevenLabs (supports multi-speaker)
 
+        Both speakers are rendered concurrently, so dual mode costs max(t1, t2)
+        instead of t1 + t2. Audio is still assembled in speaker order.
+
         Args:
             text: Text with audio tags, use " | " to split speakers
             voice_id: First speaker (American urban)
@@ -38,38 +113,127 @@ class TTSService:
         Returns:
             bytes: MP3 audio data (concatenated if multi-speaker)
         """
-        # Check if multi-speaker (contains " | " and voice_id_2 is provided)
-        if " | " in text and voice_id_2:
-            parts = text.split(" | ", 1)
-            speaker1_text = parts[0].strip()
-            speaker2_text = parts[1].strip()
-
-            # Synthesize speaker 1
-            audio1 = self._client.text_to_speech.convert(
-                text=speaker1_text,
-                voice_id=voice_id,
-                model_id="eleven_v3",
-                output_format="mp3_44100_128"
-            )
-            audio1_bytes = b"".join(audio1)
-
-            # Synthesize speaker 2
-            audio2 = self._client.text_to_speech.convert(
-                text=speaker2_text,
-                voice_id=voice_id_2,
-                model_id="eleven_v3",
-                output_format="mp3_44100_128"
-            )
-            audio2_bytes = b"".join(audio2)
+        parts = _split_speakers(text, voice_id, voice_id_2)
 
-            # Concatenate audio (simple append - no mixing)
-            return audio1_bytes + audio2_bytes
-        else:
-            # Single speaker
-            audio = self._client.text_to_speech.convert(
-                text=text,
-                voice_id=voice_id,
-                model_id="eleven_v3",
-                output_format="mp3_44100_128"
-            )
-            return b"".join(audio)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._convert(part_text, part_voice) for part_text, part_voice in parts)
+        )
+        elapsed = time.perf_counter() - start
+
+        if len(results) > 1:
+            timings = ", ".join(f"speaker {i + 1}: {seconds * 1000:.0f} ms" for i, (_, seconds) in enumerate(results))
+            print(f"[TTS] {timings} (wall: {elapsed * 1000:.0f} ms)")
+
+        # Concatenate audio (simple append - no mixing)
+        return b"".join(audio_bytes for audio_bytes, _ in results)
+
+    async def _pump(self, text: str, voice_id: str, queue: asyncio.Queue, label: str):
+        """Push one speaker's streamed chunks into a queue, None marks the end"""
+        start = time.perf_counter()
+        first_chunk = None
+        key = (text, voice_id, MODEL_ID, OUTPUT_FORMAT)
+        try:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                await queue.put(cached)
+                print(f"[TTS] {label}: cache hit ({len(cached)} bytes)")
+                return
+
+            rendered = []
+            model_id = MODEL_ID
+            chunks = hedged_stream("elevenlabs", [
+                lambda: self._render_stream(text, voice_id, MODEL_ID),
+                lambda: self._render_stream(text, voice_id, self._fallback_model),
+            ])
+            async for model_id, chunk in chunks:
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                rendered.append(chunk)
+                await queue.put(chunk)
+            # Only complete v3 renders are cached
+            if model_id == MODEL_ID:
+                await self.cache.put(key, b"".join(rendered))
+        finally:
+            await queue.put(None)
+
+        total = time.perf_counter() - start
+        first_ms = f"{first_chunk * 1000:.0f} ms" if first_chunk is not None else "n/a"
+        print(f"[TTS] {label}: first chunk {first_ms}, done {total * 1000:.0f} ms")
+
+    async def stream_segments(self, segments: AsyncIterator[tuple[str, str]]) -> AsyncIterator[bytes]:
+        """
+        Stream speech for (text, voice_id) segments that are still being produced
+
+        Each segment starts rendering the moment it arrives (e.g. speaker 1 while the
+        LLM is still writing speaker 2), and audio is yielded strictly in segment order.
+
+        Args:
+            segments: Async iterator of (text, voice_id), in playback order
+
+        Yields:
+            bytes: MP3 chunks
+        """
+        pending = asyncio.Queue()  # (chunk queue, pump task) per segment, None marks the end
+        tasks = []
+
+        async def start_renders():
+            try:
+                async for index, (part_text, part_voice) in _aenumerate(segments):
+                    queue = asyncio.Queue()
+                    task = asyncio.create_task(self._pump(part_text, part_voice, queue, f"segment {index + 1}"))
+                    tasks.append(task)
+                    await pending.put((queue, task))
+            finally:
+                await pending.put(None)
+
+        feeder = asyncio.create_task(start_renders())
+        try:
+            while (item := await pending.get()) is not None:
+                queue, task = item
+                while (chunk := await queue.get()) is not None:
+                    yield chunk
+                # Surface provider errors for this segment
+                await task
+            # Surface errors from whatever produces the segments (e.g. the LLM)
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
+
+    async def stream(
+        self,
+        text: str,
+        voice_id: str = "qVpGLzi5EhjW3WGVhOa9",
+        voice_id_2: str | None = "gU0LNdkMOQCOrPrwtbee",
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream speech audio chunk by chunk as ElevenLabs renders it
+
+        Same speaker split as synthesize(), but chunks are yielded as they arrive,
+        so the first audio is available after the first chunk instead of the full render.
+        Speaker 2 renders in the background while speaker 1 is being streamed.
+
+        Args:
+            text: Text with audio tags, use " | " to split speakers
+            voice_id: First speaker
+            voice_id_2: Second speaker (optional, None for single speaker)
+
+        Yields:
+            bytes: MP3 chunks (speaker 1 first, then speaker 2)
+        """
+        async def parts():
+            for part in _split_speakers(text, voice_id, voice_id_2):
+                yield part
+
+        async for chunk in self.stream_segments(parts()):
+            yield chunk
+
+
+async def _aenumerate(iterator: AsyncIterator):
+    index = 0
+    async for item in iterator:
+        yield index, item
+        index += 1
@@ -1,39 +1,74 @@
 import base64
 import os
-from collections import deque
+from collections.abc import Sequence
 
 from google import genai
 from google.genai import types
 
+from .hedging import hedged_call
+from .limits import provider_slot
+from .sessions import get_session_store
+
 
 class VisionService:
-    def __init__(self):
-        self._client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    def __init__(self, client=None):
+        self._client = client or genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
         self._model = "gemini-2.5-flash"
-        self._session_history = {}      # {session_id: deque([desc1, desc2, desc3])}
+        # Hedge / fallback target when the primary is slow or failing (set it to the primary for a plain duplicate)
+        self._fallback_model = os.getenv("GEMINI_FALLBACK_MODEL", "gemini-2.5-flash-lite")
+
+    async def warm(self) -> None:
+        """Open the client's connection pool (TLS included) with a model lookup, no generation"""
+        await self._client.aio.models.get(model=self._model)
+
+    async def analyze_with_context(self, frame, session_id, earlier: Sequence = (), span: float = 0.0):
+        """
+        Describe a frame in one short sentence, in the context of the session's earlier descriptions
+
+        Args:
+            frame: JPEG to describe
+            session_id: Session whose description history is context (and which remembers this one)
+            earlier: Frames from just before this one, oldest first, sent in the same request as motion context
+            span: Seconds between the first of `earlier` and `frame`
 
-    async def analyze_with_context(self, frame_base64, session_id):
-        # Empty queue if no hitory found
-        history = self._session_history.get(session_id, deque(maxlen=3))
+        Returns:
+            str: The description
+        """
+        # Raw bytes/memoryview from the binary protocol, base64 str from the JSON one
+        images = [base64.b64decode(image) if isinstance(image, str) else bytes(image) for image in (*earlier, frame)]
+
+        # History lives in the session store, so it goes away with the session
+        sessions = get_session_store()
+        history = sessions.history(session_id)
         context = "\n".join(f"T-{i+1}: {d}" for i, d in enumerate(reversed(history)))
 
-        # Input: Current Frame + Historical Context
-        prompt = (
-            f"Previous frames:\n{context}\n\nDescribe what's happening NOW in ONE short sentence. Note any changes."
-            if context
-            else "Describe this image in ONE short sentence."
-        )
-
-        response = await self._client.aio.models.generate_content(
-            model=self._model,
-            contents=[
-                types.Part.from_bytes(data=base64.b64decode(frame_base64), mime_type="image/jpeg"),
-                prompt
-            ],
-            config=types.GenerateContentConfig(temperature=0.3)
-        )
+        # Input: Current Frame (plus the frames just before it) + Historical Context
+        if earlier:
+            prompt = (
+                f"These {len(images)} screenshots were taken over {span:.1f}s, oldest first; the last one is NOW.\n"
+                + (f"Previous frames:\n{context}\n\n" if context else "")
+                + "Describe what's happening NOW in ONE short sentence, including the motion across the screenshots."
+            )
+        elif context:
+            prompt = f"Previous frames:\n{context}\n\nDescribe what's happening NOW in ONE short sentence. Note any changes."
+        else:
+            prompt = "Describe this image in ONE short sentence."
+
+        contents = [types.Part.from_bytes(data=image, mime_type="image/jpeg") for image in images] + [prompt]
+
+        async def describe(model):
+            async with provider_slot("gemini"):
+                return await self._client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=types.GenerateContentConfig(temperature=0.3)
+                )
+
+        response = await hedged_call("gemini", [
+            lambda: describe(self._model),
+            lambda: describe(self._fallback_model),
+        ])
 
         desc = response.text.strip()
-        history.append(desc)
-        self._session_history[session_id] = history
+        sessions.add_description(session_id, desc)
         return desc
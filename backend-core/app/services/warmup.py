@@ -0,0 +1,92 @@
+"""
+Startup Warmup: provider clients, connection pools and worker processes built before the first frame
+/health only reports ready once every component is warm (or the startup budget ran out)
+"""
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from . import metrics
+from .pipeline import (
+    DEFAULT_SPEAKER1_VOICE_ID,
+    get_interjection_library,
+    get_llm_service,
+    get_tts_service,
+    get_vision_service,
+)
+from .workers import get_pool
+
+_warmup = None
+
+
+async def _warm_interjections():
+    """Render the default voice's interjections (served from the audio cache when it has them)"""
+    if int(os.getenv("INTERJECTION_DISTANCE", "16")) > 0:
+        # Every worker warms the same clips: the first renders them into the shared disk tier, the rest read them
+        async with get_tts_service().cache.exclusive("interjections"):
+            await get_interjection_library().warm(DEFAULT_SPEAKER1_VOICE_ID)
+
+
+# Each builds its client (the get_*() singletons) and opens its connections
+COMPONENTS = {
+    "workers": lambda: get_pool().warm(),
+    "vision": lambda: get_vision_service().warm(),
+    "llm": lambda: get_llm_service().warm(),
+    "tts": lambda: get_tts_service().warm(),
+    "interjections": _warm_interjections,
+}
+
+
+class Warmup:
+    def __init__(self):
+        """Startup progress of this server process"""
+        self.ready = False
+        self.total_ms = None
+        self.components = {}    # {name: {"status": "ok" | "failed" | "timeout", "ms": n}}
+
+    async def run(self, budget: float | None = None, components: dict[str, Callable[[], Awaitable]] | None = None):
+        """
+        Warm every component concurrently, then mark the process ready
+
+        A component that fails or runs past the budget doesn't hold up readiness:
+        its client still exists and connects on first use, as it would have without warmup.
+
+        Args:
+            budget: Seconds each component may take (None = no limit)
+            components: {name: coroutine factory}, defaults to COMPONENTS
+        """
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._warm(name, factory, budget) for name, factory in (components or COMPONENTS).items()
+        ))
+        self.total_ms = round((time.perf_counter() - started) * 1000)
+        self.ready = True
+        print(f"[Startup] Warm in {self.total_ms} ms: "
+              + ", ".join(f"{name} {info['status']} {info['ms']} ms" for name, info in self.components.items()))
+
+    async def _warm(self, name: str, factory: Callable[[], Awaitable], budget: float | None):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(factory(), timeout=budget)
+            status = "ok"
+        except TimeoutError:
+            status = "timeout"
+        except Exception as e:
+            print(f"[Startup] {name} warmup failed: {e}")
+            status = "failed"
+        seconds = time.perf_counter() - started
+        self.components[name] = {"status": status, "ms": round(seconds * 1000)}
+        metrics.STARTUP_SECONDS.labels(name).set(seconds)
+
+    def skip(self):
+        """Ready without warming (WARMUP=0), clients are built on the first frame"""
+        self.ready = True
+
+
+def get_warmup() -> Warmup:
+    """Get or create this process's warmup state"""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup()
+    return _warmup
@@ -0,0 +1,154 @@
+"""
+Worker Pools: CPU-heavy frame work off the event loop
+One shared process pool (or threads, for GIL-releasing work) with bounded backlog and latency stats
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import metrics
+
+POOL_PROCESS = "process"
+POOL_THREAD = "thread"
+
+_pools = {}     # {kind: WorkerPool}
+
+
+def _noop():
+    return None
+
+
+def _timed_call(fn, args):
+    """Runs inside the worker, returns (result, wall-clock start, seconds spent)"""
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time() - started
+
+
+class WorkerPool:
+    def __init__(self, kind: str = POOL_PROCESS, max_workers: int | None = None, max_pending: int | None = None):
+        """
+        Size-limited pool shared by every session on this process
+
+        Args:
+            kind: "process" for pure-Python CPU work, "thread" for work that releases the GIL
+            max_workers: Worker count (default: CPU count, at most 4)
+            max_pending: Calls allowed in the pool at once, the rest wait on the event loop
+                         (default: 4 per worker)
+        """
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(max_pending or self.max_workers * 4)
+        self.waiting = 0        # Calls queued on the semaphore
+        self.pending = 0        # Calls submitted to the executor and not finished yet
+        self.completed = 0
+        self.total_wait = 0.0   # Seconds between call and a worker starting on it
+        self.total_run = 0.0    # Seconds spent inside workers
+        self.max_wait = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == POOL_THREAD:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nexcast-worker")
+            else:
+                # Never fork the running server: a forked child inherits the event loop, sockets and
+                # locks held by other threads. Workers start from a clean forkserver (spawn where there's none)
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context(method)
+                )
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool (fn must be a module-level function for process pools)
+
+        Returns:
+            Whatever fn returns, exceptions are re-raised here
+        """
+        if self.kind == POOL_PROCESS:
+            # memoryviews can't be pickled, workers get their own copy anyway
+            args = tuple(bytes(arg) if isinstance(arg, memoryview) else arg for arg in args)
+
+        called = time.time()
+        depth = metrics.WORKER_QUEUE_DEPTH.labels(self.kind)
+        depth.inc()
+        self.waiting += 1
+        try:
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+            self.pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                result, started, seconds = await loop.run_in_executor(self._get_executor(), _timed_call, fn, args)
+            finally:
+                self.pending -= 1
+                self._slots.release()
+        finally:
+            depth.dec()
+
+        wait = max(0.0, started - called)
+        self.completed += 1
+        self.total_wait += wait
+        self.total_run += seconds
+        self.max_wait = max(self.max_wait, wait)
+        metrics.WORKER_TASK_SECONDS.labels(self.kind, "wait").observe(wait)
+        metrics.WORKER_TASK_SECONDS.labels(self.kind, "run").observe(seconds)
+        return result
+
+    async def warm(self) -> None:
+        """Start every worker now rather than on the first frames"""
+        await asyncio.gather(*(self.run(_noop) for _ in range(self.max_workers)))
+
+    def stats(self) -> dict:
+        """Queue depth and latency snapshot"""
+        completed = self.completed or 1
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "queue_depth": self.waiting + self.pending,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / completed * 1000, 2),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "avg_run_ms": round(self.total_run / completed * 1000, 2),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def get_pool(kind: str | None = None) -> WorkerPool:
+    """
+    Get the shared pool of a kind (default from WORKER_POOL, "process" unless set to "thread")
+
+    Sized by WORKER_PROCESSES / WORKER_MAX_PENDING.
+    """
+    kind = kind or os.getenv("WORKER_POOL", POOL_PROCESS)
+    pool = _pools.get(kind)
+    if pool is None:
+        pool = WorkerPool(
+            kind,
+            max_workers=int(os.getenv("WORKER_PROCESSES", "0")) or None,
+            max_pending=int(os.getenv("WORKER_MAX_PENDING", "0")) or None
+        )
+        _pools[kind] = pool
+    return pool
+
+
+async def run_cpu(fn, *args):
+    """Run CPU-heavy fn(*args) on the shared pool"""
+    return await get_pool().run(fn, *args)
+
+
+def shutdown_pools():
+    """Stop every pool's workers (server shutdown)"""
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
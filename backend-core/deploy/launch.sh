@@ -59,6 +59,12 @@ echo "$GOOGLE_CREDS" | sudo tee /opt/nexcast/credentials/google-credentials.json
 # 8. Create nginx configuration
 echo "Creating nginx config..."
 cat > nginx.conf <<'EOF'
+# Sticky by URI: /ws/{session_id} always goes to the same backend instance
+upstream nexcast_backend {
+    hash $uri consistent;
+    server backend:8000;
+}
+
 server {
     listen 443 ssl;
     server_name api.nexcast.club;
@@ -67,7 +73,7 @@ server {
     ssl_certificate_key /etc/letsencrypt/live/api.nexcast.club/privkey.pem;
 
     location /ws/ {
-        proxy_pass http://backend:8000/ws/;
+        proxy_pass http://nexcast_backend/ws/;
         proxy_http_version 1.1;
         proxy_set_header Upgrade $http_upgrade;
         proxy_set_header Connection "upgrade";
@@ -79,7 +85,7 @@ server {
     }
 
     location /health {
-        proxy_pass http://backend:8000/health;
+        proxy_pass http://nexcast_backend/health;
     }
 }
 EOF
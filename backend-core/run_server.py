@@ -1,14 +1,62 @@
 """
 Run uvicorn with custom WebSocket settings
+
+    python run_server.py                       # dev: one process, auto-reload
+    python run_server.py --prod [--workers N]  # prod: N worker processes, no reload
 """
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
 import uvicorn
+from dotenv import load_dotenv
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NexCast backend server")
+    parser.add_argument("--prod", action="store_true", help="Production mode: multiple workers, no reload")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes in prod mode (default: WEB_CONCURRENCY or 2)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    workers = 1
+    if args.prod:
+        # Load .env first so it can set SESSION_STORE_URL before the default below
+        load_dotenv(Path(__file__).parent / "app" / "config" / ".env")
+        # Not one per CPU: sessions are I/O-bound on each worker's event loop (CPU work has its own
+        # pool), and every worker only gets 1/N of the provider limits and admission slots
+        workers = args.workers or int(os.getenv("WEB_CONCURRENCY") or 2)
+        if workers > 1 and not os.getenv("SESSION_STORE_URL"):
+            # Workers are separate processes: share session state so any worker can resume a session
+            os.environ["SESSION_STORE_URL"] = "sqlite:///sessions.db"
+            print("SESSION_STORE_URL not set, sharing session state through sqlite:///sessions.db")
+        if workers > 1:
+            # /metrics is served by whichever worker takes the scrape: have them all write to one directory
+            metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "nexcast-metrics")
+            shutil.rmtree(metrics_dir, ignore_errors=True)    # Stale files from a previous run would be summed in
+            os.makedirs(metrics_dir)
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+        if workers > 1 and not os.getenv("AUDIO_CACHE_DIR"):
+            # Each worker warms the interjection clips: a shared disk tier means they're rendered once, not N times
+            audio_dir = os.path.join(tempfile.gettempdir(), "nexcast-audio")
+            os.environ["AUDIO_CACHE_DIR"] = audio_dir
+            print(f"AUDIO_CACHE_DIR not set, sharing rendered clips through {audio_dir}")
+    # Provider limits and admission are configured per server, each worker takes its share
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    if workers > 1:
+        from app.services.limits import thin_shares
+
+        for warning in thin_shares():
+            print(f"Warning: {warning}, raise it or run fewer workers")
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
-        port=8000,
-        reload=True,
+        port=args.port,
+        reload=not args.prod,
+        workers=workers if args.prod else None,
         ws_ping_interval=None,  # Disable ping
         ws_ping_timeout=None,   # Disable timeout
         ws_max_size=16777216    # 16MB max message size
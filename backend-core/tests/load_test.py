@@ -0,0 +1,404 @@
+"""
+Offline load test: N WebSocket clients streaming frames at a target rate against stub providers
+Run: python tests/load_test.py --clients 200 --fps 1 --duration 30  (no API keys or network needed)
+
+The server runs in a child process (or in this one with --in-process) with Gemini, Grok and
+ElevenLabs replaced by the stubs in stubs.py. Latencies are seconds or distributions:
+"0.8", "uniform:0.5,1.2", "normal:0.8,0.2", "lognormal:0.8,0.4" (median, sigma), "exp:0.8".
+Server knobs (MAX_CONCURRENT_PIPELINES, FRAME_QUEUE_SIZE, WORKER_POOL, ...) come from the environment.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.routes import protocol
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+class LoadStats:
+    """Counters and timings shared by every simulated client"""
+
+    def __init__(self):
+        self.sent = 0
+        self.clips = 0          # Frames answered with audio
+        self.skipped = 0        # Scene gate: no change
+        self.throttled = 0      # Server refused the frame (throttle message)
+        self.abandoned = 0      # Superseded or expired before its commentary started
+        self.held_back = 0      # Frames not sent while a throttle was in effect
+        self.dropped = 0        # Frames the server's ring replaced with newer ones
+        self.unanswered = 0     # Sent but never answered (dropped, or still in flight at the end)
+        self.disconnects = 0
+        self.latencies = []     # Seconds, frame sent -> last audio of its clip
+        self.first_audio = []   # Seconds, frame sent -> first audio of its clip
+
+
+class _Connection:
+    """Per-socket bookkeeping (a reconnect starts a fresh one)"""
+
+    def __init__(self):
+        self.sent = {}          # {seq: perf_counter when sent}, until answered
+        self.heard = set()      # seqs that already got their first audio
+        self.throttled_until = 0.0
+        self.dropped = 0
+
+
+def make_frames(count: int = 8, size: tuple[int, int] = (1280, 720)) -> list[bytes]:
+    """Distinct screen-like JPEGs, different enough that the scene gate lets every one through"""
+    rng = random.Random(7)
+    frames = []
+    for _ in range(count):
+        image = Image.new("RGB", size, (20, 20, 30))
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            w, h = rng.randrange(size[0] // 8, size[0] // 2), rng.randrange(size[1] // 8, size[1] // 2)
+            draw.rectangle((x, y, x + w, y + h), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile, None for no samples"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident memory of this process"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024     # macOS reports bytes, Linux KB
+
+
+async def _receive(ws, connection: _Connection, stats: LoadStats):
+    loop = asyncio.get_running_loop()
+    async for message in ws:
+        now = time.perf_counter()
+        if isinstance(message, bytes):
+            kind, seq, value, _ = protocol.unpack(message)
+            if seq in connection.sent and seq not in connection.heard:
+                connection.heard.add(seq)
+                stats.first_audio.append(now - connection.sent[seq])
+            if kind == protocol.KIND_AUDIO and seq in connection.sent:
+                # Buffered audio: one clip per frame (a scene-change interjection counts as the frame's clip)
+                stats.latencies.append(now - connection.sent.pop(seq))
+                stats.clips += 1
+                connection.dropped = value
+            continue
+
+        data = json.loads(message)
+        seq = data.get("seq")
+        if data["type"] == "audio_end" and seq in connection.sent:
+            stats.latencies.append(now - connection.sent.pop(seq))
+            stats.clips += 1
+            connection.dropped = data.get("frames_dropped", connection.dropped)
+        elif data["type"] == "skipped":
+            connection.sent.pop(seq, None)
+            stats.skipped += 1
+        elif data["type"] == "throttle":
+            connection.sent.pop(seq, None)
+            stats.throttled += 1
+            connection.throttled_until = loop.time() + data["retry_after_ms"] / 1000
+        elif data["type"] == "abandoned":
+            connection.sent.pop(seq, None)
+            stats.abandoned += 1
+
+
+async def run_client(
+    url: str,
+    session_id: int,
+    frames: list[bytes],
+    fps: float,
+    deadline: float,
+    drain: float,
+    stats: LoadStats,
+    stream_audio: bool = True
+):
+    """One simulated browser: binary protocol, a frame every 1/fps seconds, reconnects if the server drops it"""
+    loop = asyncio.get_running_loop()
+    interval = 1 / fps
+    next_frame = loop.time() + random.uniform(0, interval)     # Spread clients over the first interval
+    seq = 0
+    while loop.time() < deadline:
+        connection = _Connection()
+        receiver = None
+        try:
+            async with connect(f"{url}/ws/{session_id}", max_size=None, ping_interval=None, close_timeout=1) as ws:
+                await ws.send(json.dumps({
+                    "type": "init",
+                    "preferences": {},
+                    "protocol": "binary",
+                    "stream_audio": stream_audio
+                }))
+                json.loads(await ws.recv())     # ready
+                receiver = asyncio.create_task(_receive(ws, connection, stats))
+
+                while loop.time() < deadline and not receiver.done():
+                    await asyncio.sleep(max(0.0, next_frame - loop.time()))
+                    next_frame += interval
+                    if loop.time() < connection.throttled_until:
+                        stats.held_back += 1
+                        continue
+                    connection.sent[seq] = time.perf_counter()
+                    await ws.send(protocol.pack(protocol.KIND_FRAME, frames[seq % len(frames)], seq=seq))
+                    stats.sent += 1
+                    seq += 1
+
+                # Let frames still in the pipeline come back before closing
+                drain_until = loop.time() + drain
+                while connection.sent and not receiver.done() and loop.time() < drain_until:
+                    await asyncio.sleep(0.05)
+                if receiver.done() and loop.time() < deadline:
+                    stats.disconnects += 1
+        except (ConnectionClosed, OSError):
+            stats.disconnects += 1
+            await asyncio.sleep(0.1)
+        finally:
+            if receiver is not None:
+                receiver.cancel()
+            stats.dropped += connection.dropped
+            stats.unanswered += len(connection.sent)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _fetch(url: str, timeout: float = 2) -> str:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode()
+
+
+def stage_means(metrics_text: str) -> dict[str, float]:
+    """Mean milliseconds per pipeline stage from a /metrics scrape"""
+    sums, counts = {}, {}
+    for name, stage, value in re.findall(r'^nexcast_stage_seconds_(sum|count)\{stage="(\w+)"\} (\S+)$', metrics_text, re.M):
+        (sums if name == "sum" else counts)[stage] = float(value)
+    return {stage: round(sums[stage] / count * 1000, 2) for stage, count in counts.items() if count}
+
+
+def _server_config(port: int):
+    import uvicorn
+
+    return uvicorn.Config(
+        "app.main:app",
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        ws_ping_interval=None,
+        ws_ping_timeout=None,
+        ws_max_size=16777216
+    )
+
+
+def _install_stubs(args) -> tuple:
+    from stubs import install_stub_services, latency_from_spec
+
+    return install_stub_services(
+        latency_from_spec(args.vision),
+        latency_from_spec(args.llm),
+        latency_from_spec(args.tts),
+        error_rate=args.error_rate
+    )
+
+
+def serve(args):
+    """Child process: stub providers behind a real uvicorn server, writes its stats file on exit"""
+    import uvicorn
+
+    random.seed(args.seed)
+    stubs = _install_stubs(args)
+    try:
+        uvicorn.Server(_server_config(args.port)).run()
+    finally:
+        # uvicorn re-raises the SIGINT that stopped it, so write the stats on the way out
+        Path(args.stats_file).write_text(json.dumps({
+            "peak_rss_bytes": peak_rss_bytes(),
+            "provider_errors": sum(stub.errors for stub in stubs),
+        }))
+
+
+async def _wait_until_up(url: str, timeout: float = 20):
+    loop = asyncio.get_running_loop()
+    give_up = loop.time() + timeout
+    while True:
+        try:
+            await asyncio.to_thread(_fetch, f"{url}/health")
+            return
+        except OSError:
+            if loop.time() > give_up:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_load(args) -> dict:
+    """
+    Start a stubbed server, drive args.clients clients at args.fps for args.duration seconds
+
+    Returns:
+        Report dict (see summarize())
+    """
+    random.seed(args.seed)
+    port = _free_port()
+    base = f"127.0.0.1:{port}"
+    frames = make_frames(size=tuple(int(n) for n in args.frame_size.split("x")))
+    stats = LoadStats()
+    server_stats = {}
+
+    if args.in_process:
+        import uvicorn
+
+        stubs = _install_stubs(args)
+        server = uvicorn.Server(_server_config(port))
+        server_task = asyncio.create_task(server.serve())
+    else:
+        stats_file = Path(tempfile.mkdtemp(prefix="nexcast-load-")) / "server.json"
+        command = [
+            sys.executable, __file__, "--serve", "--port", str(port), "--stats-file", str(stats_file),
+            "--vision", args.vision, "--llm", args.llm, "--tts", args.tts,
+            "--error-rate", str(args.error_rate), "--seed", str(args.seed),
+        ]
+        output = None if args.verbose else subprocess.DEVNULL
+        child = subprocess.Popen(command, stdout=output, stderr=output, cwd=Path(__file__).parent.parent)
+
+    try:
+        await _wait_until_up(f"http://{base}")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(
+            run_client(f"ws://{base}", session_id, frames, args.fps, started + args.duration, args.drain, stats,
+                       stream_audio=not args.buffered)
+            for session_id in range(1, args.clients + 1)
+        ))
+        elapsed = loop.time() - started
+        server_stats["stage_ms"] = stage_means(await asyncio.to_thread(_fetch, f"http://{base}/metrics"))
+    finally:
+        if args.in_process:
+            server.should_exit = True
+            await server_task
+            server_stats["peak_rss_bytes"] = peak_rss_bytes()
+            server_stats["provider_errors"] = sum(stub.errors for stub in stubs)
+        else:
+            child.send_signal(signal.SIGINT)
+            await asyncio.to_thread(child.wait, 30)
+            if stats_file.exists():
+                server_stats.update(json.loads(stats_file.read_text()))
+
+    return summarize(args, stats, elapsed, server_stats)
+
+
+def summarize(args, stats: LoadStats, elapsed: float, server_stats: dict) -> dict:
+    def ms(values):
+        return {
+            f"p{pct}": round(percentile(values, pct) * 1000, 1) if values else None
+            for pct in (50, 95, 99)
+        }
+
+    peak_rss = server_stats.get("peak_rss_bytes")
+    return {
+        "clients": args.clients,
+        "target_fps": args.fps,
+        "elapsed_s": round(elapsed, 2),
+        "frames_sent": stats.sent,
+        "clips": stats.clips,
+        # Over the sending window, clips finished while draining belong to frames sent in it
+        "throughput_clips_per_s": round(stats.clips / args.duration, 2),
+        "latency_ms": ms(stats.latencies),
+        "first_audio_ms": ms(stats.first_audio),
+        "skipped": stats.skipped,
+        "throttled": stats.throttled,
+        "abandoned": stats.abandoned,
+        "held_back": stats.held_back,
+        "dropped": stats.dropped,
+        "unanswered": stats.unanswered,
+        "disconnects": stats.disconnects,
+        "provider_errors": server_stats.get("provider_errors"),
+        # In-process runs include the clients' own memory
+        "server_peak_rss_mb": round(peak_rss / 1024 / 1024, 1) if peak_rss else None,
+        "stage_ms": server_stats.get("stage_ms", {}),
+    }
+
+
+def print_report(report: dict):
+    print(f"{report['clients']} clients @ {report['target_fps']} fps for {report['elapsed_s']} s")
+    print(f"  frames sent     {report['frames_sent']}")
+    print(f"  clips           {report['clips']} ({report['throughput_clips_per_s']}/s)")
+    for key, label in (("latency_ms", "end-to-end"), ("first_audio_ms", "first audio")):
+        p = report[key]
+        print(f"  {label:<15} p50 {p['p50']} ms  p95 {p['p95']} ms  p99 {p['p99']} ms")
+    print(f"  skipped {report['skipped']}  throttled {report['throttled']} (held back {report['held_back']})  "
+          f"abandoned {report['abandoned']}  dropped {report['dropped']}  unanswered {report['unanswered']}")
+    print(f"  disconnects {report['disconnects']}  provider errors {report['provider_errors']}")
+    print(f"  server peak RSS {report['server_peak_rss_mb']} MB")
+    if report["stage_ms"]:
+        print("  stage means     " + "  ".join(f"{stage} {value} ms" for stage, value in report["stage_ms"].items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NexCast offline load test")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent WebSocket sessions")
+    parser.add_argument("--fps", type=float, default=1.0, help="Frames per second per client")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of sending")
+    parser.add_argument("--drain", type=float, default=5.0, help="Seconds to wait for in-flight frames at the end")
+    parser.add_argument("--vision", default="lognormal:0.8,0.3", help="Gemini stub latency")
+    parser.add_argument("--llm", default="lognormal:0.5,0.3", help="Grok stub latency")
+    parser.add_argument("--tts", default="lognormal:0.4,0.3", help="ElevenLabs stub latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of provider calls that fail")
+    parser.add_argument("--frame-size", default="1280x720", help="Client capture size, WxH")
+    parser.add_argument("--buffered", action="store_true", help="Ask for whole clips instead of streamed audio")
+    parser.add_argument("--in-process", action="store_true", help="Run the server in this process")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    # Child process mode (started by run_load)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--stats-file", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        exit(0)
+
+    # Pipeline logs would drown the report
+    logs = contextlib.nullcontext() if args.verbose or not args.in_process else contextlib.redirect_stdout(io.StringIO())
+    with logs:
+        report = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
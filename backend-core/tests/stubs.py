@@ -0,0 +1,182 @@
+"""
+Offline stand-ins for the Gemini, Grok and ElevenLabs SDK clients
+Same call shapes the services use, with configurable latency (fixed or a distribution), error rate and no network
+"""
+import asyncio
+import random
+import re
+from types import SimpleNamespace
+
+from app.services import hedging, limits, pipeline
+from app.services.audio_cache import AudioCache
+from app.services.llm import LlmService
+from app.services.tts import TTSService
+from app.services.vision import VisionService
+
+
+class StubProviderError(RuntimeError):
+    """Raised by a stub call picked to fail (error_rate)"""
+
+
+def latency_from_spec(spec: str | float):
+    """
+    Parse a latency distribution
+
+    Args:
+        spec: Seconds, "uniform:low,high", "normal:mean,stdev", "lognormal:median,sigma" or "exp:mean"
+
+    Returns:
+        A float for fixed latency, otherwise a callable returning one sample in seconds
+    """
+    if isinstance(spec, (int, float)):
+        return float(spec)
+    kind, _, params = spec.partition(":")
+    if not params:
+        return float(kind)
+    a, _, b = params.partition(",")
+    a = float(a)
+    b = float(b) if b else 0.0
+    if kind == "uniform":
+        return lambda: random.uniform(a, b)
+    if kind == "normal":
+        return lambda: random.gauss(a, b)
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(0, b) * a
+    if kind == "exp":
+        return lambda: random.expovariate(1 / a)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _sample(latency) -> float:
+    """One latency draw in seconds (never negative)"""
+    return max(0.0, latency() if callable(latency) else latency)
+
+
+def _maybe_fail(owner, provider: str):
+    if owner.error_rate and random.random() < owner.error_rate:
+        owner.errors += 1
+        raise StubProviderError(f"{provider} stub: injected failure")
+
+
+class StubGemini:
+    """genai.Client: client.aio.models.generate_content(...)"""
+
+    def __init__(self, latency=0.1, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self.lookups = 0
+        self.requests = []      # contents of every generate_content call
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self._generate_content, get=self._get))
+
+    async def _get(self, model, config=None):
+        self.lookups += 1
+        return SimpleNamespace(name=model)
+
+    async def _generate_content(self, model, contents, config=None):
+        self.calls += 1
+        self.requests.append(contents)
+        await asyncio.sleep(_sample(self.latency))
+        _maybe_fail(self, "gemini")
+        return SimpleNamespace(text=f"Scene {self.calls}: a player is moving across the map.")
+
+
+class _StubChat:
+    def __init__(self, owner):
+        self._owner = owner
+        self.messages = []
+
+    def append(self, message):
+        self.messages.append(message)
+        return self
+
+    async def sample(self):
+        self._owner.calls += 1
+        self._owner.prompts.append(list(self.messages))
+        await asyncio.sleep(_sample(self._owner.latency))
+        _maybe_fail(self._owner, "grok")
+        return SimpleNamespace(content=self._owner.content)
+
+    async def stream(self):
+        """Yield (response, chunk) word by word, spread over the same latency as sample()"""
+        self._owner.calls += 1
+        self._owner.prompts.append(list(self.messages))
+        tokens = re.findall(r"\S+\s*", self._owner.content)
+        latency = _sample(self._owner.latency)
+        _maybe_fail(self._owner, "grok")
+        for token in tokens:
+            await asyncio.sleep(latency / len(tokens))
+            yield None, SimpleNamespace(content=token)
+
+
+class StubGrok:
+    """xai_sdk.AsyncClient: client.chat.create(model=...).sample() / .stream()"""
+
+    def __init__(
+        self,
+        latency=0.1,
+        content: str = "[excited] What a push! | [analytical] Textbook positioning there.",
+        error_rate: float = 0.0
+    ):
+        self.latency = latency
+        self.content = content
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self.lookups = 0
+        self.prompts = []       # Messages of every request, in order
+        self.chat = SimpleNamespace(create=lambda model, **kwargs: _StubChat(self))
+        self.models = SimpleNamespace(get_language_model=self._get_language_model)
+
+    async def _get_language_model(self, model):
+        self.lookups += 1
+        return SimpleNamespace(name=model)
+
+
+class StubElevenLabs:
+    """AsyncElevenLabs: client.text_to_speech.convert(...) / .stream(...) async iterators"""
+
+    def __init__(self, latency=0.1, chunks: int = 4, chunk_size: int = 1024, error_rate: float = 0.0):
+        self.latency = latency
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self.lookups = 0
+        self.text_to_speech = SimpleNamespace(convert=self._render, stream=self._render)
+        self.models = SimpleNamespace(list=self._list_models)
+
+    async def _list_models(self):
+        self.lookups += 1
+        return []
+
+    async def _render(self, text, voice_id, model_id, output_format):
+        self.calls += 1
+        latency = _sample(self.latency)
+        _maybe_fail(self, "elevenlabs")
+        for _ in range(self.chunks):
+            await asyncio.sleep(latency / self.chunks)
+            yield b"\xff" * self.chunk_size
+
+
+def install_stub_services(vision_latency=0.1, llm_latency=0.1, tts_latency=0.1, error_rate: float = 0.0):
+    """
+    Point the pipeline singletons at stubbed services, returns (gemini, grok, elevenlabs) stubs
+
+    Latencies are seconds or latency_from_spec() distributions, error_rate applies to every provider.
+    """
+    gemini = StubGemini(vision_latency, error_rate=error_rate)
+    grok = StubGrok(llm_latency, error_rate=error_rate)
+    elevenlabs = StubElevenLabs(tts_latency, error_rate=error_rate)
+    pipeline._vision_service = VisionService(client=gemini)
+    pipeline._llm_service = LlmService(client=grok)
+    # Stubs have no provider rate limits (test_limits.py covers the buckets)
+    limits._buckets.update({provider: None for provider in limits.DEFAULT_RATE_LIMIT})
+    # Every scenario learns provider latencies from scratch (no hedging before HEDGE_MIN_SAMPLES calls)
+    hedging._trackers.clear()
+    # No caching, every call pays the stub latency
+    pipeline._tts_service = TTSService(client=elevenlabs, cache=AudioCache(max_bytes=0))
+    pipeline._interjection_library = None
+    return gemini, grok, elevenlabs
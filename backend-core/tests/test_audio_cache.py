@@ -0,0 +1,97 @@
+"""
+Test the byte-budgeted TTS audio cache (no API keys needed)
+Run: python -m pytest tests/test_audio_cache.py  (or python tests/test_audio_cache.py)
+"""
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.audio_cache import AudioCache
+from app.services.interjections import INTERJECTIONS, InterjectionLibrary
+from app.services.tts import TTSService
+from stubs import StubElevenLabs
+
+
+def key(text: str) -> tuple:
+    return (text, "voice", "eleven_v3", "mp3_44100_128")
+
+
+def test_lru_eviction_by_bytes():
+    """Past the byte budget the least recently used clip goes first"""
+    cache = AudioCache(max_bytes=300)
+
+    async def scenario():
+        await cache.put(key("a"), b"a" * 100)
+        await cache.put(key("b"), b"b" * 100)
+        await cache.put(key("c"), b"c" * 100)
+        await cache.get(key("a"))                   # a is now most recently used
+        await cache.put(key("d"), b"d" * 100)       # evicts b
+        return [await cache.get(key(text)) is not None for text in "abcd"]
+
+    assert asyncio.run(scenario()) == [True, False, True, True]
+    assert cache.bytes == 300
+
+
+def test_disk_tier_survives_restart():
+    """A fresh cache on the same directory serves clips rendered by the previous one"""
+    with tempfile.TemporaryDirectory() as disk_dir:
+        asyncio.run(AudioCache(max_bytes=0, disk_dir=disk_dir).put(key("a"), b"mp3"))
+
+        restarted = AudioCache(max_bytes=1024, disk_dir=disk_dir)
+        assert asyncio.run(restarted.get(key("a"))) == b"mp3"
+        assert len(restarted) == 1      # promoted to memory
+
+
+def test_tts_reuses_cached_render():
+    """The same (text, voice) is only sent to ElevenLabs once, streamed or not"""
+    elevenlabs = StubElevenLabs(latency=0.01)
+    tts = TTSService(client=elevenlabs, cache=AudioCache(max_bytes=1024 * 1024))
+
+    async def scenario():
+        first = await tts.synthesize("[gasps] Oh!", voice_id="v1", voice_id_2=None)
+        second = await tts.synthesize("[gasps] Oh!", voice_id="v1", voice_id_2=None)
+        streamed = b"".join([chunk async for chunk in tts.stream("[gasps] Oh!", voice_id="v1", voice_id_2=None)])
+        return first, second, streamed
+
+    first, second, streamed = asyncio.run(scenario())
+    assert first == second == streamed
+    assert elevenlabs.calls == 1
+
+
+def test_workers_sharing_the_disk_tier_render_interjections_once():
+    """Workers warming at the same time: the first renders the clips, the others read them from disk"""
+    with tempfile.TemporaryDirectory() as disk_dir:
+        # One cache, client and library per worker process, all started before any clip is on disk
+        workers = []
+        for _ in range(3):
+            elevenlabs = StubElevenLabs(latency=0.05)
+            cache = AudioCache(max_bytes=1024 * 1024, disk_dir=disk_dir)
+            workers.append((elevenlabs, cache, InterjectionLibrary(TTSService(client=elevenlabs, cache=cache))))
+
+        async def warm(cache, library):
+            async with cache.exclusive("interjections"):
+                await library.warm("voice")
+
+        async def scenario():
+            await asyncio.gather(*(warm(cache, library) for _, cache, library in workers))
+
+        asyncio.run(scenario())
+        assert sum(elevenlabs.calls for elevenlabs, _, _ in workers) == len(INTERJECTIONS)
+        assert all(library.clip("voice") is not None for _, _, library in workers)
+
+
+if __name__ == "__main__":
+    tests = [test_lru_eviction_by_bytes, test_disk_tier_survives_restart, test_tts_reuses_cached_render,
+             test_workers_sharing_the_disk_tier_render_interjections_once]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
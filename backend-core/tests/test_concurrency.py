@@ -0,0 +1,99 @@
+"""
+Test that concurrent sessions don't stall each other (stub providers, no API keys needed)
+Run: python -m pytest tests/test_concurrency.py  (or python tests/test_concurrency.py)
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import limits
+from app.services.ingest import FrameQueue
+from app.services.pipeline import SessionPipeline
+from stubs import install_stub_services
+from test_pipeline import RecordingSink
+
+STAGE_LATENCY = 0.1
+SESSIONS = 8
+
+
+async def timed_frame(session_id: int) -> float:
+    """One session's pipeline from a frame to its audio"""
+    frames = FrameQueue(maxlen=1)
+    sink = RecordingSink(expected=1)
+    start = time.perf_counter()
+    frames.put((0, b"\xff\xd8jpeg", start))
+    runner = asyncio.create_task(SessionPipeline(str(session_id), {}, sink).run(frames))
+    await asyncio.wait_for(sink.done.wait(), timeout=5)
+    elapsed = time.perf_counter() - start
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    assert sink.events == [("audio", 0)], sink.events
+    return elapsed
+
+
+async def max_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Worst delay between when a timer should fire and when it does"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+def test_sessions_are_independent():
+    """N sessions in parallel each take about as long as one session alone"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+
+    async def scenario():
+        alone = await timed_frame(0)
+
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(max_loop_lag(stop))
+        together = await asyncio.gather(*(timed_frame(session_id) for session_id in range(1, SESSIONS + 1)))
+        stop.set()
+        return alone, together, await lag_task
+
+    alone, together, lag = asyncio.run(scenario())
+    assert max(together) < alone * 1.5, f"alone {alone:.2f}s, slowest of {SESSIONS} {max(together):.2f}s"
+    assert lag < 0.05, f"event loop stalled for {lag * 1000:.0f} ms"
+
+
+def test_provider_limit_caps_in_flight_calls():
+    """Calls past <PROVIDER>_MAX_CONCURRENCY wait for a slot instead of hitting the provider"""
+    limits._semaphores.clear()
+    os.environ["GROK_MAX_CONCURRENCY"] = "2"
+    try:
+        _, grok, _ = install_stub_services(0, STAGE_LATENCY, 0)
+        from app.services.pipeline import get_llm_service
+
+        async def scenario():
+            start = time.perf_counter()
+            await asyncio.gather(*(get_llm_service().generate_comment("scene") for _ in range(4)))
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(scenario())
+    finally:
+        del os.environ["GROK_MAX_CONCURRENCY"]
+        limits._semaphores.clear()
+
+    assert grok.calls == 4
+    assert elapsed >= STAGE_LATENCY * 2 * 0.9, f"4 calls through 2 slots took {elapsed:.2f}s"
+
+
+if __name__ == "__main__":
+    tests = [test_sessions_are_independent, test_provider_limit_caps_in_flight_calls]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,69 @@
+"""
+Test server-side frame normalization (no API keys needed)
+Run: python -m pytest tests/test_frames.py  (or python tests/test_frames.py)
+"""
+import asyncio
+import sys
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.frames import FrameNormalizer
+
+
+def make_capture(size=(2560, 1440), quality=95, exif=False) -> bytes:
+    """Busy full-resolution screen capture"""
+    image = Image.new("RGB", size, (20, 20, 30))
+    draw = ImageDraw.Draw(image)
+    for x in range(0, size[0], 40):
+        draw.line((x, 0, size[0] - x, size[1]), fill=(x % 255, 180, 90), width=3)
+    buffer = BytesIO()
+    extra = {}
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010E] = "captured by test"     # ImageDescription
+        extra["exif"] = metadata.tobytes()
+    image.save(buffer, format="JPEG", quality=quality, **extra)
+    return buffer.getvalue()
+
+
+def test_large_frame_is_bounded():
+    """Output fits max_dimension, keeps aspect ratio, and is much smaller"""
+    normalizer = FrameNormalizer(max_dimension=1280, quality=75)
+    original = make_capture(exif=True)
+
+    normalized = asyncio.run(normalizer.normalize(original))
+
+    with Image.open(BytesIO(normalized)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (1280, 720)
+        assert not image.getexif()
+    assert normalizer.bytes_saved == len(original) - len(normalized) > len(original) // 2
+
+
+def test_small_frame_is_not_upscaled():
+    normalized = asyncio.run(FrameNormalizer(max_dimension=1280).normalize(make_capture(size=(640, 360))))
+    with Image.open(BytesIO(normalized)) as image:
+        assert image.size == (640, 360)
+
+
+def test_disabled_or_undecodable_passes_through():
+    frame = make_capture(size=(320, 180))
+    assert asyncio.run(FrameNormalizer(max_dimension=0).normalize(frame)) is frame
+    assert asyncio.run(FrameNormalizer().normalize(b"not a jpeg")) == b"not a jpeg"
+
+
+if __name__ == "__main__":
+    tests = [test_large_frame_is_bounded, test_small_frame_is_not_upscaled, test_disabled_or_undecodable_passes_through]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,152 @@
+"""
+Test hedged provider calls, fallback and deadlines (stub providers, no API keys needed)
+Run: python -m pytest tests/test_hedging.py  (or python tests/test_hedging.py)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import hedging
+from app.services.audio_cache import AudioCache
+from app.services.hedging import LatencyTracker, hedged_call, hedged_stream
+from app.services.tts import MODEL_ID, TTSService
+
+
+def trained_tracker(provider: str, latency: float = 0.02, **kwargs) -> LatencyTracker:
+    """A tracker that has already seen enough calls to hedge at ~latency"""
+    tracker = LatencyTracker(min_samples=5, **kwargs)
+    for _ in range(5):
+        tracker.record(latency)
+    hedging._trackers[provider] = tracker
+    return tracker
+
+
+async def answer(value, delay: float):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def fail(delay: float = 0):
+    await asyncio.sleep(delay)
+    raise RuntimeError("provider down")
+
+
+def test_slow_primary_is_hedged():
+    """Past the learned tail latency the second attempt starts, and the first answer wins"""
+    trained_tracker("slow")
+
+    async def scenario():
+        start = time.perf_counter()
+        result = await hedged_call("slow", [lambda: answer("primary", 1.0), lambda: answer("hedge", 0.02)])
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == "hedge"
+    assert elapsed < 0.3, f"hedged call took {elapsed:.2f}s"
+
+
+def test_no_hedge_before_learning_or_over_budget():
+    hedging._trackers["cold"] = LatencyTracker(min_samples=5)
+    tracker = trained_tracker("thrifty", budget=0)
+
+    async def scenario():
+        cold = await hedged_call("cold", [lambda: answer("primary", 0.1), lambda: answer("hedge", 0)])
+        first = await hedged_call("thrifty", [lambda: answer("primary", 0.2), lambda: answer("hedge", 0)])
+        second = await hedged_call("thrifty", [lambda: answer("primary", 0.2), lambda: answer("hedge", 0)])
+        return cold, first, second
+
+    cold, first, second = asyncio.run(scenario())
+    assert cold == "primary"
+    # The starting allowance covers one hedge, with no budget the next call has to wait it out
+    assert (first, second) == ("hedge", "primary")
+    assert tracker.hedge_delay() is not None
+
+
+def test_failure_falls_back_and_deadline_gives_up():
+    hedging._trackers["flaky"] = LatencyTracker()
+    hedging._trackers["stuck"] = LatencyTracker(deadline=0.1)
+
+    async def scenario():
+        fallback = await hedged_call("flaky", [lambda: fail(), lambda: answer("fallback", 0)])
+        try:
+            await hedged_call("stuck", [lambda: answer("primary", 5)])
+        except TimeoutError:
+            return fallback, True
+        return fallback, False
+
+    fallback, timed_out = asyncio.run(scenario())
+    assert fallback == "fallback"
+    assert timed_out
+    try:
+        asyncio.run(hedged_call("flaky", [lambda: fail(), lambda: fail()]))
+        assert False, "expected the last failure"
+    except RuntimeError:
+        pass
+
+
+def test_stream_hedge_closes_the_loser():
+    trained_tracker("stream")
+    closed = []
+
+    async def tokens(name: str, first_delay: float):
+        try:
+            await asyncio.sleep(first_delay)
+            for i in range(3):
+                yield f"{name}{i}"
+        finally:
+            closed.append(name)
+
+    async def scenario():
+        stream = hedged_stream("stream", [lambda: tokens("slow", 1.0), lambda: tokens("fast", 0.01)])
+        return [token async for token in stream]
+
+    assert asyncio.run(scenario()) == ["fast0", "fast1", "fast2"]
+    assert sorted(closed) == ["fast", "slow"]
+
+
+def test_tts_falls_back_without_audio_tags():
+    """When v3 fails the fallback model renders, tags stripped, and the result isn't cached"""
+    hedging._trackers.pop("elevenlabs", None)
+    rendered = []
+
+    async def render(text, voice_id, model_id, output_format):
+        if model_id == MODEL_ID:
+            raise RuntimeError("v3 overloaded")
+        rendered.append((model_id, text))
+        yield b"\xff" * 16
+
+    client = SimpleNamespace(text_to_speech=SimpleNamespace(convert=render, stream=render))
+    tts = TTSService(client=client, cache=AudioCache(max_bytes=1024 * 1024))
+
+    async def scenario():
+        buffered = await tts.synthesize("[excited] What a play!", voice_id="v1", voice_id_2=None)
+        streamed = b"".join([chunk async for chunk in tts.stream("[excited] What a play!", voice_id="v1", voice_id_2=None)])
+        return buffered, streamed
+
+    buffered, streamed = asyncio.run(scenario())
+    assert buffered == streamed == b"\xff" * 16
+    assert rendered == [("eleven_flash_v2_5", "What a play!")] * 2
+    assert len(tts.cache) == 0
+
+
+if __name__ == "__main__":
+    tests = [
+        test_slow_primary_is_hedged,
+        test_no_hedge_before_learning_or_over_budget,
+        test_failure_falls_back_and_deadline_gives_up,
+        test_stream_hedge_closes_the_loser,
+        test_tts_falls_back_without_audio_tags,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
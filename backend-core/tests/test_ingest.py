@@ -0,0 +1,85 @@
+"""
+Test the latest-frame-wins ingest queue (no API keys needed)
+Run: python -m pytest tests/test_ingest.py  (or python tests/test_ingest.py)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.ingest import FrameQueue
+
+
+def test_latest_frame_wins():
+    """Only the newest frame survives while the pipeline is busy"""
+    queue = FrameQueue(maxlen=1)
+    for frame in ("f1", "f2", "f3"):
+        queue.put(frame)
+
+    assert asyncio.run(queue.get()) == "f3"
+    assert queue.received == 3
+    assert queue.dropped == 2
+    assert len(queue) == 0
+
+
+def test_ring_keeps_order():
+    """A larger ring hands out surviving frames oldest-first"""
+    async def drain():
+        queue = FrameQueue(maxlen=2)
+        for frame in ("f1", "f2", "f3"):
+            queue.put(frame)
+        return [await queue.get(), await queue.get()], queue.dropped
+
+    frames, dropped = asyncio.run(drain())
+    assert frames == ["f2", "f3"]
+    assert dropped == 1
+
+
+def test_get_waits_for_frame():
+    """get() blocks until the reader delivers a frame"""
+    async def scenario():
+        queue = FrameQueue()
+        waiter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        queue.put("f1")
+        return await asyncio.wait_for(waiter, timeout=1)
+
+    assert asyncio.run(scenario()) == "f1"
+
+
+def test_batch_takes_pending_and_late_frames():
+    """A batch is whatever is pending plus what arrives within the wait, up to the limit"""
+    async def scenario():
+        queue = FrameQueue(maxlen=4)
+        queue.put("f1")
+        queue.put("f2")
+        pending = await queue.get_batch(4)
+
+        queue.put("f3")
+        asyncio.get_running_loop().call_later(0.02, queue.put, "f4")
+        late = await queue.get_batch(4, wait=0.2)
+
+        for frame in ("f5", "f6", "f7"):
+            queue.put(frame)
+        limited = await queue.get_batch(2, wait=0.2)
+        return pending, late, limited, len(queue)
+
+    pending, late, limited, left = asyncio.run(scenario())
+    assert pending == ["f1", "f2"]
+    assert late == ["f3", "f4"]
+    assert limited == ["f5", "f6"] and left == 1
+
+
+if __name__ == "__main__":
+    tests = [test_latest_frame_wins, test_ring_keeps_order, test_get_waits_for_frame, test_batch_takes_pending_and_late_frames]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
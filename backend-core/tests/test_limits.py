@@ -0,0 +1,152 @@
+"""
+Test provider rate limits and global pipeline admission (stub providers, no API keys needed)
+Run: python -m pytest tests/test_limits.py  (or python tests/test_limits.py)
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import limits
+from app.services.ingest import FrameQueue
+from app.services.limits import Admission, TokenBucket
+from app.services.pipeline import SessionPipeline
+from stubs import install_stub_services
+from test_pipeline import RecordingSink
+
+
+def test_token_bucket_paces_bursts():
+    """Past the burst, calls are spaced 1/rate apart instead of all hitting the provider"""
+    bucket = TokenBucket(rate=20, burst=2)
+
+    async def scenario():
+        start = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        return time.perf_counter() - start, bucket.wait_time()
+
+    elapsed, backlog = asyncio.run(scenario())
+    assert 0.18 <= elapsed < 0.35, f"6 calls at 20/s with burst 2 took {elapsed:.2f}s"
+    assert backlog > 0      # Bucket is drained, the next caller would have to wait
+
+
+def test_admission_caps_runs():
+    admission = Admission(max_runs=2)
+    assert admission.try_enter() and admission.try_enter()
+    assert not admission.try_enter()
+    admission.leave()
+    assert admission.try_enter()
+    assert admission.rejected == 1
+
+
+def test_workers_split_the_configured_limits():
+    """N worker processes each get 1/N, so together they stay within the provider's limits"""
+    saved = {name: os.environ.get(name) for name in ("WEB_CONCURRENCY", "GEMINI_RATE_LIMIT", "GEMINI_BURST")}
+    os.environ.update({"WEB_CONCURRENCY": "4", "GEMINI_RATE_LIMIT": "10", "GEMINI_BURST": "20"})
+    limits._buckets.pop("gemini", None)
+    limits._admission = None
+    try:
+        bucket = limits.rate_bucket("gemini")
+        assert (bucket.rate, bucket.burst) == (2.5, 5)
+        assert limits.max_concurrency("gemini") == limits.DEFAULT_MAX_CONCURRENCY["gemini"] // 4
+        assert limits.pipeline_admission().max_runs == 32 // 4
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        limits._buckets.pop("gemini", None)
+        limits._admission = None
+
+
+def test_thin_per_worker_shares_are_reported():
+    """Too many workers for the configured limits is flagged at startup"""
+    saved = os.environ.get("WEB_CONCURRENCY")
+    try:
+        os.environ["WEB_CONCURRENCY"] = "2"
+        assert limits.thin_shares() == []
+        os.environ["WEB_CONCURRENCY"] = "8"
+        assert "ELEVENLABS_MAX_CONCURRENCY=8 over 8 workers leaves 1 per worker" in limits.thin_shares()
+    finally:
+        if saved is None:
+            os.environ.pop("WEB_CONCURRENCY", None)
+        else:
+            os.environ["WEB_CONCURRENCY"] = saved
+
+
+def run_one_frame(sink: RecordingSink) -> None:
+    async def scenario():
+        frames = FrameQueue(maxlen=1)
+        frames.put((0, b"\xff\xd8jpeg", time.perf_counter()))
+        runner = asyncio.create_task(SessionPipeline("test", {}, sink).run(frames))
+        await asyncio.wait_for(sink.done.wait(), timeout=5)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_full_server_throttles_instead_of_queueing():
+    """With every pipeline slot taken, a new frame gets a throttle message right away"""
+    install_stub_services(0, 0, 0)
+    limits._admission = Admission(max_runs=1)
+    limits._admission.try_enter()     # Another session holds the only slot
+    try:
+        sink = RecordingSink(expected=1)
+        run_one_frame(sink)
+    finally:
+        limits._admission = None
+
+    assert sink.events == [("throttle", 0, "server_busy")]
+
+
+def test_provider_backlog_throttles():
+    """A provider bucket deep in debt turns new frames away with its expected wait"""
+    install_stub_services(0, 0, 0)
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket._tokens = -5                 # Five calls already queued for a 1/s provider
+    limits._buckets["gemini"] = bucket
+    limits._admission = Admission(max_runs=4)
+    try:
+        sink = RecordingSink(expected=1)
+        run_one_frame(sink)
+        active = limits._admission.active
+    finally:
+        limits._buckets.pop("gemini", None)
+        limits._admission = None
+
+    assert sink.events == [("throttle", 0, "provider_rate_limit")]
+    assert active == 0      # Refused frames never hold a slot
+
+
+def test_slots_are_released():
+    """Every admitted frame gives its slot back, whether it finishes or the session ends"""
+    install_stub_services(0, 0, 0)
+    limits._admission = Admission(max_runs=4)
+    try:
+        sink = RecordingSink(expected=1)
+        run_one_frame(sink)
+        active = limits._admission.active
+    finally:
+        limits._admission = None
+
+    assert sink.events[-1] == ("audio", 0)
+    assert active == 0
+
+
+if __name__ == "__main__":
+    tests = [test_token_bucket_paces_bursts, test_admission_caps_runs, test_workers_split_the_configured_limits,
+             test_thin_per_worker_shares_are_reported, test_full_server_throttles_instead_of_queueing,
+             test_provider_backlog_throttles, test_slots_are_released]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,114 @@
+"""
+Test LlmService commentary streaming against a stub Grok client (no API keys needed)
+Run: python -m pytest tests/test_llm.py  (or python tests/test_llm.py)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import limits, sessions
+from app.services.llm import LlmService
+from app.services.sessions import SessionStore
+from stubs import StubGrok
+
+
+def collect(content: str, dual_speaker: bool) -> list[tuple[int, str]]:
+    service = LlmService(client=StubGrok(latency=0.01, content=content))
+
+    async def run():
+        return [segment async for segment in service.stream_comment("scene", dual_speaker=dual_speaker)]
+
+    return asyncio.run(run())
+
+
+def test_dual_speaker_splits_on_delimiter():
+    """Speaker 1 ends at the first " | ", everything after belongs to speaker 2"""
+    segments = collect("[excited] What a push! | [analytical] Smart. | Very smart.", dual_speaker=True)
+    assert segments == [(0, "[excited] What a push!"), (1, "[analytical] Smart. | Very smart.")]
+
+
+def test_dual_speaker_without_delimiter():
+    """A completion missing the delimiter is spoken by speaker 1, like tts._split_speakers"""
+    assert collect("[excited] What a push!", dual_speaker=True) == [(0, "[excited] What a push!")]
+
+
+def test_single_speaker_splits_sentences():
+    """Single-speaker commentary is released one sentence at a time"""
+    segments = collect("[excited] Huge fight! They wiped the backline. Overtime", dual_speaker=False)
+    assert segments == [(0, "[excited] Huge fight!"), (0, "They wiped the backline."), (0, "Overtime")]
+
+
+def test_grok_slot_is_released_while_the_consumer_is_still_busy():
+    """A consumer waiting on TTS for the previous frame doesn't keep holding Grok concurrency"""
+    limits._semaphores.clear()
+    service = LlmService(client=StubGrok(latency=0.05, content="[excited] What a push! | [analytical] Textbook."))
+
+    async def run():
+        segments = service.stream_comment("scene", dual_speaker=True)
+        first = await anext(segments)
+        await asyncio.sleep(0.2)    # Stuck behind a slow TTS stage, the completion has long finished
+        free = limits._semaphores["grok"]._value
+        rest = [segment async for segment in segments]
+        return first, free, rest
+
+    first, free, rest = asyncio.run(run())
+    limits._semaphores.clear()
+
+    assert first == (0, "[excited] What a push!") and rest == [(1, "[analytical] Textbook.")]
+    assert free == limits.max_concurrency("grok"), "slot still held after Grok finished"
+
+
+def comment_frames(store: SessionStore, count: int) -> StubGrok:
+    """Comment on `count` frames of session 5, returns the stub with every prompt it was sent"""
+    grok = StubGrok(latency=0, content="[excited] What a push! | [analytical] Textbook.")
+    service = LlmService(client=grok)
+    sessions._store = store
+
+    async def run():
+        await store.open(5, {}, "binary", True)
+        for i in range(count):
+            async for _ in service.stream_comment(f"scene {i}", dual_speaker=True, session_id=5):
+                pass
+
+    try:
+        asyncio.run(run())
+    finally:
+        sessions._store = None
+    return grok
+
+
+def test_session_prompts_only_grow_at_the_end():
+    """Each frame's prompt starts with the whole previous prompt, so the provider's prefix cache keeps hitting"""
+    grok = comment_frames(SessionStore(context_turns=6), 4)
+
+    for previous, current in zip(grok.prompts, grok.prompts[1:]):
+        assert current[:len(previous)] == previous
+        assert len(current) == len(previous) + 2     # Its own answer, then the new frame
+    assert "scene 0" in str(grok.prompts[-1][1]) and "scene 3" in str(grok.prompts[-1][-1])
+
+
+def test_context_is_compacted_into_a_recap():
+    store = SessionStore(context_turns=4)
+    grok = comment_frames(store, 5)
+
+    recap, turns = store.commentary(5)
+    # Turn 5 overflowed the window: the oldest three went into the recap, the newest two stayed verbatim
+    assert [description for description, _ in turns] == ["scene 3", "scene 4"]
+    assert recap.count("What a push!") == 3
+    assert len(grok.prompts[-1]) == 1 + 2 * 4 + 1
+
+
+if __name__ == "__main__":
+    tests = [test_dual_speaker_splits_on_delimiter, test_dual_speaker_without_delimiter, test_single_speaker_splits_sentences,
+             test_grok_slot_is_released_while_the_consumer_is_still_busy, test_session_prompts_only_grow_at_the_end, test_context_is_compacted_into_a_recap]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,58 @@
+"""
+Smoke test the offline load harness at a small scale (stub providers, no API keys or network needed)
+Run: python -m pytest tests/test_load.py  (or python tests/test_load.py)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from load_test import parse_args, percentile, run_load
+from stubs import latency_from_spec
+
+
+def small_run(*extra: str) -> dict:
+    args = parse_args([
+        "--clients", "4", "--fps", "2", "--duration", "2", "--drain", "2", "--in-process",
+        "--vision", "uniform:0.05,0.1", "--llm", "0.05", "--tts", "0.05", "--frame-size", "640x360", *extra
+    ])
+    return asyncio.run(run_load(args))
+
+
+def test_latency_specs():
+    assert latency_from_spec("0.3") == 0.3
+    sample = latency_from_spec("uniform:0.2,0.4")
+    assert all(0.2 <= sample() <= 0.4 for _ in range(100))
+    assert latency_from_spec("lognormal:0.5,0")() == 0.5
+    assert percentile([3, 1, 2, 4], 50) == 2 and percentile([3, 1, 2, 4], 99) == 4
+
+
+def test_clients_get_commentary():
+    report = small_run()
+    assert report["frames_sent"] >= 12
+    assert report["clips"] > 0 and report["disconnects"] == 0
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    assert {"vision", "llm", "tts", "send"} <= set(report["stage_ms"])
+
+
+def test_provider_errors_end_sessions():
+    """A failed provider call closes the session, the client notices and reconnects"""
+    report = small_run("--error-rate", "1")
+    assert report["provider_errors"] > 0
+    assert report["disconnects"] > 0
+    assert report["clips"] == 0
+
+
+if __name__ == "__main__":
+    tests = [test_latency_specs, test_clients_get_commentary, test_provider_errors_end_sessions]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,185 @@
+"""
+Test content-addressed media archival (local directory stand-in for S3, SQLite for MySQL)
+Run: python -m pytest tests/test_media.py  (or python tests/test_media.py)
+"""
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.media import LocalMediaStore, MediaArchive, S3MediaStore, media_key, store_from_url
+from app.services.persistence import CommentaryWriter, SqliteCommentaryBackend
+
+
+class FlakyStore(LocalMediaStore):
+    """Local store whose first puts fail"""
+
+    def __init__(self, root: str, failures: int):
+        super().__init__(root)
+        self.failures = failures
+        self.puts = []
+
+    def put_if_absent(self, key, data, content_type):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("store unavailable")
+        self.puts.append(key)
+        return super().put_if_absent(key, data, content_type)
+
+
+class S3Error(Exception):
+    """botocore ClientError look-alike: the error code is in .response"""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3:
+    """The boto3 S3 client calls S3MediaStore makes, objects kept in a dict"""
+
+    def __init__(self):
+        self.objects = {}   # {(bucket, key): body}
+        self.puts = 0
+
+    def head_object(self, Bucket, Key):
+        # Without s3:ListBucket a missing key is 403, never 404
+        raise S3Error("403")
+
+    def put_object(self, Bucket, Key, Body, ContentType, IfNoneMatch=None):
+        if IfNoneMatch == "*" and (Bucket, Key) in self.objects:
+            raise S3Error("PreconditionFailed")
+        self.objects[(Bucket, Key)] = Body
+        self.puts += 1
+        return {}
+
+
+async def archive_and_write(media: MediaArchive, writer: CommentaryWriter):
+    """Everything queued so far: uploaded, then its rows written"""
+    while len(media):
+        await media.upload_batch()
+    await writer.close()
+
+
+def query(path: str, sql: str) -> list[tuple]:
+    with sqlite3.connect(path) as connection:
+        return connection.execute(sql).fetchall()
+
+
+def test_repeated_media_is_stored_once_and_rows_carry_its_keys():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = f"{tmp}/commentaries.db"
+        store = FlakyStore(f"{tmp}/media", failures=0)
+        writer = CommentaryWriter(SqliteCommentaryBackend(db))
+        media = MediaArchive(store, writer, batch_size=2, rate=0)
+
+        clip, frame = b"ID3 mp3 clip", b"\xff\xd8jpeg"
+        media.add(5, "grok-4-fast", "scene 1", "comment 1", audio=clip, keyframe=frame)
+        media.add(5, "grok-4-fast", "scene 2", "comment 2", audio=clip)
+        media.add(5, "grok-4-fast", "scene 3", "comment 3", audio=clip)
+        asyncio.run(archive_and_write(media, writer))
+
+        audio_key = media_key("audio", clip)
+        assert audio_key.startswith("audio/") and audio_key.endswith(".mp3")
+        assert sorted(store.puts) == sorted([audio_key, media_key("frame", frame)])
+        assert (Path(tmp) / "media" / audio_key).read_bytes() == clip
+        assert media.uploaded == 2 and media.deduplicated >= 2
+
+        rows = query(db, "SELECT commentary_text, audio_url FROM commentaries ORDER BY id")
+        assert [text for text, _ in rows] == ["comment 1", "comment 2", "comment 3"]
+        assert {url for _, url in rows} == {store.url(audio_key)}
+        assert query(db, "SELECT session_id, frame_s3_key FROM frame_uploads") == [(5, media_key("frame", frame))]
+
+
+def test_rows_point_at_the_objects_under_the_bucket_prefix():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = f"{tmp}/commentaries.db"
+        s3 = FakeS3()
+        store = S3MediaStore("nexcast-media", "archive/", client=s3)
+        writer = CommentaryWriter(SqliteCommentaryBackend(db))
+        media = MediaArchive(store, writer, rate=0)
+
+        clip, frame = b"ID3 mp3 clip", b"\xff\xd8jpeg"
+        media.add(3, "grok-4-fast", "scene", "comment", audio=clip, keyframe=frame)
+        asyncio.run(archive_and_write(media, writer))
+
+        audio_key, frame_key = f"archive/{media_key('audio', clip)}", f"archive/{media_key('frame', frame)}"
+        assert set(s3.objects) == {("nexcast-media", audio_key), ("nexcast-media", frame_key)}
+        assert query(db, "SELECT audio_url FROM commentaries") == [(f"s3://nexcast-media/{audio_key}",)]
+        assert query(db, "SELECT frame_s3_key FROM frame_uploads") == [(frame_key,)]
+
+
+def test_s3_store_needs_only_put_permission():
+    """Existing objects are detected by the conditional put (412), no HEAD (403 without s3:ListBucket)"""
+    s3 = FakeS3()
+    store = S3MediaStore("nexcast-media", client=s3)
+    assert store.put_if_absent("audio/abc.mp3", b"clip", "audio/mpeg") is True
+    assert store.put_if_absent("audio/abc.mp3", b"clip", "audio/mpeg") is False
+    assert s3.puts == 1
+
+
+def test_failed_uploads_retry_then_write_without_media():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = f"{tmp}/commentaries.db"
+        writer = CommentaryWriter(SqliteCommentaryBackend(db))
+        media = MediaArchive(FlakyStore(f"{tmp}/media", failures=1), writer, rate=0, max_attempts=2)
+        media.add(1, "grok-4-fast", "scene", "retried", audio=b"clip a")
+        asyncio.run(archive_and_write(media, writer))
+        assert query(db, "SELECT audio_url IS NOT NULL FROM commentaries") == [(1,)], "second attempt stored it"
+
+        media = MediaArchive(FlakyStore(f"{tmp}/media", failures=5), writer, rate=0, max_attempts=2)
+        media.add(1, "grok-4-fast", "scene", "given up", audio=b"clip b")
+        asyncio.run(archive_and_write(media, writer))
+        assert query(db, "SELECT commentary_text, audio_url FROM commentaries WHERE id = 2") == [("given up", None)]
+
+
+def test_queue_is_bounded_and_uploads_are_rate_limited():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = f"{tmp}/commentaries.db"
+        writer = CommentaryWriter(SqliteCommentaryBackend(db))
+        media = MediaArchive(LocalMediaStore(f"{tmp}/media"), writer, batch_size=10, rate=20, burst=1, max_pending=4)
+        for i in range(6):
+            media.add(1, "grok-4-fast", f"scene {i}", f"comment {i}", audio=f"clip {i}".encode())
+        assert len(media) == 4 and media.dropped == 2
+
+        started = time.perf_counter()
+        asyncio.run(archive_and_write(media, writer))
+        assert time.perf_counter() - started >= 3 / 20, "4 uploads at 20/s with a burst of 1"
+
+        rows = query(db, "SELECT commentary_text, audio_url IS NOT NULL FROM commentaries ORDER BY id")
+        # Dropped commentaries are still recorded, just without audio
+        assert rows == [("comment 0", 0), ("comment 1", 0)] + [(f"comment {i}", 1) for i in range(2, 6)]
+
+
+def test_store_from_url():
+    assert store_from_url("") is None
+    assert isinstance(store_from_url("file:///tmp/media"), LocalMediaStore)
+    try:
+        store_from_url("ftp://host/media")
+        assert False, "unsupported scheme accepted"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    tests = [
+        test_repeated_media_is_stored_once_and_rows_carry_its_keys,
+        test_rows_point_at_the_objects_under_the_bucket_prefix,
+        test_s3_store_needs_only_put_permission,
+        test_failed_uploads_retry_then_write_without_media,
+        test_queue_is_bounded_and_uploads_are_rate_limited,
+        test_store_from_url,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,153 @@
+"""
+Test pipeline metrics, the /metrics endpoint and session trace logs (stub providers, no API keys needed)
+Run: python -m pytest tests/test_metrics.py  (or python tests/test_metrics.py)
+"""
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.services import pipeline
+from app.services.ingest import FrameQueue
+from app.services.metrics import SessionTrace
+from app.services.pipeline import SessionPipeline
+from app.services.sessions import SessionStore
+from app.services.workers import POOL_THREAD, WorkerPool
+from stubs import install_stub_services
+from test_pipeline import RecordingSink, run_frames
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stage_histograms_and_counters():
+    """Every processed frame lands in the vision/llm/tts histograms and the processed counter"""
+    install_stub_services(vision_latency=0.02, llm_latency=0.02, tts_latency=0.02)
+    stages = ("vision", "llm", "tts")
+    before = {stage: sample("nexcast_stage_seconds_count", stage=stage) for stage in stages}
+    processed = sample("nexcast_frames_total", outcome="processed")
+    first_audio = sample("nexcast_time_to_first_audio_seconds_count")
+
+    asyncio.run(run_frames(stream_audio=True, count=3))
+
+    for stage in stages:
+        assert sample("nexcast_stage_seconds_count", stage=stage) - before[stage] == 3, stage
+    assert sample("nexcast_stage_seconds_sum", stage="vision") > 0
+    assert sample("nexcast_frames_total", outcome="processed") - processed == 3
+    assert sample("nexcast_time_to_first_audio_seconds_count") - first_audio == 3
+    assert sample("nexcast_pipelines_in_flight") == 0
+
+
+def test_stage_failure_is_counted():
+    install_stub_services()
+
+    class BrokenVision:
+        async def analyze_with_context(self, frame, session_id, earlier=(), span=0.0):
+            raise RuntimeError("vision is down")
+
+    pipeline._vision_service = BrokenVision()
+    errors = sample("nexcast_errors_total", stage="vision")
+
+    async def scenario():
+        frames = FrameQueue()
+        frames.put((0, b"\xff\xd8jpeg", time.perf_counter()))
+        try:
+            await SessionPipeline("test", {}, RecordingSink(expected=1)).run(frames)
+        except RuntimeError:
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+    assert sample("nexcast_errors_total", stage="vision") - errors == 1
+    assert sample("nexcast_pipelines_in_flight") == 0
+
+
+def test_trace_logs_are_json_lines():
+    trace = SessionTrace(7, trace_id="abc123", enabled=True)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        trace.stage("vision", 4, 0.25)
+        SessionTrace(7, enabled=False).event("ignored")
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1
+    event = json.loads(lines[0])
+    assert event["trace_id"] == "abc123" and event["session_id"] == 7
+    assert event["stage"] == "vision" and event["seq"] == 4 and event["ms"] == 250.0
+
+
+def test_worker_pool_metrics():
+    """CPU pool calls show up as wait/run latency, and the queue drains back to zero"""
+    pool = WorkerPool(POOL_THREAD, max_workers=1)
+    runs = sample("nexcast_worker_task_seconds_count", pool="thread", phase="run")
+
+    async def scenario():
+        await asyncio.gather(*(pool.run(sum, range(1000)) for _ in range(3)))
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert sample("nexcast_worker_task_seconds_count", pool="thread", phase="run") - runs == 3
+    assert sample("nexcast_worker_queue_depth", pool="thread") == 0
+
+
+def test_session_store_gauges():
+    """The store's record count and size follow opens, closes and evictions"""
+    store = SessionStore(ttl=0.05)
+    evicted = sample("nexcast_sessions_evicted_total")
+
+    async def scenario():
+        kept = await store.open(1, {}, "json", False)
+        await store.open(2, {}, "json", False)
+        assert sample("nexcast_session_records") == 2
+        assert sample("nexcast_session_store_bytes") == store.bytes > 0
+        time.sleep(0.1)
+        store.sweep()
+        assert sample("nexcast_session_records") == 0
+        store.touch(kept)
+        store.close(kept)
+
+    asyncio.run(scenario())
+
+    assert sample("nexcast_sessions_evicted_total") - evicted == 2
+    assert sample("nexcast_session_records") == 0 and sample("nexcast_session_store_bytes") == 0
+
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "nexcast_stage_seconds_bucket" in response.text
+    assert "nexcast_active_sessions" in response.text
+
+
+if __name__ == "__main__":
+    tests = [
+        test_stage_histograms_and_counters,
+        test_stage_failure_is_counted,
+        test_trace_logs_are_json_lines,
+        test_worker_pool_metrics,
+        test_session_store_gauges,
+        test_metrics_endpoint,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,55 @@
+"""
+Test capture pacing (rate hints from pipeline latency and frame drops)
+Run: python -m pytest tests/test_pacing.py  (or python tests/test_pacing.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.pacing import CapturePacer
+
+
+def test_interval_follows_the_slowest_latency():
+    pacer = CapturePacer(min_interval=0.5, max_interval=30, headroom=1.2)
+    assert pacer.recommend(dropped=0) is None, "no hint before anything was measured"
+
+    pacer.observe("vision", 0.8)
+    pacer.observe("first_audio", 2.0)
+    interval, reason = pacer.recommend(dropped=0)
+    assert reason == "pipeline_latency"
+    assert abs(interval - 2.4) < 1e-9
+
+    # Small wobble: the client is left alone
+    pacer.observe("first_audio", 2.1)
+    assert pacer.recommend(dropped=0) is None
+
+
+def test_drops_back_off_and_limits_hold():
+    pacer = CapturePacer(min_interval=1, max_interval=5, headroom=1.0)
+    pacer.observe("tts", 2.0)
+    assert pacer.recommend(dropped=0) == (2.0, "pipeline_latency")
+
+    interval, reason = pacer.recommend(dropped=3)
+    assert reason == "frames_dropped" and interval == 3.0
+
+    for dropped in range(4, 10):
+        pacer.recommend(dropped=dropped)
+    assert 3.0 < pacer.interval <= 5, "backs off further, never slower than max_interval"
+
+    fast = CapturePacer(min_interval=1, max_interval=5)
+    fast.observe("vision", 0.1)
+    assert fast.recommend(dropped=0)[0] == 1, "never faster than min_interval"
+
+
+if __name__ == "__main__":
+    tests = [test_interval_follows_the_slowest_latency, test_drops_back_off_and_limits_hold]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
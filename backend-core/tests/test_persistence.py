@@ -0,0 +1,202 @@
+"""
+Test write-behind commentary persistence (SQLite stand-in for MySQL)
+Run: python -m pytest tests/test_persistence.py  (or python tests/test_persistence.py)
+"""
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.persistence import CommentaryWriter, SqliteCommentaryBackend, backend_from_url
+
+
+class CountingBackend(SqliteCommentaryBackend):
+    """SQLite backend that counts INSERT statements and can fail on demand (on any table, or just fail_table)"""
+
+    def __init__(self, path: str, failures: int = 0, fail_table: str | None = None):
+        super().__init__(path)
+        self.statements = 0
+        self.failures = failures
+        self.fail_table = fail_table
+
+    def _insert(self, connection, table, rows):
+        if self.failures and self.fail_table in (None, table):
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.statements += 1
+        super()._insert(connection, table, rows)
+
+
+class SlowBackend(SqliteCommentaryBackend):
+    """SQLite backend whose writes take a while, like MySQL under load"""
+
+    def write_batch(self, by_table):
+        time.sleep(0.2)
+        super().write_batch(by_table)
+
+
+def rows_in(path: str) -> list[tuple]:
+    with sqlite3.connect(path) as connection:
+        return connection.execute(
+            "SELECT session_id, commentator_model, scene_description, commentary_text FROM commentaries ORDER BY id"
+        ).fetchall()
+
+
+async def run_writer(writer: CommentaryWriter, until, timeout: float = 5):
+    flusher = asyncio.create_task(writer.run())
+    give_up = time.perf_counter() + timeout
+    while not until() and time.perf_counter() < give_up:
+        await asyncio.sleep(0.01)
+    flusher.cancel()
+    await asyncio.gather(flusher, return_exceptions=True)
+
+
+def test_full_batches_go_out_as_one_insert_each():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/commentaries.db"
+        backend = CountingBackend(path)
+        writer = CommentaryWriter(backend, batch_size=10, flush_interval=60)
+
+        async def scenario():
+            started = time.perf_counter()
+            for i in range(25):
+                assert writer.add(7, "grok-4-fast", f"scene {i}", f"comment {i}")
+            assert time.perf_counter() - started < 0.05, "add() never waits on the database"
+            await run_writer(writer, lambda: writer.written >= 20)
+            await writer.close()
+
+        asyncio.run(scenario())
+
+        assert rows_in(path) == [(7, "grok-4-fast", f"scene {i}", f"comment {i}") for i in range(25)]
+        assert backend.statements == 3, "two full batches, then the rest at shutdown"
+        assert len(writer) == 0
+
+
+def test_session_commentary_count_follows_writes():
+    """Each batch adds its rows to the sessions' commentary_count (what /history/list reads)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/commentaries.db"
+        backend = SqliteCommentaryBackend(path)
+        with backend._connection() as connection:
+            connection.executemany("INSERT INTO sessions (id) VALUES (?)", [(1,), (2,)])
+        writer = CommentaryWriter(backend, batch_size=4)
+        for session_id in (1, 2, 1, 1, 2, 1):
+            writer.add(session_id, "grok-4-fast", "scene", "comment")
+
+        asyncio.run(writer.close())
+
+        with sqlite3.connect(path) as connection:
+            counts = connection.execute("SELECT id, commentary_count FROM sessions ORDER BY id").fetchall()
+        assert counts == [(1, 4), (2, 2)]
+
+
+def test_partial_batch_flushes_after_interval():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/commentaries.db"
+        writer = CommentaryWriter(SqliteCommentaryBackend(path), batch_size=100, flush_interval=0.1)
+        writer.add("12", "grok-4-fast", "scene", "comment")
+        assert not writer.add("test", "grok-4-fast", "scene", "no database session"), "non-numeric IDs aren't queued"
+
+        started = time.perf_counter()
+        asyncio.run(run_writer(writer, lambda: writer.written == 1))
+
+        assert 0.05 < time.perf_counter() - started < 2
+        assert rows_in(path) == [(12, "grok-4-fast", "scene", "comment")]
+
+
+def test_failed_writes_are_retried_and_memory_stays_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/commentaries.db"
+        backend = CountingBackend(path, failures=1)
+        writer = CommentaryWriter(backend, batch_size=5, flush_interval=0.05, max_pending=5)
+        for i in range(8):
+            writer.add(1, "grok-4-fast", f"scene {i}", f"comment {i}")
+
+        assert len(writer) == 5 and writer.dropped == 3, "oldest rows dropped past max_pending"
+        asyncio.run(run_writer(writer, lambda: writer.written == 5))
+
+        assert writer.failures == 1
+        assert [row[3] for row in rows_in(path)] == [f"comment {i}" for i in range(3, 8)]
+
+
+def test_failed_batch_leaves_nothing_behind():
+    """A batch fails as a whole: the retry doesn't duplicate the tables written before the failure"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/commentaries.db"
+        backend = CountingBackend(path, failures=1, fail_table="frame_uploads")
+        with backend._connection() as connection:
+            connection.execute("INSERT INTO sessions (id) VALUES (1)")
+        writer = CommentaryWriter(backend, batch_size=10)
+        writer.add(1, "grok-4-fast", "scene", "comment")
+        writer.add_frame(1, "frames/abc.jpg")
+
+        async def scenario():
+            assert not await writer.flush_batch()
+            assert await writer.flush_batch()
+
+        asyncio.run(scenario())
+
+        with sqlite3.connect(path) as connection:
+            assert connection.execute("SELECT commentary_count FROM sessions").fetchall() == [(1,)]
+            assert connection.execute("SELECT COUNT(*) FROM frame_uploads").fetchone() == (1,)
+        assert len(rows_in(path)) == 1
+
+
+def test_shutdown_during_a_write_writes_nothing_twice():
+    """Cancelling the flusher can't stop a write in its thread: close() must not take the same rows again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/commentaries.db"
+        backend = SlowBackend(path)
+        with backend._connection() as connection:
+            connection.execute("INSERT INTO sessions (id) VALUES (1)")
+        writer = CommentaryWriter(backend, batch_size=10, flush_interval=0)
+
+        async def scenario():
+            writer.add(1, "grok-4-fast", "scene 1", "comment 1")
+            writer.add(1, "grok-4-fast", "scene 2", "comment 2")
+            flusher = asyncio.create_task(writer.run())
+            await asyncio.sleep(0.05)     # Write under way in its thread
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            await writer.close()
+
+        asyncio.run(scenario())
+
+        assert [row[3] for row in rows_in(path)] == ["comment 1", "comment 2"]
+        with sqlite3.connect(path) as connection:
+            assert connection.execute("SELECT commentary_count FROM sessions").fetchall() == [(2,)]
+
+
+def test_backend_from_url():
+    assert backend_from_url("") is None
+    assert isinstance(backend_from_url("sqlite:///tmp/commentaries.db"), SqliteCommentaryBackend)
+    try:
+        backend_from_url("postgres://db/nexcast")
+        assert False, "unsupported scheme accepted"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    tests = [
+        test_full_batches_go_out_as_one_insert_each,
+        test_session_commentary_count_follows_writes,
+        test_partial_batch_flushes_after_interval,
+        test_failed_writes_are_retried_and_memory_stays_bounded,
+        test_failed_batch_leaves_nothing_behind,
+        test_shutdown_during_a_write_writes_nothing_twice,
+        test_backend_from_url,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,291 @@
+"""
+Test the staged per-session pipeline (stub providers, no API keys needed)
+Run: python -m pytest tests/test_pipeline.py  (or python tests/test_pipeline.py)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import hedging, limits, pipeline
+from app.services.ingest import FrameQueue
+from app.services.pacing import CapturePacer
+from app.services.pipeline import SessionPipeline
+from stubs import install_stub_services
+
+STAGE_LATENCY = 0.1
+FRAMES = 6
+
+
+class RecordingSink:
+    """Collects what the pipeline would send to the socket"""
+
+    def __init__(self, expected: int):
+        self.events = []
+        self.stats = []
+        self.first_chunk_at = None
+        self._expected = expected
+        self.done = asyncio.Event()
+
+    def _record(self, event):
+        self.events.append(event)
+        if sum(1 for e in self.events if e[0] in ("audio", "audio_end", "skipped", "throttle", "abandoned")) >= self._expected:
+            self.done.set()
+
+    async def skipped(self, seq, distance, frames_skipped):
+        self._record(("skipped", seq))
+
+    async def throttle(self, seq, reason, retry_after_ms):
+        self._record(("throttle", seq, reason))
+
+    async def audio(self, seq, audio):
+        self._record(("audio", seq))
+
+    async def audio_chunk(self, seq, index, chunk):
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.perf_counter()
+        self._record(("audio_chunk", seq, index))
+
+    async def audio_end(self, seq, stats):
+        self.stats.append(stats)
+        self._record(("audio_end", seq))
+
+    async def abandoned(self, seq, reason, saved_ms):
+        self._record(("abandoned", seq, reason))
+
+    async def rate_hint(self, interval_ms, reason):
+        self.events.append(("rate_hint", interval_ms, reason))
+
+
+async def run_frames(
+    stream_audio: bool,
+    count: int = FRAMES,
+    expected: int | None = None,
+    **options
+) -> tuple[RecordingSink, float]:
+    frames = FrameQueue(maxlen=count)
+    sink = RecordingSink(expected=count if expected is None else expected)
+    pipeline = SessionPipeline("test", {"speaker2_voice_id": "v2"}, sink, stream_audio=stream_audio, **options)
+    for seq in range(count):
+        frames.put((seq, b"\xff\xd8jpeg", time.perf_counter()))
+
+    start = time.perf_counter()
+    runner = asyncio.create_task(pipeline.run(frames))
+    await asyncio.wait_for(sink.done.wait(), timeout=10)
+    elapsed = time.perf_counter() - start
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    return sink, elapsed
+
+
+def test_stages_overlap_and_keep_order():
+    """Throughput is bounded by the slowest stage, not the sum of all three"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+
+    sink, elapsed = asyncio.run(run_frames(stream_audio=False))
+
+    assert sink.events ==[("audio", seq) for seq in range(FRAMES)]
+    sequential = FRAMES * 3 * STAGE_LATENCY
+    pipelined = (FRAMES + 2) * STAGE_LATENCY
+    assert elapsed < (sequential + pipelined) / 2, f"{FRAMES} frames took {elapsed:.2f}s"
+
+
+def test_streaming_mode_keeps_order():
+    """Chunks of one clip never interleave with the next clip"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+
+    sink, _ = asyncio.run(run_frames(stream_audio=True))
+
+    seqs = [event[1] for event in sink.events]
+    assert seqs == sorted(seqs)
+    assert [event for event in sink.events if event[0] == "audio_end"] == [("audio_end", seq) for seq in range(FRAMES)]
+
+
+def test_speaker1_audio_starts_before_llm_finishes():
+    """TTS for speaker 1 starts at the " | " delimiter, not after the whole completion"""
+    limits._semaphores.clear()
+    llm_latency = 0.4
+    install_stub_services(STAGE_LATENCY, llm_latency, STAGE_LATENCY)
+
+    sink, _ = asyncio.run(run_frames(stream_audio=True, count=1))
+
+    first_audio = sink.stats[0]["time_to_first_audio_ms"] / 1000
+    assert first_audio < STAGE_LATENCY + llm_latency, f"first audio after {first_audio:.2f}s"
+
+
+class BigChangeGate:
+    """Scene gate that reports every frame as a completely new scene"""
+    skipped = 0
+
+    async def check(self, frame):
+        return True, 64, None
+
+    def commit(self, frame_hash):
+        pass
+
+
+def test_interjection_leads_an_idle_big_change():
+    """A big scene change on an idle session starts its clip with a ready interjection"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+
+    async def scenario():
+        library = pipeline.get_interjection_library()
+        await library.warm(pipeline.DEFAULT_SPEAKER1_VOICE_ID)
+
+        frames = FrameQueue(maxlen=1)
+        sink = RecordingSink(expected=1)
+        session = SessionPipeline("test", {}, sink, gate=BigChangeGate(), stream_audio=True, interjection_distance=16)
+        frames.put((0, b"\xff\xd8jpeg", time.perf_counter()))
+        start = time.perf_counter()
+        runner = asyncio.create_task(session.run(frames))
+        await asyncio.wait_for(sink.done.wait(), timeout=10)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        return sink, sink.first_chunk_at - start
+
+    sink, first_chunk_after = asyncio.run(scenario())
+
+    assert sink.events[0] == ("audio_chunk", 0, 0)
+    assert sink.stats[0]["interjection"] is True
+    # Chunk 0 went out before vision even finished, the commentary continues at index 1
+    assert first_chunk_after < STAGE_LATENCY / 2, f"interjection after {first_chunk_after:.2f}s"
+    assert sink.events[1] == ("audio_chunk", 0, 1)
+
+
+def test_superseded_frames_are_abandoned():
+    """Commentary still being written for an older scene is dropped once a newer frame is described"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, 4 * STAGE_LATENCY, STAGE_LATENCY)
+    admission = limits.pipeline_admission()
+
+    sink, elapsed = asyncio.run(run_frames(stream_audio=True, count=3, supersede_limit=2))
+
+    assert sink.events[:2] == [("abandoned", 0, "superseded"), ("abandoned", 1, "superseded")]
+    # Two in a row were superseded, the newest frame gets to finish
+    assert sink.events[-1] == ("audio_end", 2)
+    assert elapsed < 3 * 4 * STAGE_LATENCY, f"3 frames took {elapsed:.2f}s"
+    assert admission.active == 0
+
+
+def test_expired_frame_is_abandoned():
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, 4 * STAGE_LATENCY, STAGE_LATENCY)
+
+    sink, elapsed = asyncio.run(run_frames(stream_audio=False, count=1, frame_deadline=2 * STAGE_LATENCY))
+
+    assert sink.events == [("abandoned", 0, "expired")]
+    assert elapsed < 4 * STAGE_LATENCY, f"expired frame held the pipeline for {elapsed:.2f}s"
+
+
+def test_missed_provider_deadline_drops_only_that_frame():
+    """A vision or TTS call past its deadline abandons its frame, the session keeps going"""
+    limits._semaphores.clear()
+    gemini, _, elevenlabs = install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+    for provider, stub in (("gemini", gemini), ("elevenlabs", elevenlabs)):
+        # Each provider's first call hangs past the deadline, later ones answer in time
+        hangs = [20 * STAGE_LATENCY]
+        stub.latency = lambda hangs=hangs: hangs.pop() if hangs else STAGE_LATENCY
+        hedging.latency_tracker(provider).deadline = 3 * STAGE_LATENCY
+    admission = limits.pipeline_admission()
+
+    sink, _ = asyncio.run(run_frames(stream_audio=False, count=3))
+
+    assert sink.events == [("abandoned", 0, "deadline"), ("abandoned", 1, "deadline"), ("audio", 2)]
+    assert admission.active == 0
+
+
+def test_rate_hint_follows_pipeline_latency():
+    """Once a frame has been spoken the client is told how fast the pipeline actually goes"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+
+    sink, _ = asyncio.run(run_frames(stream_audio=True, count=2, pacer=CapturePacer(min_interval=0.01, headroom=1.0)))
+
+    hints = [event for event in sink.events if event[0] == "rate_hint"]
+    assert hints and hints[0][2] == "pipeline_latency"
+    # Paced to the first frame's time to first audio, far below the client's default 10 s
+    first_audio_ms = sink.stats[0]["time_to_first_audio_ms"]
+    assert abs(hints[0][1] - first_audio_ms) <= 0.5 * first_audio_ms, (hints, first_audio_ms)
+
+
+def test_pending_frames_share_one_vision_request():
+    """With batching, frames that piled up are described together and only the newest gets commentary"""
+    limits._semaphores.clear()
+    gemini, _, _ = install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+
+    sink, _ = asyncio.run(run_frames(stream_audio=False, count=3, expected=1, vision_batch=3))
+
+    assert sink.events == [("audio", 2)]
+    assert gemini.calls == 1
+    *images, prompt = gemini.requests[0]
+    assert len(images) == 3 and prompt.startswith("These 3 screenshots")
+
+
+class RecordingArchive:
+    """Stands in for the commentary writer, keeps what the pipeline queued"""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, session_id, model, description, commentary, audio_url=None):
+        self.rows.append((session_id, model, commentary))
+        return True
+
+
+def test_spoken_commentary_is_archived():
+    """Only commentary whose audio went out is queued for the database, both speakers in one row"""
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, 4 * STAGE_LATENCY, STAGE_LATENCY)
+    archive = RecordingArchive()
+
+    asyncio.run(run_frames(stream_audio=True, count=3, supersede_limit=2, archive=archive))
+
+    assert archive.rows == [
+        ("test", "grok-4-fast", "[excited] What a push! | [analytical] Textbook positioning there.")
+    ]
+
+
+class RecordingMedia:
+    """Stands in for the media archive, keeps what the pipeline handed over"""
+    keyframe_interval = 60
+
+    def __init__(self):
+        self.jobs = []
+
+    def add(self, session_id, model, description, commentary, audio=None, keyframe=None):
+        self.jobs.append((len(audio or b""), keyframe))
+
+
+def test_spoken_audio_and_a_sampled_keyframe_go_to_media():
+    limits._semaphores.clear()
+    install_stub_services(STAGE_LATENCY, STAGE_LATENCY, STAGE_LATENCY)
+    media = RecordingMedia()
+
+    sink, _ = asyncio.run(run_frames(stream_audio=True, count=2, media=media))
+
+    assert [audio for audio, _ in media.jobs] == [stats["bytes"] for stats in sink.stats]
+    # One keyframe per keyframe_interval: the first frame's
+    assert [keyframe for _, keyframe in media.jobs] == [b"\xff\xd8jpeg", None]
+
+
+if __name__ == "__main__":
+    tests = [test_stages_overlap_and_keep_order, test_streaming_mode_keeps_order, test_speaker1_audio_starts_before_llm_finishes,
+             test_interjection_leads_an_idle_big_change, test_superseded_frames_are_abandoned,
+             test_expired_frame_is_abandoned, test_missed_provider_deadline_drops_only_that_frame,
+             test_rate_hint_follows_pipeline_latency,
+             test_pending_frames_share_one_vision_request, test_spoken_commentary_is_archived,
+             test_spoken_audio_and_a_sampled_keyframe_go_to_media]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,60 @@
+"""
+Test the binary WebSocket protocol codec (no API keys needed)
+Run: python -m pytest tests/test_protocol.py  (or python tests/test_protocol.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.routes import protocol
+
+
+def test_round_trip():
+    """Header fields and payload survive pack/unpack"""
+    message = protocol.pack(protocol.KIND_AUDIO, b"\xff\xfbmp3", seq=42, value=3)
+    kind, seq, value, payload = protocol.unpack(message)
+
+    assert len(message) == protocol.HEADER.size + 5
+    assert (kind, seq, value) == (protocol.KIND_AUDIO, 42, 3)
+    assert bytes(payload) == b"\xff\xfbmp3"
+
+
+def test_payload_is_zero_copy():
+    """unpack() hands back a view over the received buffer"""
+    message = bytearray(protocol.pack(protocol.KIND_FRAME, b"jpeg"))
+    _, _, _, payload = protocol.unpack(message)
+
+    message[-1] = ord("G")
+    assert isinstance(payload, memoryview)
+    assert bytes(payload) == b"jpeG"
+
+
+def test_rejects_bad_messages():
+    """Short messages and unknown versions raise ProtocolError"""
+    for message in (b"\x01", b"\x09" + protocol.pack(protocol.KIND_FRAME, b"")[1:]):
+        try:
+            protocol.unpack(message)
+        except protocol.ProtocolError:
+            continue
+        raise AssertionError(f"Accepted bad message: {message!r}")
+
+
+def test_negotiate():
+    """Anything other than an explicit binary request falls back to JSON"""
+    assert protocol.negotiate("binary") == protocol.PROTOCOL_BINARY
+    assert protocol.negotiate(None) == protocol.PROTOCOL_JSON
+    assert protocol.negotiate("msgpack") == protocol.PROTOCOL_JSON
+
+
+if __name__ == "__main__":
+    tests = [test_round_trip, test_payload_is_zero_copy, test_rejects_bad_messages, test_negotiate]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
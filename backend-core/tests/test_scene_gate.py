@@ -0,0 +1,101 @@
+"""
+Test the perceptual-hash scene-change gate (no API keys needed)
+Run: python -m pytest tests/test_scene_gate.py  (or python tests/test_scene_gate.py)
+"""
+import asyncio
+import sys
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.scene_gate import SceneGate, dhash
+
+
+def make_jpeg(box: tuple[int, int, int, int], size=(640, 360), quality=80) -> bytes:
+    """Dark frame with one bright rectangle"""
+    image = Image.new("RGB", size, (20, 20, 30))
+    ImageDraw.Draw(image).rectangle(box, fill=(230, 200, 40))
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_static_scene_is_skipped():
+    """Re-encoded copies of the same scene stay under the threshold"""
+    gate = SceneGate(threshold=5)
+    first = make_jpeg((100, 100, 300, 250), quality=80)
+    recompressed = make_jpeg((100, 100, 300, 250), quality=60)
+
+    async def scenario():
+        result = await gate.check(first)
+        gate.commit(result[2])
+        return result, await gate.check(recompressed)
+
+    (changed1, _, _), (changed2, distance, _) = asyncio.run(scenario())
+    assert changed1 is True
+    assert changed2 is False, f"distance {distance}"
+    assert gate.skipped == 1
+
+
+def test_scene_change_passes():
+    """Moving content crosses the threshold"""
+    gate = SceneGate(threshold=5)
+
+    async def scenario():
+        gate.commit((await gate.check(make_jpeg((100, 100, 300, 250))))[2])
+        return await gate.check(make_jpeg((380, 40, 600, 330)))
+
+    changed, distance, _ = asyncio.run(scenario())
+    assert changed is True, f"distance {distance}"
+    assert gate.skipped == 0
+
+
+def test_refused_frame_leaves_its_scene_unseen():
+    """Until a frame is committed (admitted), the same scene keeps counting as a change"""
+    gate = SceneGate(threshold=5)
+    old_scene, new_scene = make_jpeg((100, 100, 300, 250)), make_jpeg((380, 40, 600, 330))
+
+    async def scenario():
+        gate.commit((await gate.check(old_scene))[2])
+        throttled = await gate.check(new_scene)     # Not committed: the server refused it
+        retried = await gate.check(new_scene)
+        gate.commit(retried[2])
+        return throttled, retried, await gate.check(new_scene)
+
+    throttled, retried, repeat = asyncio.run(scenario())
+    assert throttled[0] and retried[0], "refused scene was treated as already seen"
+    assert repeat[0] is False and gate.skipped == 1
+
+
+def test_disabled_and_undecodable():
+    """Threshold 0 disables the gate; garbage bytes are let through"""
+    frame = make_jpeg((0, 0, 10, 10))
+
+    async def scenario():
+        disabled = SceneGate(threshold=0)
+        results = [await disabled.check(frame), await disabled.check(frame)]
+        results.append(await SceneGate().check(b"not a jpeg"))
+        return results
+
+    assert all(changed for changed, _, _ in asyncio.run(scenario()))
+
+
+def test_dhash_is_64_bits():
+    assert dhash(make_jpeg((100, 100, 300, 250))).bit_length() <= 64
+
+
+if __name__ == "__main__":
+    tests = [test_static_scene_is_skipped, test_scene_change_passes, test_refused_frame_leaves_its_scene_unseen,
+             test_disabled_and_undecodable, test_dhash_is_64_bits]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
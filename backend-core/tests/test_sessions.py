@@ -0,0 +1,172 @@
+"""
+Test the bounded session state store (no API keys needed)
+Run: python -m pytest tests/test_sessions.py  (or python tests/test_sessions.py)
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import sessions
+from app.services.sessions import SessionStore, backend_from_url
+from app.services.vision import VisionService
+from stubs import StubGemini
+
+
+def test_churn_leaves_nothing_behind():
+    """Thousands of connect/describe/disconnect cycles end with an empty store"""
+    store = SessionStore(ttl=60, max_bytes=10 * 1024 * 1024)
+
+    async def churn():
+        for session_id in range(5000):
+            state = await store.open(session_id, {"speaker1_voice_id": "v1"}, "binary", True)
+            for i in range(5):
+                store.add_description(session_id, f"Frame {i}: a player crosses the bridge")
+            store.close(state)
+
+    asyncio.run(churn())
+
+    assert len(store) == 0
+    assert store.bytes == 0
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl=0.05)
+    asyncio.run(store.open(1, {}, "json", False))
+    asyncio.run(store.open(2, {}, "json", False))
+    time.sleep(0.1)
+    store.touch(store.get(2))
+
+    assert store.sweep() == 1
+    assert store.get(1) is None and store.get(2) is not None
+
+
+def test_byte_budget_evicts_least_recently_active():
+    store = SessionStore(ttl=60, max_bytes=4000)
+    for session_id in range(3):
+        asyncio.run(store.open(session_id, {}, "json", False))
+    store.add_description(0, "x" * 1500)    # 0 is now the most recently active, 1 the least
+
+    assert store.get(1) is None
+    assert store.get(0) is not None and store.get(2) is not None
+    assert store.bytes <= 4000
+    assert store.stats()["evicted"] == 1
+
+
+def test_evicted_session_with_an_open_socket_comes_back():
+    """Eviction only lets go of the store's reference: an open session's next activity restores its record"""
+    store = SessionStore(ttl=0.05)
+    state = asyncio.run(store.open(1, {}, "json", False))
+    store.add_description(1, "a player crosses the bridge")
+    asyncio.run(store.open(2, {}, "json", False))
+    time.sleep(0.1)
+
+    assert store.sweep() == 2 and len(store) == 0 and store.bytes == 0
+    store.touch(state)      # The socket's next message
+    assert store.get(1) is state and len(store) == 1 and store.bytes == state.bytes
+
+    time.sleep(0.1)
+    assert store.sweep() == 1
+    store.add_description(1, "the player reaches the tower")     # Vision of a frame still in flight
+    assert store.get(1) is state
+    assert store.history(1) == ("a player crosses the bridge", "the player reaches the tower")
+
+    # Nothing holds session 2 any more (its socket is gone), so it stays gone
+    store.add_description(2, "ignored")
+    assert store.get(2) is None and store.history(2) == ()
+
+
+def test_reconnect_keeps_the_record_when_the_old_socket_closes():
+    """A client can reconnect before its old socket fails; that socket closing must not drop the record"""
+    store = SessionStore()
+    old = asyncio.run(store.open(3, {}, "binary", True))
+    store.add_description(3, "a player crosses the bridge")
+    new = asyncio.run(store.open(3, {}, "binary", True))
+    assert new is old
+
+    store.close(old)
+    store.add_description(3, "the player reaches the tower")
+    assert store.history(3) == ("a player crosses the bridge", "the player reaches the tower")
+    assert store.stats()["sessions"] == 1
+
+    store.close(new)
+    assert len(store) == 0 and store.bytes == 0
+
+
+def test_vision_history_follows_the_session():
+    """Vision context comes from the store and is gone once the session closes"""
+    store = SessionStore(history_len=2)
+    sessions._store = store
+    gemini = StubGemini(latency=0)
+    vision = VisionService(client=gemini)
+
+    async def describe(times: int):
+        for _ in range(times):
+            await vision.analyze_with_context(b"\xff\xd8jpeg", 7)
+
+    try:
+        state = asyncio.run(store.open(7, {}, "binary", True))
+        asyncio.run(describe(3))
+        assert store.history(7) == ("Scene 2: a player is moving across the map.", "Scene 3: a player is moving across the map.")
+
+        store.close(state)
+        asyncio.run(describe(1))
+        assert store.history(7) == ()
+        assert len(store) == 0
+    finally:
+        sessions._store = None
+
+
+def test_sqlite_backend_resumes_on_another_worker():
+    """A second worker (own store, same SQLite file) picks up where a crashed one left off"""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/sessions.db"
+
+        async def first_worker():
+            store = SessionStore(backend=backend_from_url(url))
+            await store.open(9, {"speaker2_voice_id": "v2"}, "binary", True)
+            store.add_description(9, "A player plants the spike")
+            store.add_description(9, "The defenders rotate to B")
+            await store.flush()
+            # Crash: no close(), the record stays in the shared store
+
+        async def second_worker():
+            store = SessionStore(backend=backend_from_url(url))
+            state = await store.open(9, {"speaker2_voice_id": "v2"}, "binary", True)
+            return list(state.history), store.history(9)
+
+        asyncio.run(first_worker())
+        history, from_store = asyncio.run(second_worker())
+
+    assert history == ["A player plants the spike", "The defenders rotate to B"]
+    assert from_store == tuple(history)
+
+
+def test_sqlite_backend_expires_records():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = backend_from_url(f"sqlite:///{tmp}/sessions.db")
+        backend.save_many({"1": {"history": ["old"]}}, ttl=-1)
+        backend.save_many({"2": {"history": ["new"]}}, ttl=60)
+
+        assert backend.load("1") is None
+        assert backend.load("2") == {"history": ["new"]}
+        assert backend.purge_expired() == 1
+
+
+if __name__ == "__main__":
+    tests = [test_churn_leaves_nothing_behind, test_idle_sessions_expire, test_byte_budget_evicts_least_recently_active,
+             test_evicted_session_with_an_open_socket_comes_back,
+             test_reconnect_keeps_the_record_when_the_old_socket_closes, test_vision_history_follows_the_session, test_sqlite_backend_resumes_on_another_worker,
+             test_sqlite_backend_expires_records]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
@@ -0,0 +1,78 @@
+"""
+Test TTSService scheduling against a fake async ElevenLabs client (no API keys needed)
+Run: python -m pytest tests/test_tts.py  (or python tests/test_tts.py)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.tts import TTSService
+
+RENDER_SECONDS = 0.2
+
+
+class FakeTextToSpeech:
+    """Async client that takes RENDER_SECONDS per request, like AsyncElevenLabs"""
+
+    async def convert(self, text, voice_id, model_id, output_format):
+        await asyncio.sleep(RENDER_SECONDS)
+        yield f"<{voice_id}:{text}>".encode()
+
+    async def stream(self, text, voice_id, model_id, output_format):
+        for i in range(3):
+            await asyncio.sleep(RENDER_SECONDS / 3)
+            yield f"<{voice_id}:{i}>".encode()
+
+
+def make_service() -> TTSService:
+    return TTSService(client=SimpleNamespace(text_to_speech=FakeTextToSpeech()))
+
+
+def test_dual_speaker_runs_in_parallel():
+    """Dual mode costs about one render, and audio stays in speaker order"""
+    service = make_service()
+
+    start = time.perf_counter()
+    audio = asyncio.run(service.synthesize("[a] one | [b] two", voice_id="v1", voice_id_2="v2"))
+    elapsed = time.perf_counter() - start
+
+    assert audio == b"<v1:[a] one><v2:[b] two>"
+    assert elapsed < RENDER_SECONDS * 1.7, f"took {elapsed:.2f}s"
+
+
+def test_single_speaker():
+    """No second voice means no split"""
+    audio = asyncio.run(make_service().synthesize("[a] one | [b] two", voice_id="v1", voice_id_2=None))
+    assert audio == b"<v1:[a] one | [b] two>"
+
+
+def test_stream_keeps_speaker_order():
+    """Streaming yields all of speaker 1 before speaker 2, while rendering both at once"""
+    service = make_service()
+
+    async def collect():
+        return [chunk async for chunk in service.stream("[a] one | [b] two", voice_id="v1", voice_id_2="v2")]
+
+    start = time.perf_counter()
+    chunks = asyncio.run(collect())
+    elapsed = time.perf_counter() - start
+
+    assert chunks == [b"<v1:0>", b"<v1:1>", b"<v1:2>", b"<v2:0>", b"<v2:1>", b"<v2:2>"]
+    assert elapsed < RENDER_SECONDS * 1.7, f"took {elapsed:.2f}s"
+
+
+if __name__ == "__main__":
+    tests = [test_dual_speaker_runs_in_parallel, test_single_speaker, test_stream_keeps_speaker_order]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
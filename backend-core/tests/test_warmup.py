@@ -0,0 +1,75 @@
+"""
+Test startup warmup and /health readiness (stub providers, no API keys needed)
+Run: python -m pytest tests/test_warmup.py  (or python tests/test_warmup.py)
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import warmup
+from app.services.warmup import Warmup
+from stubs import install_stub_services
+
+
+def test_components_report_and_never_block_readiness():
+    """A slow or failing component is reported, and the process still becomes ready"""
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def broken():
+        raise RuntimeError("bad key")
+
+    state = Warmup()
+    started = time.perf_counter()
+    asyncio.run(state.run(budget=0.1, components={"fast": lambda: asyncio.sleep(0), "slow": slow, "broken": broken}))
+
+    assert state.ready
+    assert time.perf_counter() - started < 1
+    assert {name: info["status"] for name, info in state.components.items()} == {
+        "fast": "ok", "slow": "timeout", "broken": "failed"
+    }
+
+
+def test_health_is_ready_once_clients_are_warm():
+    gemini, grok, elevenlabs = install_stub_services()
+    warmup._warmup = None
+    os.environ["INTERJECTION_DISTANCE"] = "0"
+    try:
+        with TestClient(app) as client:
+            give_up = time.perf_counter() + 10
+            response = client.get("/health")
+            while response.status_code == 503 and time.perf_counter() < give_up:
+                assert response.json()["status"] == "warming"
+                time.sleep(0.05)
+                response = client.get("/health")
+    finally:
+        del os.environ["INTERJECTION_DISTANCE"]
+        warmup._warmup = None
+
+    assert response.status_code == 200
+    startup = response.json()["startup"]
+    assert {"workers", "vision", "llm", "tts"} <= set(startup)
+    assert all(info["status"] == "ok" for info in startup.values())
+    # Each provider connected before any frame arrived
+    assert (gemini.lookups, grok.lookups, elevenlabs.lookups) == (1, 1, 1)
+    assert gemini.calls == grok.calls == elevenlabs.calls == 0
+
+
+if __name__ == "__main__":
+    tests = [test_components_report_and_never_block_readiness, test_health_is_ready_once_clients_are_warm]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
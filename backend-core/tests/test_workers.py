@@ -0,0 +1,92 @@
+"""
+Test the shared CPU worker pool (no API keys needed)
+Run: python -m pytest tests/test_workers.py  (or python tests/test_workers.py)
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.frames import normalize_jpeg
+from app.services.workers import POOL_PROCESS, WorkerPool
+from test_frames import make_capture
+
+CALLS = 8
+
+
+def checksum(data: bytes) -> int:
+    """Pure-Python CPU work that holds the GIL"""
+    total = 0
+    for _ in range(20):
+        for byte in data:
+            total = (total * 31 + byte) & 0xFFFFFFFF
+    return total
+
+
+async def max_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+def test_pool_runs_calls_and_reports_stats():
+    """Results, exceptions and memoryview arguments all cross the process boundary"""
+    pool = WorkerPool(POOL_PROCESS, max_workers=2)
+
+    async def scenario():
+        frame = memoryview(make_capture(size=(1920, 1080)))
+        results = await asyncio.gather(*(pool.run(normalize_jpeg, frame, 640, 70) for _ in range(4)))
+        try:
+            await pool.run(normalize_jpeg, b"not a jpeg")
+        except OSError:
+            return results, True
+        return results, False
+
+    try:
+        results, raised = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert len(set(results)) == 1 and results[0][:2] == b"\xff\xd8"
+    assert raised
+    stats = pool.stats()
+    assert stats["completed"] == 4 and stats["queue_depth"] == 0
+    assert stats["avg_run_ms"] > 0
+
+
+def test_event_loop_stays_responsive():
+    """GIL-holding work on the process pool doesn't stall the loop"""
+    pool = WorkerPool(POOL_PROCESS, max_workers=2)
+    data = bytes(range(256)) * 200
+
+    async def scenario():
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(max_loop_lag(stop))
+        await asyncio.gather(*(pool.run(checksum, data) for _ in range(CALLS)))
+        stop.set()
+        return await lag_task
+
+    try:
+        lag = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert lag < 0.05, f"event loop stalled for {lag * 1000:.0f} ms"
+    assert pool.stats()["avg_wait_ms"] > 0     # More calls than workers, so some had to queue
+
+
+if __name__ == "__main__":
+    tests = [test_pool_runs_calls_and_reports_stats, test_event_loop_stays_responsive]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    exit(1 if failed else 0)
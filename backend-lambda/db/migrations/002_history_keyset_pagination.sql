@@ -0,0 +1,23 @@
+-- Migration: Keyset pagination index and denormalized commentary_count for /history/list
+-- Date: 2026-10-16
+
+-- The cursor is (started_at, id), so every session needs a start time: give the rows
+-- without one the best time known, then keep it from going NULL again
+UPDATE sessions
+SET started_at = COALESCE(ended_at, CURRENT_TIMESTAMP)
+WHERE started_at IS NULL;
+
+-- (user_id, started_at) pages a user's sessions newest first; InnoDB appends the primary key,
+-- so the (started_at, id) cursor is served from the index without a sort
+ALTER TABLE sessions
+MODIFY COLUMN started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+ADD COLUMN commentary_count INT NOT NULL DEFAULT 0,
+ADD INDEX idx_user_started (user_id, started_at);
+
+-- The new index covers the user_id foreign key
+ALTER TABLE sessions
+DROP INDEX idx_user_sessions;
+
+-- Backfill; from here on backend-core increments it with every batch of commentaries it writes
+UPDATE sessions s
+SET commentary_count = (SELECT COUNT(*) FROM commentaries c WHERE c.session_id = s.id);
@@ -12,17 +12,20 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE TABLE IF NOT EXISTS sessions (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
-    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     ended_at TIMESTAMP NULL,
     status VARCHAR(20) DEFAULT 'active',
     frame_count INT DEFAULT 0,
+    -- Kept up to date by backend-core as it writes commentaries (history lists without a join)
+    commentary_count INT NOT NULL DEFAULT 0,
     -- Voice preferences (Google TTS compatible)
     voice VARCHAR(50),
     commentary_style VARCHAR(50),
     speaking_rate DECIMAL(3,2) DEFAULT 1.0,
     pitch DECIMAL(4,1) DEFAULT 0.0,
     volume INT DEFAULT 100,
-    INDEX idx_user_sessions (user_id),
+    -- Keyset pagination of a user's history by (started_at, id)
+    INDEX idx_user_started (user_id, started_at),
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -1,4 +1,6 @@
+import base64
 import json
+from datetime import datetime
 from db.connection import get_db_connection, release_db_connection
 
 def get_cors_headers(event):
@@ -63,48 +65,86 @@ def handler(event, context):
     }
 
 
+def encode_cursor(started_at, session_id):
+    """Opaque keyset cursor: the last session on a page (started_at is NOT NULL, migration 002)"""
+    raw = f"{started_at.isoformat()}|{session_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(started_at, session_id) from a cursor, raises ValueError if it isn't one of ours"""
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    started_at, session_id = raw.split('|')
+    return datetime.fromisoformat(started_at), int(session_id)
+
+
 def list_sessions(user_sub, event):
-    """List all sessions for a user with pagination"""
+    """
+    List a user's sessions, newest first, with keyset pagination
+
+    Pages follow (started_at, id) through idx_user_started, and commentary_count is a
+    column kept up to date by the writer, so a page costs the same however much history
+    the user has. Pass the previous page's next_cursor to get the next one.
+    """
     cors_headers = get_cors_headers(event)
     conn = None
     try:
         # Get pagination parameters from query string
         query_params = event.get('queryStringParameters') or {}
         limit = int(query_params.get('limit', 10))
-        offset = int(query_params.get('offset', 0))
-
-        # Validate pagination params
         limit = max(1, min(limit, 100))  # Between 1 and 100
-        offset = max(0, offset)
+        after = None
+        if query_params.get('cursor'):
+            try:
+                after = decode_cursor(query_params['cursor'])
+            except (ValueError, UnicodeDecodeError):
+                return {
+                    'statusCode': 400,
+                    'headers': cors_headers,
+                    'body': json.dumps({'error': 'Invalid cursor'})
+                }
 
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Get total count for pagination metadata
-        cursor.execute("""
-            SELECT COUNT(DISTINCT s.id) as count
-            FROM sessions s
-            JOIN users u ON u.id = s.user_id
-            WHERE u.cognito_sub = %s
-        """, (user_sub,))
-        total_count = cursor.fetchone()['count']
+        cursor.execute("SELECT id FROM users WHERE cognito_sub = %s", (user_sub,))
+        user = cursor.fetchone()
+        if user is None:
+            return {
+                'statusCode': 200,
+                'headers': cors_headers,
+                'body': json.dumps({
+                    'sessions': [],
+                    'pagination': {'limit': limit, 'next_cursor': None, 'has_more': False}
+                })
+            }
 
-        cursor.execute("""
-            SELECT s.id, s.started_at, s.ended_at, s.status, s.frame_count,
-                   s.voice, s.commentary_style, s.speaking_rate, s.pitch, s.volume,
-                   COUNT(c.id) as commentary_count
-            FROM sessions s
-            LEFT JOIN commentaries c ON c.session_id = s.id
-            JOIN users u ON u.id = s.user_id
-            WHERE u.cognito_sub = %s
-            GROUP BY s.id, s.started_at, s.ended_at, s.status, s.frame_count,
-                     s.voice, s.commentary_style, s.speaking_rate, s.pitch, s.volume
-            ORDER BY s.started_at DESC
-            LIMIT %s OFFSET %s
-        """, (user_sub, limit, offset))
+        # One row past the page tells whether there is a next one
+        columns = """
+            SELECT id, started_at, ended_at, status, frame_count, commentary_count,
+                   voice, commentary_style, speaking_rate, pitch, volume
+            FROM sessions
+        """
+        if after is None:
+            cursor.execute(columns + """
+                WHERE user_id = %s
+                ORDER BY started_at DESC, id DESC
+                LIMIT %s
+            """, (user['id'], limit + 1))
+        else:
+            started_at, session_id = after
+            cursor.execute(columns + """
+                WHERE user_id = %s
+                  AND (started_at < %s OR (started_at = %s AND id < %s))
+                ORDER BY started_at DESC, id DESC
+                LIMIT %s
+            """, (user['id'], started_at, started_at, session_id, limit + 1))
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
         sessions = []
-        for row in cursor.fetchall():
+        for row in rows:
             # Calculate duration
             duration = None
             if row['started_at'] and row['ended_at']:
@@ -133,10 +173,9 @@ def list_sessions(user_sub, event):
             'body': json.dumps({
                 'sessions': sessions,
                 'pagination': {
-                    'total': total_count,
                     'limit': limit,
-                    'offset': offset,
-                    'has_more': (offset + limit) < total_count
+                    'next_cursor': encode_cursor(rows[-1]['started_at'], rows[-1]['id']) if has_more else None,
+                    'has_more': has_more
                 }
             })
         }
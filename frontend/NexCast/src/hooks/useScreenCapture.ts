@@ -3,7 +3,8 @@ import type { UseScreenCaptureReturn } from '../interfaces/capture';
 
 /**
  * Hook for capturing screen frames
- * @param captureInterval - Interval between captures in milliseconds (default: 10000ms)
+ * @param captureInterval - Interval between captures in milliseconds (default: 10000ms),
+ *                          can change while capturing (server rate hints)
  */
 export const useScreenCapture = (
   captureInterval: number = 10000
@@ -100,9 +101,6 @@ export const useScreenCapture = (
       // Start continuous preview (30 FPS)
       animationIdRef.current = requestAnimationFrame(renderPreview);
 
-      // Start interval counter for LLM processing (Phase 2)
-      intervalIdRef.current = setInterval(captureFrame, captureInterval);
-
       // Handle user stopping screen share
       stream.getVideoTracks()[0].addEventListener('ended', () => {
         console.log('🔴 SCREEN SHARE ENDED - MediaStream track ended event fired');
@@ -115,7 +113,7 @@ export const useScreenCapture = (
       setError(errorMessage);
       console.error('Screen capture error:', err);
     }
-  }, [captureFrame, captureInterval, renderPreview]);
+  }, [renderPreview]);
 
   /**
    * Stop screen capture
@@ -151,6 +149,18 @@ export const useScreenCapture = (
     setFrameCount(0); // Reset counter
   }, []);
 
+  // Interval counter for LLM processing, restarted whenever the interval changes
+  useEffect(() => {
+    if (!isCapturing) return;
+    intervalIdRef.current = setInterval(captureFrame, captureInterval);
+    return () => {
+      if (intervalIdRef.current) {
+        clearInterval(intervalIdRef.current);
+        intervalIdRef.current = null;
+      }
+    };
+  }, [isCapturing, captureInterval, captureFrame]);
+
   // Cleanup on unmount
   useEffect(() => {
     return () => {
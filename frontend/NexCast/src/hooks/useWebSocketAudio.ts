@@ -1,11 +1,21 @@
 import { useCallback, useRef, useState } from "react";
 import type { SessionPreferences } from "../interfaces/session";
-import type { UseWebSocketAudioReturn } from "../interfaces/websocket";
+import type { UseWebSocketAudioReturn, WireProtocol } from "../interfaces/websocket";
+import { KIND_AUDIO, KIND_AUDIO_CHUNK, KIND_FRAME, dataUrlToBytes, packMessage, unpackMessage } from "../services/protocol";
+import { StreamingAudioPlayer, supportsStreamingAudio } from "../services/streamingAudio";
 
 export const useWebSocketAudio = (): UseWebSocketAudioReturn => {
     const [isConnected, setIsConnected] = useState(false);
     const [error, setError] = useState<string | null>(null);
+    const [captureIntervalHint, setCaptureIntervalHint] = useState<number | null>(null);
     const wsRef = useRef<WebSocket | null>(null);
+    const protocolRef = useRef<WireProtocol>('json');
+    const frameSeqRef = useRef<number>(0);
+    // Server asked us to back off: no frames until this timestamp (ms)
+    const throttledUntilRef = useRef<number>(0);
+    const streamingPlayerRef = useRef<StreamingAudioPlayer | null>(null);
+    // Chunks buffered per clip when MediaSource can't play MP3 progressively
+    const chunkBuffersRef = useRef<Map<number, Uint8Array<ArrayBuffer>[]>>(new Map());
     const audioContextRef = useRef<AudioContext | null>(null);
     const nextPlayTimeRef = useRef<number>(0);
     const audioQueueRef = useRef<AudioBuffer[]>([]);
@@ -34,54 +44,141 @@ export const useWebSocketAudio = (): UseWebSocketAudioReturn => {
         };
     }, []);
 
+    const enqueueAudio = useCallback(async (audioData: ArrayBuffer) => {
+        try {
+            if (!audioContextRef.current) {
+                audioContextRef.current = new AudioContext();
+            }
+
+            const audioBuffer = await audioContextRef.current.decodeAudioData(audioData)
+
+            // Drop oldest if queue is full
+            if (audioQueueRef.current.length >= MAX_QUEUE_SIZE) {
+                audioQueueRef.current.shift();
+                console.log('Queue full, dropped oldest audio');
+            }
+
+            audioQueueRef.current.push(audioBuffer);
+
+            // Start playback if not already playing
+            if (audioQueueRef.current.length === 1) {
+                playNextAudio();
+            }
+        } catch (err) {
+            console.error('Audio decode error:', err);
+            // Don't close connection on decode error, just skip this audio
+        }
+    }, [playNextAudio]);
+
+    const handleAudioChunk = useCallback((seq: number, chunk: Uint8Array<ArrayBuffer>) => {
+        if (streamingPlayerRef.current) {
+            streamingPlayerRef.current.chunk(seq, chunk);
+            return;
+        }
+        const chunks = chunkBuffersRef.current.get(seq) ?? [];
+        chunks.push(chunk);
+        chunkBuffersRef.current.set(seq, chunks);
+    }, []);
+
+    const handleAudioEnd = useCallback(async (seq: number) => {
+        if (streamingPlayerRef.current) {
+            streamingPlayerRef.current.end(seq);
+            return;
+        }
+        // Fallback: play the whole clip once it's complete
+        const chunks = chunkBuffersRef.current.get(seq) ?? [];
+        chunkBuffersRef.current.delete(seq);
+        const clip = new Uint8Array(chunks.reduce((total, chunk) => total + chunk.byteLength, 0));
+        let offset = 0;
+        for (const chunk of chunks) {
+            clip.set(chunk, offset);
+            offset += chunk.byteLength;
+        }
+        if (clip.byteLength > 0) {
+            await enqueueAudio(clip.buffer);
+        }
+    }, [enqueueAudio]);
+
     const connect = useCallback((sessionId: number, preferences: SessionPreferences) => {
             const wsUrl = import.meta.env.VITE_WS_URL || 'ws://localhost:8000/ws';
             const ws = new WebSocket(`${wsUrl}/${sessionId}`);
+            ws.binaryType = 'arraybuffer';
             wsRef.current = ws;
+            protocolRef.current = 'json';
+            frameSeqRef.current = 0;
+            setCaptureIntervalHint(null);
+            throttledUntilRef.current = 0;
+            chunkBuffersRef.current.clear();
+            streamingPlayerRef.current = supportsStreamingAudio() ? new StreamingAudioPlayer() : null;
 
             ws.onopen = () => {
                 console.log('WebSocket connected');
                 ws.send(JSON.stringify({
                     type: 'init',
-                    preferences: preferences
+                    preferences: preferences,
+                    protocol: 'binary',
+                    stream_audio: true
                 }))
             }
 
             ws.onmessage = async (event) => {
+                // Binary protocol: header + raw MP3
+                if (event.data instanceof ArrayBuffer) {
+                    try {
+                        const message = unpackMessage(event.data);
+                        if (message.kind === KIND_AUDIO_CHUNK) {
+                            handleAudioChunk(message.seq, message.payload.slice());
+                        } else if (message.kind === KIND_AUDIO) {
+                            // decodeAudioData detaches its input, so hand it its own buffer
+                            await enqueueAudio(message.payload.slice().buffer);
+                        }
+                    } catch (err) {
+                        console.error('Binary message error:', err);
+                    }
+                    return;
+                }
+
                 const data = JSON.parse(event.data);
 
                 if (data.type === 'ready') {
+                    protocolRef.current = data.protocol === 'binary' ? 'binary' : 'json';
                     setIsConnected(true);
                     setError(null);
-                    console.log('WebSocket ready');
+                    console.log(`WebSocket ready (${protocolRef.current} protocol, trace ${data.trace_id})`);
                 }
 
-                if (data.type === 'audio') {
-                    try {
-                        const audioBytes = Uint8Array.from(atob(data.audio), c=> c.charCodeAt(0))
+                if (data.type === 'skipped') {
+                    console.log(`Frame ${data.seq} skipped: ${data.reason} (total skipped: ${data.frames_skipped})`);
+                }
 
-                        if (!audioContextRef.current) {
-                            audioContextRef.current = new AudioContext();
-                        }
+                if (data.type === 'throttle') {
+                    throttledUntilRef.current = Date.now() + data.retry_after_ms;
+                    console.log(`Frame ${data.seq} throttled: ${data.reason}, pausing frames for ${data.retry_after_ms} ms`);
+                }
 
-                        const audioBuffer = await audioContextRef.current.decodeAudioData(audioBytes.buffer)
+                if (data.type === 'rate_hint') {
+                    console.log(`Capture rate hint: every ${data.interval_ms} ms (${data.reason})`);
+                    setCaptureIntervalHint(data.interval_ms);
+                }
 
-                        // Drop oldest if queue is full
-                        if (audioQueueRef.current.length >= MAX_QUEUE_SIZE) {
-                            audioQueueRef.current.shift();
-                            console.log('Queue full, dropped oldest audio');
-                        }
+                if (data.type === 'abandoned') {
+                    console.log(`Frame ${data.seq} ${data.reason}, commentary dropped (${data.provider_ms_saved} ms provider time saved)`);
+                    // Close out anything already sent for it (an interjection chunk)
+                    await handleAudioEnd(data.seq);
+                }
 
-                        audioQueueRef.current.push(audioBuffer);
+                if (data.type === 'audio') {
+                    const audioBytes = Uint8Array.from(atob(data.audio), c=> c.charCodeAt(0))
+                    await enqueueAudio(audioBytes.buffer);
+                }
 
-                        // Start playback if not already playing
-                        if (audioQueueRef.current.length === 1) {
-                            playNextAudio();
-                        }
-                    } catch (err) {
-                        console.error('Audio decode error:', err);
-                        // Don't close connection on decode error, just skip this audio
-                    }
+                if (data.type === 'audio_chunk') {
+                    handleAudioChunk(data.seq, Uint8Array.from(atob(data.audio), c=> c.charCodeAt(0)));
+                }
+
+                if (data.type === 'audio_end') {
+                    console.log(`Audio ${data.seq}: first chunk after ${data.time_to_first_audio_ms} ms, ${data.chunks} chunks in ${data.total_ms} ms`);
+                    await handleAudioEnd(data.seq);
                 }
             }
 
@@ -98,7 +195,7 @@ export const useWebSocketAudio = (): UseWebSocketAudioReturn => {
                 console.trace('WebSocket close stack trace');
                 setIsConnected(false);
             }
-        }, [playNextAudio]);
+        }, [enqueueAudio, handleAudioChunk, handleAudioEnd]);
 
     const disconnect = useCallback(() => {
         if (wsRef.current) {
@@ -107,21 +204,32 @@ export const useWebSocketAudio = (): UseWebSocketAudioReturn => {
         }
         // Clear audio queue
         audioQueueRef.current = [];
+        chunkBuffersRef.current.clear();
+        streamingPlayerRef.current?.reset();
+        streamingPlayerRef.current = null;
         nextPlayTimeRef.current = 0;
         setIsConnected(false);
     }, []);
 
     const sendFrame = useCallback((frameBase64: string) => {
+        if (Date.now() < throttledUntilRef.current) {
+            return;
+        }
         if (wsRef.current?.readyState === WebSocket.OPEN) {
-            wsRef.current.send(JSON.stringify({
-                type: 'frame',
-                frame: frameBase64.split(',')[1]    // remove "data:image/jpeg;base64" prefix
-            }));
+            if (protocolRef.current === 'binary') {
+                const seq = frameSeqRef.current++;
+                wsRef.current.send(packMessage(KIND_FRAME, dataUrlToBytes(frameBase64), seq));
+            } else {
+                wsRef.current.send(JSON.stringify({
+                    type: 'frame',
+                    frame: frameBase64.split(',')[1]    // remove "data:image/jpeg;base64" prefix
+                }));
+            }
             console.log('Frame sent');
         }
     }, []);
 
-    return { isConnected, error, connect, disconnect, sendFrame}
+    return { isConnected, error, connect, disconnect, sendFrame, captureIntervalHint}
 }
 
 
@@ -9,9 +9,65 @@ export interface WebSocketMessage {
   data?: any;
 }
 
+export type WireProtocol = 'json' | 'binary';
+
+export interface ReadyMessage extends WebSocketMessage {
+  type: 'ready';
+  protocol?: WireProtocol;
+  stream_audio?: boolean;
+  trace_id?: string;  // Tags this session's server-side trace logs
+}
+
 export interface AudioMessage extends WebSocketMessage {
   type: 'audio';
   data: string; // Base64 audio
+  frames_dropped?: number;
+}
+
+export interface AudioChunkMessage extends WebSocketMessage {
+  type: 'audio_chunk';
+  seq: number;
+  index: number;
+  audio: string; // Base64 MP3 chunk (JSON protocol only)
+}
+
+export interface AudioEndMessage extends WebSocketMessage {
+  type: 'audio_end';
+  seq: number;
+  chunks: number;
+  bytes: number;
+  time_to_first_audio_ms: number | null;
+  total_ms: number;
+  interjection: boolean;
+  frames_dropped: number;
+}
+
+export interface SkippedMessage extends WebSocketMessage {
+  type: 'skipped';
+  seq: number;
+  reason: 'no_scene_change';
+  distance: number;
+  frames_skipped: number;
+}
+
+export interface ThrottleMessage extends WebSocketMessage {
+  type: 'throttle';
+  seq: number;
+  reason: 'server_busy' | 'provider_rate_limit';
+  retry_after_ms: number;
+}
+
+export interface AbandonedMessage extends WebSocketMessage {
+  type: 'abandoned';
+  seq: number;
+  reason: 'superseded' | 'expired' | 'deadline';
+  provider_ms_saved: number;  // Session total so far
+}
+
+export interface RateHintMessage extends WebSocketMessage {
+  type: 'rate_hint';
+  interval_ms: number;  // Capture a frame this often
+  reason: 'pipeline_latency' | 'frames_dropped';
 }
 
 export interface UseWebSocketAudioReturn {
@@ -20,4 +76,5 @@ export interface UseWebSocketAudioReturn {
   connect: (sessionId: number, preferences: SessionPreferences) => void;
   disconnect: () => void;
   sendFrame: (frameBase64: string) => void;
+  captureIntervalHint: number | null;  // Server's latest rate_hint (ms), null until one arrives
 }
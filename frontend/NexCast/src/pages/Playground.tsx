@@ -24,8 +24,8 @@ export const Playground = () => {
     capture_interval: 10000,
   });
 
-  // Screen capture hook
-  const capture = useScreenCapture(preferences.capture_interval || 10000);
+  // Screen capture hook: the user's interval until the server hints at what the pipeline can keep up with
+  const capture = useScreenCapture(wsAudio.captureIntervalHint ?? (preferences.capture_interval || 10000));
 
   // Timer ref
   const timerIntervalRef = useRef<NodeJS.Timeout | null>(null);
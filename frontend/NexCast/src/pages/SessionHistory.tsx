@@ -11,7 +11,8 @@ export const SessionHistory = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [currentPage, setCurrentPage] = useState(1);
-  const [totalSessions, setTotalSessions] = useState(0);
+  // cursors[i] fetches page i + 1 (keyset pagination, page 1 needs none)
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined]);
   const [hasMore, setHasMore] = useState(false);
 
   useEffect(() => {
@@ -22,11 +23,13 @@ export const SessionHistory = () => {
     try {
       setIsLoading(true);
       setError(null);
-      const offset = (currentPage - 1) * ITEMS_PER_PAGE;
-      const response = await api.getHistory({ limit: ITEMS_PER_PAGE, offset });
+      const response = await api.getHistory({ limit: ITEMS_PER_PAGE, cursor: cursors[currentPage - 1] });
       setSessions(response.sessions);
-      setTotalSessions(response.pagination.total);
       setHasMore(response.pagination.has_more);
+      const nextCursor = response.pagination.next_cursor;
+      if (nextCursor) {
+        setCursors((prev) => [...prev.slice(0, currentPage), nextCursor]);
+      }
     } catch (err) {
       const errorMessage =
         err instanceof Error ? err.message : 'Failed to load session history';
@@ -45,7 +48,7 @@ export const SessionHistory = () => {
     setCurrentPage((prev) => prev + 1);
   };
 
-  const totalPages = Math.ceil(totalSessions / ITEMS_PER_PAGE);
+  const firstShown = (currentPage - 1) * ITEMS_PER_PAGE + 1;
 
   const formatDate = (dateString: string): string => {
     const date = new Date(dateString);
@@ -165,11 +168,10 @@ export const SessionHistory = () => {
         )}
 
         {/* Pagination */}
-        {!isLoading && !error && totalSessions > 0 && (
+        {!isLoading && !error && sessions.length > 0 && (
           <div className="mt-6 flex items-center justify-between border-t border-gray-700 pt-4">
             <div className="text-sm text-gray-400">
-              Showing {Math.min((currentPage - 1) * ITEMS_PER_PAGE + 1, totalSessions)} -{' '}
-              {Math.min(currentPage * ITEMS_PER_PAGE, totalSessions)} of {totalSessions} sessions
+              Showing {firstShown} - {firstShown + sessions.length - 1} sessions
             </div>
             <div className="flex items-center gap-2">
               <Button
@@ -183,7 +185,7 @@ export const SessionHistory = () => {
                 Previous
               </Button>
               <div className="text-sm text-gray-400 px-3">
-                Page {currentPage} of {totalPages}
+                Page {currentPage}
               </div>
               <Button
                 onClick={handleNextPage}
@@ -63,15 +63,14 @@ export interface SessionDetail extends Session {
 
 export interface PaginationParams {
   limit?: number;
-  offset?: number;
+  cursor?: string;  // next_cursor of the previous page, omit for the newest sessions
 }
 
 export interface PaginatedResponse<T> {
   sessions: T[];
   pagination: {
-    total: number;
     limit: number;
-    offset: number;
+    next_cursor: string | null;
     has_more: boolean;
   };
 }
@@ -110,7 +109,7 @@ export const api = {
   async getHistory(params?: PaginationParams): Promise<PaginatedResponse<Session>> {
     const queryParams = new URLSearchParams();
     if (params?.limit) queryParams.append('limit', params.limit.toString());
-    if (params?.offset) queryParams.append('offset', params.offset.toString());
+    if (params?.cursor) queryParams.append('cursor', params.cursor);
 
     const url = `/history/list${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
     const response = await apiClient.get(url);
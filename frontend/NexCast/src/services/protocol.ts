@@ -0,0 +1,66 @@
+/**
+ * Binary WebSocket protocol (mirrors backend-core/app/routes/protocol.py)
+ *
+ * Header (big-endian, 10 bytes): version u8 | kind u8 | seq u32 | value u32
+ * followed by the raw payload (JPEG for frames, MP3 for audio / audio chunks).
+ * Control messages (ready, skipped, audio_end) stay JSON text frames.
+ */
+
+export const PROTOCOL_VERSION = 1;
+export const KIND_FRAME = 1;
+export const KIND_AUDIO = 2;
+export const KIND_AUDIO_CHUNK = 3;
+export const HEADER_SIZE = 10;
+
+export interface BinaryMessage {
+  kind: number;
+  seq: number;
+  value: number;
+  payload: Uint8Array<ArrayBuffer>;
+}
+
+/**
+ * Build a binary message: header + payload
+ */
+export const packMessage = (kind: number, payload: Uint8Array, seq: number = 0, value: number = 0): ArrayBuffer => {
+  const buffer = new ArrayBuffer(HEADER_SIZE + payload.byteLength);
+  const view = new DataView(buffer);
+  view.setUint8(0, PROTOCOL_VERSION);
+  view.setUint8(1, kind);
+  view.setUint32(2, seq >>> 0);
+  view.setUint32(6, value >>> 0);
+  new Uint8Array(buffer, HEADER_SIZE).set(payload);
+  return buffer;
+};
+
+/**
+ * Split a binary message into header fields and payload (payload is a view, not a copy)
+ */
+export const unpackMessage = (buffer: ArrayBuffer): BinaryMessage => {
+  if (buffer.byteLength < HEADER_SIZE) {
+    throw new Error(`Message too short: ${buffer.byteLength} bytes`);
+  }
+  const view = new DataView(buffer);
+  const version = view.getUint8(0);
+  if (version !== PROTOCOL_VERSION) {
+    throw new Error(`Unsupported protocol version: ${version}`);
+  }
+  return {
+    kind: view.getUint8(1),
+    seq: view.getUint32(2),
+    value: view.getUint32(6),
+    payload: new Uint8Array(buffer, HEADER_SIZE),
+  };
+};
+
+/**
+ * Decode a "data:image/jpeg;base64,..." URL into raw JPEG bytes
+ */
+export const dataUrlToBytes = (dataUrl: string): Uint8Array<ArrayBuffer> => {
+  const binary = atob(dataUrl.split(',')[1]);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+};
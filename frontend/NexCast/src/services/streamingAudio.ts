@@ -0,0 +1,150 @@
+/**
+ * Progressive MP3 playback for audio_chunk / audio_end streams
+ *
+ * Each clip gets its own MediaSource so playback starts on the first chunk
+ * instead of after the whole clip has arrived. One clip plays at a time and at
+ * most one waits behind it (older waiting clips are dropped, same as the
+ * buffered queue in useWebSocketAudio).
+ */
+
+const MIME_TYPE = 'audio/mpeg';
+
+export const supportsStreamingAudio = (): boolean =>
+  typeof MediaSource !== 'undefined' && MediaSource.isTypeSupported(MIME_TYPE);
+
+class AudioStream {
+  private readonly audio = new Audio();
+  private readonly mediaSource = new MediaSource();
+  private readonly objectUrl: string;
+  private sourceBuffer: SourceBuffer | null = null;
+  private pending: Uint8Array<ArrayBuffer>[] = [];
+  private ended = false;
+  onFinished: (() => void) | null = null;
+
+  constructor() {
+    this.objectUrl = URL.createObjectURL(this.mediaSource);
+    this.audio.src = this.objectUrl;
+
+    this.mediaSource.addEventListener('sourceopen', () => {
+      this.sourceBuffer = this.mediaSource.addSourceBuffer(MIME_TYPE);
+      this.sourceBuffer.addEventListener('updateend', () => this.flush());
+      this.flush();
+    }, { once: true });
+
+    this.audio.addEventListener('ended', () => this.finish());
+    this.audio.addEventListener('error', () => this.finish());
+  }
+
+  append(chunk: Uint8Array<ArrayBuffer>) {
+    this.pending.push(chunk);
+    this.flush();
+  }
+
+  end() {
+    this.ended = true;
+    this.flush();
+  }
+
+  play() {
+    this.audio.play().catch((err) => {
+      console.error('Audio play error:', err);
+      this.finish();
+    });
+  }
+
+  stop() {
+    this.audio.pause();
+    this.finish();
+  }
+
+  private flush() {
+    const sourceBuffer = this.sourceBuffer;
+    if (!sourceBuffer || sourceBuffer.updating) return;
+
+    const chunk = this.pending.shift();
+    if (chunk) {
+      sourceBuffer.appendBuffer(chunk);
+      return;
+    }
+
+    if (this.ended && this.mediaSource.readyState === 'open') {
+      this.mediaSource.endOfStream();
+    }
+  }
+
+  private finish() {
+    if (!this.onFinished) return;
+    const onFinished = this.onFinished;
+    this.onFinished = null;
+    URL.revokeObjectURL(this.objectUrl);
+    onFinished();
+  }
+}
+
+export class StreamingAudioPlayer {
+  private streams = new Map<number, AudioStream>();
+  private playing: number | null = null;
+  private waiting: number | null = null;
+
+  /**
+   * Add a chunk to clip `seq`, starting playback on its first chunk if nothing else is playing
+   */
+  chunk(seq: number, data: Uint8Array<ArrayBuffer>) {
+    let stream = this.streams.get(seq);
+    if (!stream) {
+      stream = this.open(seq);
+    }
+    stream.append(data);
+  }
+
+  /**
+   * Mark clip `seq` as complete
+   */
+  end(seq: number) {
+    this.streams.get(seq)?.end();
+  }
+
+  /**
+   * Stop playback and forget every clip
+   */
+  reset() {
+    const streams = [...this.streams.values()];
+    this.streams.clear();
+    this.playing = null;
+    this.waiting = null;
+    streams.forEach((stream) => stream.stop());
+  }
+
+  private open(seq: number): AudioStream {
+    const stream = new AudioStream();
+    this.streams.set(seq, stream);
+    stream.onFinished = () => this.onFinished(seq);
+
+    if (this.playing === null) {
+      this.playing = seq;
+      stream.play();
+    } else {
+      // Drop the clip that was already waiting, newer commentary wins
+      if (this.waiting !== null) {
+        console.log('Queue full, dropped oldest audio');
+        this.streams.get(this.waiting)?.stop();
+      }
+      this.waiting = seq;
+    }
+    return stream;
+  }
+
+  private onFinished(seq: number) {
+    this.streams.delete(seq);
+    if (this.waiting === seq) {
+      this.waiting = null;
+    }
+    if (this.playing !== seq) return;
+
+    this.playing = this.waiting;
+    this.waiting = null;
+    if (this.playing !== null) {
+      this.streams.get(this.playing)?.play();
+    }
+  }
+}